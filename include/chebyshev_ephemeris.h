@@ -0,0 +1,33 @@
+/*
+Trajectorize
+
+Chebyshev Ephemeris
+
+This file contains methods for evaluating piecewise Chebyshev approximations
+of the states of Kerbol system bodies, which are much cheaper to evaluate
+than solving Kepler's equation at every time.
+*/
+
+#ifndef CHEBYSHEV_EPHEMERIS_H
+#define CHEBYSHEV_EPHEMERIS_H
+
+#include "state_vector_types.h"
+
+// Approximation of a state over segments [t0 + k * segment_length, t0 + (k + 1) * segment_length],
+// k = 0..n_segments-1. Coefficient m of component c (x, y, z, vx, vy, vz) of segment k is
+// coefficients[(k * n_coefficients + m) * 6 + c]
+typedef struct ChebyshevTable
+{
+    double t0;
+    double segment_length;
+    int n_segments;
+    int n_coefficients;
+    const double *coefficients;
+} ChebyshevTable;
+
+// Times outside of the table are extrapolated from the first or last segment
+StateVector chebyshev_state_at_time(ChebyshevTable table, double t);
+// Fills out, a (n_times x 6) row-major array, with the state at each time
+void chebyshev_states_into(ChebyshevTable table, int n_times, const double times[], double *out);
+
+#endif // CHEBYSHEV_EPHEMERIS_H
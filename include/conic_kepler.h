@@ -131,6 +131,63 @@ KeplerianElements ke_orbit_prop(double t, KeplerianElements orbit, double mu);
  */
 StateVectorArray ke_orbit_prop_many(int n, double times[], KeplerianElements orbit, double mu);
 
+/**
+ * @brief Constants of an orbit which don't change as it is propagated,
+ * so that they are only computed once when evaluating it many times
+ */
+typedef struct PreparedOrbit
+{
+    KeplerianElements orbit;  // orbit.true_anomaly is not used
+    double mu;
+    Matrix3 perifocal_to_eci; // rotation from the perifocal frame to the inertial frame
+    double mean_motion;       // rad/s
+    double M_at_epoch;        // mean anomaly at orbit.epoch
+    double p;                 // semi-latus rectum (m)
+    double sqrt_mu_over_p;    // speed scale of the perifocal velocity (m/s)
+    double tan_half_scale;    // sqrt((1 + e) / (1 - e)), relating tan(theta / 2) to tan(E / 2)
+} PreparedOrbit;
+
+/**
+ * @brief Precompute the constants of an orbit, for use with prepared_orbit_state
+ * and prepared_orbit_state_at_true_anomaly
+ *
+ * @param orbit
+ * @param mu standard gravitational parameter of the parent body (GM) in m^3/s^2
+ * @return PreparedOrbit
+ */
+PreparedOrbit prepare_orbit(KeplerianElements orbit, double mu);
+
+/**
+ * @brief Same as prepare_orbit, but with the mean anomaly at epoch given
+ * directly (the true anomaly of orbit is ignored)
+ *
+ * @param orbit
+ * @param M_at_epoch mean anomaly at orbit.epoch
+ * @param mu standard gravitational parameter of the parent body (GM) in m^3/s^2
+ * @return PreparedOrbit
+ */
+PreparedOrbit prepare_orbit_at_mean_anomaly(KeplerianElements orbit, double M_at_epoch, double mu);
+
+/**
+ * @brief State vector of a prepared orbit at a given true anomaly;
+ * same as state_vector_from_ke
+ *
+ * @param prepared
+ * @param theta true anomaly
+ * @param t time of the returned state vector
+ * @return StateVector
+ */
+StateVector prepared_orbit_state_at_true_anomaly(const PreparedOrbit *prepared, double theta, double t);
+
+/**
+ * @brief State vector of a prepared elliptical orbit at any time, before or after its epoch
+ *
+ * @param prepared
+ * @param t universal time, in seconds since epoch
+ * @return StateVector
+ */
+StateVector prepared_orbit_state(const PreparedOrbit *prepared, double t);
+
 /**
  * @brief Returns a hyperbolic trajectory given a velocity vector at infinity
  * around a body with GM = mu
@@ -12,9 +12,52 @@ system bodies at a certain universal time.
 
 #include "state_vector_types.h"
 #include "kerbol_system_types.h"
+#include "conic_kepler.h"
 
+// Deepest nesting of orbits supported (moons are at depth 2, below Kerbol), and the
+// longest chain of orbits between two bodies, up to their common ancestor and back down
+enum
+{
+    MAX_BODY_DEPTH = 4,
+    MAX_FRAME_CHAIN = 8
+};
+
+// Bodies from the root of the system down to a body, at path[0] to path[depth]
+typedef struct BodyAncestry
+{
+    int depth;
+    enum BodyEnum path[MAX_BODY_DEPTH + 1];
+} BodyAncestry;
+
+// Bodies whose orbits lead from the lowest common ancestor of a frame body and a body:
+// bodies[:n_toward_body] down to the body, whose states are added, and the rest
+// down to the frame body, whose states are subtracted
+typedef struct FrameChain
+{
+    int n_links; // 0 when both bodies are the same
+    int n_toward_body;
+    enum BodyEnum bodies[MAX_FRAME_CHAIN];
+} FrameChain;
+
+// Prepared orbits of a frame chain, for evaluating the state of a body relative to
+// another at many times
+typedef struct RelativeEphemeris
+{
+    FrameChain chain;
+    PreparedOrbit orbits[MAX_FRAME_CHAIN];
+} RelativeEphemeris;
+
+BodyAncestry body_ancestry(enum BodyEnum body_id);
+FrameChain frame_chain(enum BodyEnum frame_id, enum BodyEnum body_id);
+PreparedOrbit prepare_body_orbit(enum BodyEnum body_id);
+RelativeEphemeris prepare_rel_ephemeris(enum BodyEnum frame_id, enum BodyEnum body_id);
+StateVector rel_ephemeris_state_at_time(const RelativeEphemeris *ephemeris, double t);
 StateVector get_rel_state_at_time(double t, enum BodyEnum parent_id, enum BodyEnum child_id);
 StateVectorArray get_rel_state_at_many_times(int n, double times[], enum BodyEnum parent_id, enum BodyEnum child_id);
+void get_rel_states_into(int n_bodies, const enum BodyEnum parent_ids[], const enum BodyEnum child_ids[],
+                         int n_times, const double times[], double *out);
+void get_pairwise_states_into(int n_bodies, const enum BodyEnum body_ids[], int n_times, const double times[],
+                              double *out);
 KeplerianElements ke_from_pke(PlanetaryKeplerianElements pke, double t, double mu);
 StateVectorArray pke_state_locus(PlanetaryKeplerianElements pke, double mu, int n);
 
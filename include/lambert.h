@@ -13,12 +13,22 @@ This header file contains definitions for Lambert's Problem
 
 #include "vec_math_types.h"
 
+enum LambertBranch
+{
+    LAMBERT_LEFT,
+    LAMBERT_RIGHT
+};
+
 typedef struct LambertSolution
 {
     Vector3 v1;
     Vector3 v2;
     double dt;
-    bool valid; // true if solution is valid
+    bool valid;     // true if solution is valid
+    double z;       // converged universal variable, usable as a warm start
+    int iterations; // number of root-finding iterations used
+    int revolutions;          // number of complete revolutions before arrival
+    enum LambertBranch branch; // which of the two solutions, if revolutions > 0
 } LambertSolution;
 
 // Lambert's Problem
@@ -29,6 +39,44 @@ enum TrajectoryType
     RETROGRADE
 };
 
+enum LambertSolver
+{
+    LAMBERT_CURTIS, // universal variable bisection/Newton (Curtis, algorithm 5.2)
+    LAMBERT_IZZO    // Householder iterations on Izzo's formulation
+};
+
 LambertSolution lambert(Vector3 R1, Vector3 R2, double dt, double mu, enum TrajectoryType type);
 
+/**
+ * @brief Solves Lambert's problem starting from a guess of the universal variable z,
+ * e.g. the solution of a neighbouring problem. Falls back to the full search bracket
+ * used by lambert() if the solution cannot be found near the guess.
+ */
+LambertSolution lambert_warm_start(Vector3 R1, Vector3 R2, double dt, double mu, enum TrajectoryType type, double z_guess);
+
+/**
+ * @brief Solves Lambert's problem using Izzo's algorithm
+ * (D. Izzo, "Revisiting Lambert's problem", 2015)
+ * Converges in a few Householder iterations from an analytical initial guess.
+ */
+LambertSolution lambert_izzo(Vector3 R1, Vector3 R2, double dt, double mu, enum TrajectoryType type);
+
+/**
+ * @brief Solves Lambert's problem for every feasible number of revolutions up to max_revs,
+ * using Izzo's algorithm.
+ *
+ * @param solutions output array, with space for at least 2 * max_revs + 1 solutions.
+ * Filled with the single revolution solution first, followed by the left and right
+ * branch solutions for 1, 2, ... revolutions. Solutions that fail to converge are
+ * marked invalid.
+ * @return int number of solutions written
+ */
+int lambert_izzo_multi_rev(Vector3 R1, Vector3 R2, double dt, double mu, enum TrajectoryType type,
+                           int max_revs, LambertSolution solutions[]);
+
+/**
+ * @brief Solves Lambert's problem using the selected solver
+ */
+LambertSolution solve_lambert(Vector3 R1, Vector3 R2, double dt, double mu, enum TrajectoryType type, enum LambertSolver solver);
+
 #endif // LAMBERT_H
\ No newline at end of file
@@ -12,16 +12,66 @@ planning trajectories.
 
 #include <stdbool.h>
 #include "kerbol_system_types.h"
+#include "lambert.h"
+
+// Element type of the dv and v_inf arrays of a GridSearchResult
+enum GridPrecision
+{
+    GRID_DOUBLE,
+    GRID_SINGLE
+};
+
 typedef struct GridSearchResult
 {
     int n_grid_t1;
     int n_grid_tof;
-    double *t1;
-    double *tof;
-    double *dv_ejection;
-    double *dv_capture;
+    double *t1;  // departure time axis (n_grid_t1 elements)
+    double *tof; // time of flight axis (n_grid_tof elements)
+    // The arrays below have n_grid_t1 * n_grid_tof elements, indexed i * n_grid_tof + j.
+    // With GRID_SINGLE precision, the *_single members are used for dv and v_inf
+    enum GridPrecision precision;
+    union
+    {
+        double *dv_ejection;
+        float *dv_ejection_single;
+    };
+    union
+    {
+        double *dv_capture;
+        float *dv_capture_single;
+    };
+    int *branch; // Lambert solution used; 0 = single revolution, 2N - 1 / 2N = left / right branch of N revolutions
+    // Hyperbolic excess velocities of the transfer at departure and arrival (m/s);
+    // optional, left unfilled if NULL. NaN where there is no valid transfer
+    union
+    {
+        Vector3 *v_inf_departure;
+        float *v_inf_departure_single; // 3 per cell
+    };
+    union
+    {
+        Vector3 *v_inf_arrival;
+        float *v_inf_arrival_single; // 3 per cell
+    };
 } GridSearchResult;
 
+// Summary of a grid search, without the grid itself. dv is the total dv of a cell
+// (including capture if the problem does); NaN dv and -1 indices mean no valid transfer
+typedef struct GridSearchReduction
+{
+    int n_grid_t1;
+    int n_grid_tof;
+    double *t1;         // departure time axis (n_grid_t1 elements)
+    double *tof;        // time of flight axis (n_grid_tof elements)
+    double *row_min_dv; // minimum dv of each row (n_grid_t1 elements)
+    int *row_argmin;    // tof index of each row minimum
+    double *col_min_dv; // minimum dv of each column (n_grid_tof elements)
+    int *col_argmin;    // t1 index of each column minimum
+    int k;              // number of best cells to keep
+    double *best_dv;    // dv of the k best cells, in increasing order (k elements)
+    int *best_idx;      // index i * n_grid_tof + j of the k best cells
+} GridSearchReduction;
+
 typedef struct GridSearchProblem
 {
     Body body1;
@@ -35,9 +85,34 @@ typedef struct GridSearchProblem
     double tof_max;
     int n_grid_t1;
     int n_grid_tof;
+    enum LambertSolver solver;
+    int max_revs; // maximum number of complete revolutions; multi-revolution transfers always use Izzo's solver
+    // Optional constraints; cells that are masked out or violate a limit are NaN.
+    // Masked out cells are skipped without solving anything
+    const bool *mask;         // cells to solve (n_grid_t1 * n_grid_tof, or one per point); NULL to solve all
+    double max_c3;            // maximum departure C3 = |v_inf|^2 (m^2/s^2); 0 for no limit
+    double max_v_inf_arrival; // maximum arrival excess speed (m/s); 0 for no limit
 } GridSearchProblem;
 
 void free_GridSearchResult(GridSearchResult result);
 GridSearchResult transfer_dv(GridSearchProblem problem);
+// Same as transfer_dv, but fills caller-allocated arrays in result
+// (the v_inf arrays may be NULL), splitting rows between n_threads threads
+void transfer_dv_into(GridSearchProblem problem, GridSearchResult *result, int n_threads);
+// Evaluates scattered points instead of a grid; reads (t1, tof) pairs from the t1 and tof
+// arrays of result (n_grid_t1 * n_grid_tof of them, each array holding one value per point)
+// and fills in the rest.
+// The grid fields of problem are ignored
+void transfer_dv_points(GridSearchProblem problem, GridSearchResult *result, int n_threads);
+// Same grid as transfer_dv_into, but only fills in the caller-allocated summary arrays
+// of reduction; memory use is O(n_grid_t1 + n_grid_tof) instead of O(n_grid_t1 * n_grid_tof)
+void transfer_dv_reduce(GridSearchProblem problem, GridSearchReduction *reduction, int n_threads);
+// transfer_dv_reduce for n_problems grid searches at once (e.g. every window of several pairs
+// of bodies), filling in reductions[p] for problems[p]; rows of all problems are shared between
+// n_threads threads. Problems whose t1 spacing is that of problems[0], and whose t1_min (relative
+// to the earliest one), tof_min and tof spacing are multiples of it, share one table of states
+// per body instead of each computing their own
+void transfer_dv_reduce_batch(const GridSearchProblem *problems, GridSearchReduction *reductions,
+                              int n_problems, int n_threads);
 
 #endif // TRAJECTORY_OPTIMIZERS_H
\ No newline at end of file
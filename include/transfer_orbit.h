@@ -11,7 +11,9 @@ Header file for functions to calculate transfer orbits between two bodies in the
 
 #include "keplerian_element_types.h"
 #include "kerbol_system_types.h"
+#include "state_vector_types.h"
 #include "vec_math_types.h"
+#include "lambert.h"
 
 #include <stdbool.h>
 
@@ -25,6 +27,14 @@ typedef struct TransferOrbit
     Body body2;
 } TransferOrbit;
 
+typedef struct TransferExcessVelocities
+{
+    Vector3 departure; // velocity at infinity wrt body 1 at t1
+    Vector3 arrival;   // velocity at infinity wrt body 2 at t2
+    bool valid;
+    LambertSolution lambert; // underlying solution, usable as a warm start for neighbouring transfers
+} TransferExcessVelocities;
+
 enum ArrivalDepartureEnum
 {
     DEPARTURE,
@@ -39,9 +49,52 @@ enum ArrivalDepartureEnum
  * @param body2 arriving body
  * @param t1 time of departure, ut (s)
  * @param t2 time of arrival, ut (s)
+ * @param solver algorithm used to solve Lambert's problem
  * @return TransferOrbit struct, containing KeplerianElements if the solution obtained is valid.
  */
-TransferOrbit get_transfer_orbit(Body body1, Body body2, double t1, double t2);
+TransferOrbit get_transfer_orbit(Body body1, Body body2, double t1, double t2, enum LambertSolver solver);
+
+/**
+ * @brief Computes a planetary transfer orbit from precomputed body states.
+ * Same as get_transfer_orbit, but the ephemerides of both bodies are supplied
+ * by the caller (e.g. from a table shared across many transfers).
+ * @param body1 departing body
+ * @param body2 arriving body; must share a common parent with body1
+ * @param b1t1 state of body 1 wrt the common parent at departure
+ * @param b2t2 state of body 2 wrt the common parent at arrival
+ * @param solver algorithm used to solve Lambert's problem
+ * @return TransferOrbit struct, containing KeplerianElements if the solution obtained is valid.
+ */
+TransferOrbit get_transfer_orbit_from_states(Body body1, Body body2, StateVector b1t1, StateVector b2t2, enum LambertSolver solver);
+
+/**
+ * @brief Computes excess velocities at both ends of a transfer between two bodies
+ * orbiting a common parent, directly from the Lambert solution.
+ * Equivalent to get_transfer_orbit followed by excess_velocity_at_body at departure
+ * and arrival, without converting to Keplerian elements and propagating back.
+ * @param body1 departing body
+ * @param body2 arriving body
+ * @param t1 time of departure, ut (s)
+ * @param t2 time of arrival, ut (s)
+ * @param solver algorithm used to solve Lambert's problem
+ * @return TransferExcessVelocities struct, containing excess velocities if the solution obtained is valid.
+ */
+TransferExcessVelocities get_transfer_excess_velocities(Body body1, Body body2, double t1, double t2, enum LambertSolver solver);
+
+/**
+ * @brief Computes excess velocities at both ends of a transfer from precomputed body states.
+ *
+ * @param body1 departing body
+ * @param body2 arriving body; must share a common parent with body1
+ * @param b1t1 state of body 1 wrt the common parent at departure
+ * @param b2t2 state of body 2 wrt the common parent at arrival
+ * @param solver algorithm used to solve Lambert's problem
+ * @param warm_start solution of a neighbouring transfer to start Lambert's problem from,
+ * or NULL to solve from scratch. Only used by LAMBERT_CURTIS.
+ * @return TransferExcessVelocities struct, containing excess velocities if the solution obtained is valid.
+ */
+TransferExcessVelocities get_transfer_excess_velocities_from_states(Body body1, Body body2, StateVector b1t1, StateVector b2t2,
+                                                                    enum LambertSolver solver, const LambertSolution *warm_start);
 
 /**
  * @brief Computes excess velocity at a body at either end of a transfer orbit.
@@ -53,6 +106,15 @@ TransferOrbit get_transfer_orbit(Body body1, Body body2, double t1, double t2);
  */
 Vector3 excess_velocity_at_body(TransferOrbit transfer_orbit, enum ArrivalDepartureEnum arrival_or_departure);
 
+/**
+ * @brief Computes excess velocity of a transfer orbit wrt a precomputed body state.
+ *
+ * @param transfer_orbit
+ * @param body_state state of the body wrt the common parent, at the time of evaluation
+ * @return Vector3 - velocity vector relative to the body at body_state.time
+ */
+Vector3 excess_velocity_wrt_state(TransferOrbit transfer_orbit, StateVector body_state);
+
 /**
  * @brief Gets heurisitic time of flight from body1 to body2 using an ideal Hohmann transfer.
  * Actual time of flight will vary. This is a good starting point for grid-searching.
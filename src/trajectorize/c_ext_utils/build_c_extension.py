@@ -38,18 +38,20 @@ def process_and_join_headers(*filenames: str) -> str:
                 else:
                     clean_lines.append(line)
 
-            clean_string = "\n".join(clean_lines)
-
+            # First find all #include statements and process them, keeping
+            # them in order so that each comes after its own dependencies
+            included_strings: "list[str]" = []
             for line in include_lines:
-                # First find all #include statements and process them
                 if line.startswith("#include"):
                     try:
                         include_filename = line.split('"')[1]
-                        clean_string = process_single_file(
-                            include_filename) + clean_string
+                        included_strings.append(
+                            process_single_file(include_filename))
                     except IndexError:  # e.g. system header
                         pass
 
+            clean_string = "".join(included_strings) + "\n".join(clean_lines)
+
             # Now, process the current file
             already_processed.add(filename)
         return clean_string
@@ -77,12 +79,19 @@ header_files = [header_file.split(delimiter)[-1]
 
 ffi.cdef(process_and_join_headers(*header_files))
 
+# OpenMP is used to multithread grid searches;
+# without it, the code still builds but runs on a single thread
 if sys.platform.startswith("linux"):
     # linux
-    extra_compile_args = ["-std=c99", "-lm", "-lc", "-O3"]
-else:
+    extra_compile_args = ["-std=c99", "-lm", "-lc", "-O3", "-fopenmp"]
+    extra_link_args = ["-fopenmp"]
+elif sys.platform.startswith("win"):
     # MSVC is already c99 compliant, so no need to specify
+    extra_compile_args = ["/openmp"]
+    extra_link_args = None
+else:
     extra_compile_args = None
+    extra_link_args = None
 
 # Include all source files under src/trajectorize
 # except those starting with "_" (generated code files)
@@ -93,7 +102,8 @@ ffi.set_source("trajectorize._c_extension",
                "\n".join([f'#include "{header}"' for header in header_files]),
                sources=sources,
                include_dirs=[include_dir],
-               extra_compile_args=extra_compile_args)
+               extra_compile_args=extra_compile_args,
+               extra_link_args=extra_link_args)
 
 if __name__ == "__main__":
     # For debug building
@@ -0,0 +1,59 @@
+from argparse import ArgumentParser
+from time import perf_counter
+
+import numpy as np
+
+from trajectorize.ephemeris.chebyshev_ephemeris import ChebyshevEphemeris
+from trajectorize.ephemeris.kerbol_system import Body, body_states
+from trajectorize.orbit.conic_kepler import KeplerianOrbit
+
+
+def timed(function, *args, repeats: int = 3, **kwargs):
+    '''
+    Best time out of repeats calls of function, and its result
+    '''
+    best = np.inf
+    for _ in range(repeats):
+        start = perf_counter()
+        result = function(*args, **kwargs)
+        best = min(best, perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+
+    parser = ArgumentParser(description="Benchmark the Chebyshev ephemeris "
+                            "against solving Kepler's equation, over a long "
+                            "span of time.")
+    parser.add_argument("--n_epochs", help="Number of epochs evaluated",
+                        type=int, default=1000000)
+    parser.add_argument("--n_periods", help="Span of time, in orbital "
+                        "periods of Kerbin", type=float, default=20)
+    parser.add_argument("--tolerance", help="Position tolerance of the "
+                        "tables (m)", type=float, default=1.0)
+    args = parser.parse_args()
+
+    kerbin = Body.from_name("Kerbin")
+    t_lim = (0, args.n_periods * KeplerianOrbit.from_celestial_body(
+        kerbin, 0).T)
+    times = np.random.default_rng(0).uniform(*t_lim, args.n_epochs)
+
+    print(f"{'Body':<10}{'Fit (s)':>10}{'Table (kB)':>12}{'Kepler (s)':>12}"
+          f"{'Chebyshev (s)':>15}{'Speedup':>9}{'Max error (m)':>15}")
+
+    for name in ["Moho", "Kerbin", "Duna", "Jool", "Eeloo", "Mun", "Laythe"]:
+        body = Body.from_name(name)
+
+        fit_time, ephemeris = timed(ChebyshevEphemeris.fit, [body], t_lim,
+                                    args.tolerance, repeats=1)
+        table_size = ephemeris.series[body.body_id].coefficients.nbytes
+
+        kepler_time, expected = timed(body_states, [body], times)
+        chebyshev_time, states = timed(body_states, [body], times,
+                                       ephemeris=ephemeris)
+        error = np.max(np.linalg.norm(states[0, :, :3]
+                                      - expected[0, :, :3], axis=1))
+
+        print(f"{name:<10}{fit_time:>10.3f}{table_size / 1000:>12.1f}"
+              f"{kepler_time:>12.3f}{chebyshev_time:>15.3f}"
+              f"{kepler_time / chebyshev_time:>9.1f}{error:>15.3f}")
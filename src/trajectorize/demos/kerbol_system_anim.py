@@ -4,8 +4,7 @@ import numpy as np
 from matplotlib import pyplot as plt
 from matplotlib.animation import FuncAnimation, PillowWriter
 
-from trajectorize.ephemeris.kerbol_system import (Body, BodyEnum,
-                                                  state_vector_at_time)
+from trajectorize.ephemeris.kerbol_system import Body, body_states
 from trajectorize.ksp_time.time_conversion import TimeType, ut_to_ut_string
 
 if __name__ == "__main__":
@@ -66,19 +65,14 @@ if __name__ == "__main__":
                 label=body.name)
 
     # Construct dynamic artists; these are the planets and their markers
-    planet_ephemerides = [[None] * len(planets) for _ in range(len(t_ut))]
-
-    for i, ut in enumerate(t_ut):
-        for j, b in enumerate(planets):
-            planet_ephemerides[i][j] = state_vector_at_time(ut,
-                                                            BodyEnum.KERBOL,
-                                                            b.body_id)
+    # (planet, frame, [x, y, z, vx, vy, vz])
+    planet_ephemerides = body_states(planets, t_ut, kerbol)
 
     planet_artists = [None for _ in range(len(planets))]
 
     for i, b in enumerate(planets):
-        marker, = ax.plot(planet_ephemerides[0][i].position[0],
-                          planet_ephemerides[0][i].position[1],
+        marker, = ax.plot(planet_ephemerides[i, 0, 0],
+                          planet_ephemerides[i, 0, 1],
                           'o', markersize=5, color=b.colour_hex)
         planet_artists[i] = marker
 
@@ -86,8 +80,8 @@ if __name__ == "__main__":
 
     def animate(i):
         for j, b in enumerate(planets):
-            planet_artists[j].set_data(planet_ephemerides[i][j].position[0],
-                                       planet_ephemerides[i][j].position[1])
+            planet_artists[j].set_data(planet_ephemerides[j, i:i + 1, 0],
+                                       planet_ephemerides[j, i:i + 1, 1])
 
         title.set_text(
             f"Kerbol System, {ut_to_ut_string(t_ut[i], TimeType.KERBIN_TIME)}")
@@ -0,0 +1,79 @@
+from argparse import ArgumentParser
+from time import perf_counter
+
+import numpy as np
+
+from trajectorize._c_extension import lib
+from trajectorize.ephemeris.kerbol_system import (Body, BodyEnum,
+                                                  state_vector_at_time)
+from trajectorize.math_lib.math_interfaces import vec3_from_np_array
+from trajectorize.orbit.conic_kepler import KeplerianOrbit
+from trajectorize.trajectory.interplanetary_transfer import \
+    interplanetary_transfer_dv
+from trajectorize.trajectory.transfer_orbit import (LambertSolver,
+                                                    TrajectoryDirection,
+                                                    approximate_time_of_flight)
+
+
+def lambert_iterations(body1: Body, body2: Body,
+                       t1: np.ndarray, tof: np.ndarray,
+                       solver: LambertSolver) -> np.ndarray:
+    '''
+    Number of root-finding iterations used by a solver for each transfer,
+    solved from scratch (no warm starts).
+    '''
+    mu = body1.parent.mu
+    iterations = []
+    for t1_i, tof_i in zip(t1, tof):
+        r1 = state_vector_at_time(t1_i, BodyEnum(body1.parent_id),
+                                  body1.body_id).position
+        r2 = state_vector_at_time(t1_i + tof_i, BodyEnum(body2.parent_id),
+                                  body2.body_id).position
+        sol = lib.solve_lambert(vec3_from_np_array(r1), vec3_from_np_array(r2),
+                                tof_i, mu, int(TrajectoryDirection.PROGRADE),
+                                int(solver))
+        if sol.valid:
+            iterations.append(sol.iterations)
+    return np.array(iterations)
+
+
+if __name__ == "__main__":
+
+    parser = ArgumentParser(description="Benchmark Lambert solvers on "
+                            "transfers between Kerbin and other planets.")
+    parser.add_argument("--n_grid", help="Porkchop grid size",
+                        type=int, default=200)
+    parser.add_argument("--n_samples", help="Number of random transfers "
+                        "used to count iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    kerbin = Body.from_name("Kerbin")
+
+    print(f"{'Transfer':<16}{'Solver':<8}{'Iter (mean)':>12}"
+          f"{'Iter (max)':>12}{'Grid time (s)':>15}{'Min dv (m/s)':>14}")
+
+    for destination in ["Moho", "Eve", "Duna", "Dres", "Jool", "Eeloo"]:
+        body2 = Body.from_name(destination)
+
+        t1_lim = (0, KeplerianOrbit.from_celestial_body(kerbin, 0).T * 2)
+        tof_approx = approximate_time_of_flight(kerbin, body2)
+        tof_lim = (tof_approx / 2, tof_approx * 2)
+
+        t1_samples = rng.uniform(*t1_lim, args.n_samples)
+        tof_samples = rng.uniform(*tof_lim, args.n_samples)
+
+        for solver in LambertSolver:
+            iterations = lambert_iterations(kerbin, body2, t1_samples,
+                                            tof_samples, solver)
+
+            start = perf_counter()
+            res = interplanetary_transfer_dv(kerbin, body2, t1_lim, tof_lim,
+                                             100000, 100000, True,
+                                             args.n_grid, process_count=1,
+                                             solver=solver)
+            elapsed = perf_counter() - start
+
+            print(f"{'Kerbin-' + destination:<16}{solver.name:<8}"
+                  f"{iterations.mean():>12.2f}{iterations.max():>12d}"
+                  f"{elapsed:>15.3f}{np.nanmin(res.dv):>14.2f}")
@@ -10,9 +10,10 @@ from trajectorize.orbit.conic_kepler import KeplerianOrbit
 from trajectorize.trajectory.transfer_orbit import approximate_time_of_flight,\
     get_transfer_orbit, get_excess_velocity, ArrivalDeparture
 from trajectorize.trajectory.interplanetary_transfer import \
-    interplanetary_transfer_dv
+    TransferConstraints, iter_transfer_dv
 from trajectorize.visualizers.display_utils import display_or_save_plot
-from trajectorize.visualizers.porkchop_plot import transfer_porkchop_plot
+from trajectorize.visualizers.porkchop_plot import transfer_porkchop_plot,\
+    update_porkchop_plot
 from trajectorize.visualizers.transfer_orbit_plot import plot_transfer
 from trajectorize.visualizers.local_to_body_plot import \
     plot_trajectory_local_to_body, plot_infinity_vector,\
@@ -34,6 +35,9 @@ if __name__ == "__main__":
         help="Altitude of capture "
         "orbit in m above the surface of the destination body.",
         type=float)
+    parser.add_argument("--windows", help="Only search departure times "
+                        "close to predicted transfer windows.",
+                        action="store_true")
     args = parser.parse_args()
 
     body1 = Body.from_name(args.origin)
@@ -52,26 +56,46 @@ if __name__ == "__main__":
     tof_max = tof_approx * 2
     n_grid = 300
 
-    plt.style.use('dark_background')
+    constraints = None
+    if args.windows:
+        constraints = TransferConstraints(t1_bands="predicted")
 
-    dv_info = interplanetary_transfer_dv(body1, body2,
-                                         (t1_min, t1_max),
-                                         (tof_min, tof_max),
-                                         parking_alt,
-                                         capture_alt if include_capture else 0,
-                                         include_capture,
-                                         n_grid)
+    plt.style.use('dark_background')
 
     fig, ((ax_traj, ax_lsoi), (ax_prk_dep, ax_prk_cap),
           ) = plt.subplots(2, 2, figsize=(14, 10))
-    transfer_porkchop_plot(ax_prk_dep, dv_info, "ejection")
-    if include_capture:
-        transfer_porkchop_plot(ax_prk_cap, dv_info, "capture")
-    else:
+
+    if not include_capture:
         ax_prk_cap.set_axis_off()
         ax_prk_cap.text(0.5, 0.5, "Capture orbit not specified",
                         ha='center', va='center')
 
+    # Draw the porkchop plots as the grid search progresses
+    porkchop_dep = porkchop_cap = None
+    for tile in iter_transfer_dv(body1, body2,
+                                 (t1_min, t1_max),
+                                 (tof_min, tof_max),
+                                 parking_alt,
+                                 capture_alt if include_capture else 0,
+                                 include_capture,
+                                 n_grid,
+                                 constraints=constraints):
+        dv_info = tile.result
+
+        if porkchop_dep is None:
+            porkchop_dep = transfer_porkchop_plot(ax_prk_dep, dv_info,
+                                                  "ejection")
+            if include_capture:
+                porkchop_cap = transfer_porkchop_plot(ax_prk_cap, dv_info,
+                                                      "capture")
+        else:
+            update_porkchop_plot(porkchop_dep, dv_info, "ejection")
+            if include_capture:
+                update_porkchop_plot(porkchop_cap, dv_info, "capture")
+
+        if plt.get_backend().lower() != "agg":
+            plt.pause(0.001)
+
     # Mark minimum dv point
     min_dv_idx = np.unravel_index(np.nanargmin(dv_info.dv), dv_info.dv.shape)
     cursor_vline_dep = ax_prk_dep.axvline(
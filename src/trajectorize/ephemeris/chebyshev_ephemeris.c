@@ -0,0 +1,56 @@
+#include "chebyshev_ephemeris.h"
+
+#include <math.h>
+
+static void chebyshev_evaluate(ChebyshevTable table, double t, double state[6])
+{
+    // Evaluates all 6 series of the segment containing t with Clenshaw's recurrence
+    int k = (int)floor((t - table.t0) / table.segment_length);
+    if (k < 0)
+    {
+        k = 0;
+    }
+    else if (k >= table.n_segments)
+    {
+        k = table.n_segments - 1;
+    }
+
+    // Position within the segment, scaled to [-1, 1]
+    double x = 2 * (t - table.t0 - k * table.segment_length) / table.segment_length - 1;
+    const double *c = table.coefficients + (long)k * table.n_coefficients * 6;
+
+    double b1[6] = {0, 0, 0, 0, 0, 0};
+    double b2[6] = {0, 0, 0, 0, 0, 0};
+    for (int m = table.n_coefficients - 1; m >= 1; m--)
+    {
+        for (int i = 0; i < 6; i++)
+        {
+            double b0 = c[m * 6 + i] + 2 * x * b1[i] - b2[i];
+            b2[i] = b1[i];
+            b1[i] = b0;
+        }
+    }
+    for (int i = 0; i < 6; i++)
+    {
+        state[i] = c[i] + x * b1[i] - b2[i];
+    }
+}
+
+StateVector chebyshev_state_at_time(ChebyshevTable table, double t)
+{
+    double state[6];
+    chebyshev_evaluate(table, t, state);
+
+    StateVector sv = {.position = {.x = state[0], .y = state[1], .z = state[2]},
+                      .velocity = {.x = state[3], .y = state[4], .z = state[5]},
+                      .time = t};
+    return sv;
+}
+
+void chebyshev_states_into(ChebyshevTable table, int n_times, const double times[], double *out)
+{
+    for (int i = 0; i < n_times; i++)
+    {
+        chebyshev_evaluate(table, times[i], out + (long)i * 6);
+    }
+}
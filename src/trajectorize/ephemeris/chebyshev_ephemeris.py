@@ -0,0 +1,243 @@
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from trajectorize._c_extension import ffi, lib
+from trajectorize.ephemeris.kerbol_system import Body, BodyEnum, body_states
+
+# Chebyshev coefficients of each component of the state per segment
+DEFAULT_N_COEFFICIENTS = 14
+
+# Bump whenever the layout of saved tables changes
+CHEBYSHEV_FORMAT_VERSION = 1
+
+# Limit on how many times segments are halved to reach a tolerance;
+# beyond this, rounding errors dominate
+MAX_SEGMENT_HALVINGS = 30
+
+
+class ChebyshevSeries(NamedTuple):
+    '''
+    Piecewise Chebyshev approximation of the state of a body relative to its
+    parent, over segments of segment_length starting at t0. coefficients has
+    shape (n_segments, n_coefficients, 6), for x, y, z, vx, vy, vz.
+    '''
+    t0: float
+    segment_length: float
+    coefficients: np.ndarray
+
+    @property
+    def c_data(self):
+        '''
+        Returns C struct compatible with library functions; only valid
+        while coefficients is alive.
+        '''
+        n_segments, n_coefficients, _ = self.coefficients.shape
+        return ffi.new("ChebyshevTable *",
+                       {"t0": self.t0,
+                        "segment_length": self.segment_length,
+                        "n_segments": n_segments,
+                        "n_coefficients": n_coefficients,
+                        "coefficients": ffi.from_buffer(
+                            "double[]", self.coefficients)})[0]
+
+    def states(self, times: np.ndarray) -> np.ndarray:
+        '''
+        Returns the (T, 6) states at times
+        '''
+        times = np.ascontiguousarray(times, dtype=np.float64)
+        states = np.empty((len(times), 6))
+        lib.chebyshev_states_into(self.c_data, len(times),
+                                  ffi.from_buffer("double[]", times),
+                                  ffi.from_buffer("double[]", states))
+        return states
+
+
+def _fit_series(body: Body, t_lim: "tuple(float, float)",
+                segment_length: float, n_coefficients: int) -> ChebyshevSeries:
+    # Interpolates the state at the Chebyshev nodes of each segment
+    n_segments = max(1, int(np.ceil((t_lim[1] - t_lim[0]) / segment_length)))
+    theta = np.pi * (np.arange(n_coefficients) + 0.5) / n_coefficients
+    x = np.cos(theta)
+
+    times = t_lim[0] + (np.arange(n_segments)[:, None] + (x + 1) / 2) \
+        * segment_length
+    states = body_states([body], times.ravel())[0] \
+        .reshape(n_segments, n_coefficients, 6)
+
+    basis = 2 / n_coefficients * \
+        np.cos(np.outer(np.arange(n_coefficients), theta))
+    basis[0] /= 2
+    coefficients = np.ascontiguousarray(
+        np.einsum("mj,sjc->smc", basis, states))
+    return ChebyshevSeries(float(t_lim[0]), float(segment_length),
+                           coefficients)
+
+
+def _fit_error(body: Body, series: ChebyshevSeries) -> "tuple(float, float)":
+    # Largest position and velocity errors, checked halfway between nodes,
+    # where interpolation errors peak
+    n_segments, n_coefficients, _ = series.coefficients.shape
+    x = np.cos(np.pi * np.arange(n_coefficients + 1) / n_coefficients)
+    times = series.t0 + (np.arange(n_segments)[:, None] + (x + 1) / 2) \
+        * series.segment_length
+    times = times.ravel()
+
+    error = series.states(times) - body_states([body], times)[0]
+    return (np.max(np.linalg.norm(error[:, :3], axis=1)),
+            np.max(np.linalg.norm(error[:, 3:], axis=1)))
+
+
+def _ancestry(body: Body) -> "list[Body]":
+    # Bodies from body up to, but not including, the root of the system
+    path = []
+    while body.body_id != body.parent_id:
+        path.append(body)
+        body = body.parent
+    return path
+
+
+class ChebyshevEphemeris:
+    '''
+    Precomputed ephemeris of a set of bodies over a span of time, as
+    piecewise Chebyshev approximations of their states relative to their
+    parents. Evaluating it is a short polynomial recurrence instead of
+    solving Kepler's equation, which pays off for long surveys that query
+    many epochs.
+
+    Build one with ChebyshevEphemeris.fit; tables can be saved to disk with
+    save and reused with load.
+
+    Parameters
+    ----------
+    t_lim: tuple(float, float)
+        Span of time covered by the tables
+    series: dict[BodyEnum, ChebyshevSeries]
+        Approximation of each body
+    '''
+
+    def __init__(self, t_lim: "tuple(float, float)",
+                 series: "dict[BodyEnum, ChebyshevSeries]"):
+        self.t_lim = (float(t_lim[0]), float(t_lim[1]))
+        self.series = series
+
+    @classmethod
+    def fit(cls, bodies: "list[Body]", t_lim: "tuple(float, float)",
+            tolerance: float = 1.0,
+            n_coefficients: int = DEFAULT_N_COEFFICIENTS) \
+            -> "ChebyshevEphemeris":
+        '''
+        Fits tables for bodies over t_lim, with position errors no larger
+        than tolerance (m) and velocity errors no larger than tolerance
+        times the mean motion of each body.
+
+        Segments start at a quarter of the orbital period of each body, and
+        are halved until the tolerance is met.
+        '''
+        if t_lim[1] <= t_lim[0]:
+            raise ValueError("t_lim must be increasing.")
+        if tolerance <= 0:
+            raise ValueError("tolerance must be positive.")
+
+        series = {}
+        for body in bodies:
+            if body.body_id == body.parent_id:
+                # Fixed at the origin
+                mean_motion, segment_length = 0, t_lim[1] - t_lim[0]
+            else:
+                mean_motion = np.sqrt(body.parent.mu
+                                      / body.orbit.semi_major_axis ** 3)
+                segment_length = min(t_lim[1] - t_lim[0],
+                                     np.pi / 2 / mean_motion)
+
+            for _ in range(MAX_SEGMENT_HALVINGS):
+                body_series = _fit_series(body, t_lim, segment_length,
+                                          n_coefficients)
+                position_error, velocity_error = _fit_error(body,
+                                                            body_series)
+                if position_error <= tolerance \
+                        and velocity_error <= tolerance * mean_motion:
+                    break
+                segment_length /= 2
+            else:
+                raise ValueError(f"Cannot fit {body.name} to a tolerance of "
+                                 f"{tolerance} m.")
+
+            series[body.body_id] = body_series
+
+        return cls(t_lim, series)
+
+    def states(self, body: Body, times: np.ndarray) -> np.ndarray:
+        '''
+        Returns the states of body relative to its parent at times,
+        as a (T, 6) array of [x, y, z, vx, vy, vz].
+        '''
+        if body.body_id not in self.series:
+            raise ValueError(f"No table for {body.name}.")
+
+        times = np.asarray(times, dtype=np.float64)
+        if np.any(times < self.t_lim[0]) or np.any(times > self.t_lim[1]):
+            raise ValueError("times must be within t_lim.")
+
+        return self.series[body.body_id].states(times)
+
+    def body_states(self, bodies: "list[Body]", times: np.ndarray,
+                    frame_body: Body = None) -> np.ndarray:
+        '''
+        Same as kerbol_system.body_states, as a (B, T, 6) array. States
+        relative to frame_body are composed from the tables of the bodies
+        between each body and frame_body and their lowest common ancestor,
+        which must all be in this ephemeris.
+        '''
+        states = np.empty((len(bodies), len(times), 6))
+        for b, body in enumerate(bodies):
+            if frame_body is None:
+                states[b] = self.states(body, times)
+                continue
+
+            body_path, frame_path = _ancestry(body), _ancestry(frame_body)
+            while body_path and frame_path \
+                    and body_path[-1] is frame_path[-1]:
+                body_path.pop()
+                frame_path.pop()
+
+            states[b] = 0
+            for link in body_path:
+                states[b] += self.states(link, times)
+            for link in frame_path:
+                states[b] -= self.states(link, times)
+        return states
+
+    def save(self, path: "str | Path"):
+        '''
+        Saves the tables to an .npz file at path
+        '''
+        arrays = {"format": CHEBYSHEV_FORMAT_VERSION,
+                  "t_lim": self.t_lim,
+                  "body_ids": [int(body_id) for body_id in self.series]}
+        for body_id, body_series in self.series.items():
+            arrays[f"t0_{int(body_id)}"] = body_series.t0
+            arrays[f"segment_length_{int(body_id)}"] = \
+                body_series.segment_length
+            arrays[f"coefficients_{int(body_id)}"] = body_series.coefficients
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: "str | Path") -> "ChebyshevEphemeris":
+        '''
+        Loads tables saved with save
+        '''
+        with np.load(path) as arrays:
+            if int(arrays["format"]) != CHEBYSHEV_FORMAT_VERSION:
+                raise ValueError(f"Unsupported ephemeris table format in "
+                                 f"{path}.")
+
+            series = {}
+            for body_id in arrays["body_ids"]:
+                series[BodyEnum(int(body_id))] = ChebyshevSeries(
+                    float(arrays[f"t0_{body_id}"]),
+                    float(arrays[f"segment_length_{body_id}"]),
+                    np.ascontiguousarray(arrays[f"coefficients_{body_id}"]))
+
+            return cls(tuple(arrays["t_lim"]), series)
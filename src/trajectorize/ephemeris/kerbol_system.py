@@ -30,7 +30,7 @@ class BodyEnum(IntEnum):
 # PlanetaryKeplerianElements struct class
 
 
-@dataclass
+@dataclass(frozen=True)
 class PlanetaryKeplerianElements:
     '''
     Equivalent of C PlanetaryKeplerianElements struct.
@@ -61,8 +61,16 @@ class PlanetaryKeplerianElements:
 
 # Planets
 
-@ dataclass
+@dataclass(frozen=True)
 class Body:
+    '''
+    A body of the Kerbol system. Bodies are immutable, and there is only one
+    instance of each: from_identifier, from_name, parent, children and
+    friends all return the instances built when this module is imported.
+    '''
+    __slots__ = ("body_id", "parent_id", "mass", "mu", "radius",
+                 "atmosphere_height", "orbit", "soi_radius", "colour")
+
     body_id: BodyEnum
     parent_id: BodyEnum
     mass: float
@@ -73,6 +81,10 @@ class Body:
     soi_radius: float
     colour: int
 
+    def __reduce__(self):
+        # Unpickle (e.g. in worker processes) to the registered instance
+        return Body.from_identifier, (int(self.body_id),)
+
     @ property
     def name(self) -> str:
         return BodyEnum(self.body_id).name.title()
@@ -85,34 +97,24 @@ class Body:
     @classmethod
     def from_identifier(cls, identifier: "BodyEnum|int") -> "Body":
         '''
-        Create a Body object from an identifier
+        Returns the Body with an identifier
         '''
-        if identifier not in BodyEnum:
+        body = _BODIES_BY_ID.get(identifier)
+        if body is None:
             raise ValueError("Invalid planet")
 
-        body = lib.kerbol_system_bodies[int(identifier)]
-
-        return cls(BodyEnum(body.body_id),
-                   BodyEnum(body.parent_id),
-                   body.mass,
-                   body.mu,
-                   body.radius,
-                   body.atmosphere_height,
-                   PlanetaryKeplerianElements.from_c_data(body.orbit),
-                   body.soi_radius,
-                   body.colour)
+        return body
 
     @ classmethod
     def from_name(cls, name: str) -> "Body":
         '''
-        Create a Body object from a string
+        Returns the Body with a name, in any case
         '''
-        name_dict = {k.casefold(): v for k, v in BodyEnum.__members__.items()}
-
-        if name.casefold() not in name_dict:
+        body = _BODIES_BY_NAME.get(name.casefold())
+        if body is None:
             raise ValueError(f"Invalid celestial body: {name}")
 
-        return cls.from_identifier(name_dict[name.casefold()])
+        return body
 
     @ property
     def c_data(self):
@@ -126,8 +128,7 @@ class Body:
         Return a (N, 3) array of points on the orbit of the body
         in state space relative to its parent.
         '''
-        parent = Body.from_identifier(self.parent_id)
-        state_vec_arr = lib.pke_state_locus(self.orbit.c_data, parent.mu,
+        state_vec_arr = lib.pke_state_locus(self.orbit.c_data, self.parent.mu,
                                             num_points)
 
         # process memory buffer
@@ -146,14 +147,21 @@ class Body:
         '''
         Returns the parent body of this body.
         '''
-        return Body.from_identifier(self.parent_id)
+        return _BODIES[self.parent_id]
+
+    @property
+    def children(self) -> "tuple[Body]":
+        '''
+        Returns the bodies orbiting this body, e.g. the moons of a planet.
+        '''
+        return _CHILDREN[self.body_id]
 
     @classmethod
     def all_bodies(cls) -> "list[Body]":
         '''
         Returns a list of all bodies in the system.
         '''
-        return [cls.from_identifier(i) for i in BodyEnum]
+        return list(_BODIES)
 
     @classmethod
     def planets(cls) -> "list[Body]":
@@ -161,12 +169,92 @@ class Body:
         Returns a list of all planets in the system
         (i.e. Kerbol is their parent)
         '''
-        bodies = cls.all_bodies()
-        return [body for body in bodies if body.parent_id == BodyEnum.KERBOL
-                and body.body_id != BodyEnum.KERBOL]
+        return list(_CHILDREN[BodyEnum.KERBOL])
+
+
+def _body_from_c_data(cdata) -> Body:
+    return Body(BodyEnum(cdata.body_id),
+                BodyEnum(cdata.parent_id),
+                cdata.mass,
+                cdata.mu,
+                cdata.radius,
+                cdata.atmosphere_height,
+                PlanetaryKeplerianElements.from_c_data(cdata.orbit),
+                cdata.soi_radius,
+                cdata.colour)
+
+
+# Registry of every body, built once; indexed by BodyEnum
+_BODIES = tuple(_body_from_c_data(lib.kerbol_system_bodies[int(body_id)])
+                for body_id in BodyEnum)
+_BODIES_BY_ID = {body.body_id: body for body in _BODIES}
+_BODIES_BY_NAME = {body.name.casefold(): body for body in _BODIES}
+_CHILDREN = {body.body_id: tuple(child for child in _BODIES
+                                 if child.parent_id == body.body_id
+                                 and child.body_id != body.body_id)
+             for body in _BODIES}
 
 
 def state_vector_at_time(t: float, parent: BodyEnum,
                          child: BodyEnum) -> StateVector:
     cdata = lib.get_rel_state_at_time(t, parent.value, child.value)
     return StateVector.from_c_data(cdata)
+
+
+def body_states(bodies: "list[Body]", times: np.ndarray,
+                frame_body: Body = None, ephemeris=None) -> np.ndarray:
+    '''
+    Returns the states of bodies at times as a (B, T, 6) array of
+    [x, y, z, vx, vy, vz], relative to frame_body, or to each body's own
+    parent if not given. frame_body can be any body, e.g. Laythe relative
+    to Kerbin; states are composed along the orbits leading from the lowest
+    common ancestor of both bodies.
+
+    All states are computed in a single call to the C extension, unless a
+    precomputed ephemeris (e.g. a ChebyshevEphemeris covering times) is
+    given to evaluate instead, which pays off for long surveys.
+    '''
+    times = np.ascontiguousarray(times, dtype=np.float64)
+    if times.ndim != 1:
+        raise ValueError("times must be one dimensional.")
+
+    if ephemeris is not None:
+        return ephemeris.body_states(bodies, times, frame_body)
+
+    child_ids = np.array([body.body_id for body in bodies], dtype=np.intc)
+    parent_ids = np.array([body.parent_id if frame_body is None
+                           else frame_body.body_id for body in bodies],
+                          dtype=np.intc)
+
+    states = np.empty((len(bodies), len(times), 6))
+    lib.get_rel_states_into(len(bodies),
+                            ffi.from_buffer("enum BodyEnum[]", parent_ids),
+                            ffi.from_buffer("enum BodyEnum[]", child_ids),
+                            len(times), ffi.from_buffer("double[]", times),
+                            ffi.from_buffer("double[]", states))
+    return states
+
+
+def pairwise_states(bodies: "list[Body]", times: np.ndarray) -> np.ndarray:
+    '''
+    Returns the states of every body relative to every other at times,
+    as a (B, B, T, 6) array where [i, j] is the state of bodies[j] relative
+    to bodies[i].
+
+    All states are computed in a single call to the C extension, which
+    solves each orbit involved once per time and composes the states of
+    each pair from them.
+    '''
+    times = np.ascontiguousarray(times, dtype=np.float64)
+    if times.ndim != 1:
+        raise ValueError("times must be one dimensional.")
+
+    body_ids = np.array([body.body_id for body in bodies], dtype=np.intc)
+
+    states = np.empty((len(bodies), len(bodies), len(times), 6))
+    lib.get_pairwise_states_into(len(bodies),
+                                 ffi.from_buffer("enum BodyEnum[]", body_ids),
+                                 len(times),
+                                 ffi.from_buffer("double[]", times),
+                                 ffi.from_buffer("double[]", states))
+    return states
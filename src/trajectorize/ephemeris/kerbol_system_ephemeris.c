@@ -5,6 +5,7 @@
 
 #define _USE_MATH_DEFINES
 #include <math.h>
+#include <stdbool.h>
 #include <stdlib.h>
 
 #ifndef M_PI
@@ -40,52 +41,122 @@ StateVectorArray pke_state_locus(PlanetaryKeplerianElements pke, double mu, int
     return ke_state_locus(ke, mu, n);
 }
 
-StateVector get_direct_state_at_time(double t, enum BodyEnum child_id)
+PreparedOrbit prepare_body_orbit(enum BodyEnum body_id)
 {
-    // Get direct state of child wrt its parent at some time
-    Body body = kerbol_system_bodies[child_id];
+    // Constants of the orbit of a body around its parent, with epoch t = 0
+    Body body = kerbol_system_bodies[body_id];
     Body parent = kerbol_system_bodies[body.parent_id];
 
-    KeplerianElements body_ke = ke_from_pke(body.orbit, t, parent.mu);
+    KeplerianElements ke = {.semi_major_axis = body.orbit.semi_major_axis,
+                            .eccentricity = body.orbit.eccentricity,
+                            .inclination = body.orbit.inclination,
+                            .longitude_of_ascending_node = body.orbit.longitude_of_ascending_node,
+                            .argument_of_periapsis = body.orbit.argument_of_periapsis,
+                            .true_anomaly = NAN,
+                            .epoch = 0};
 
-    return state_vector_from_ke(body_ke, parent.mu);
+    return prepare_orbit_at_mean_anomaly(ke, body.orbit.mean_anomaly_at_epoch, parent.mu);
 }
 
-StateVector get_rel_state_at_time(double t, enum BodyEnum parent_id, enum BodyEnum child_id)
+BodyAncestry body_ancestry(enum BodyEnum body_id)
 {
-    // t is universal time in seconds
-    // calculates relative ECI position of child body rel. to parent
-    // ordering of bodies must be exclsively in descending order, i.e. parent
-    // must be an ancestor of child (TODO: add a check for this)
+    // Walk up from the body to the root of the system (the body which is its own parent)
+    BodyAncestry ancestry = {.depth = 0};
+    enum BodyEnum reversed[MAX_BODY_DEPTH + 1];
+
+    reversed[0] = body_id;
+    while (ancestry.depth < MAX_BODY_DEPTH &&
+           kerbol_system_bodies[reversed[ancestry.depth]].parent_id != reversed[ancestry.depth])
+    {
+        reversed[ancestry.depth + 1] = kerbol_system_bodies[reversed[ancestry.depth]].parent_id;
+        ancestry.depth++;
+    }
+
+    for (int k = 0; k <= ancestry.depth; k++)
+    {
+        ancestry.path[k] = reversed[ancestry.depth - k];
+    }
+    return ancestry;
+}
 
-    Body child = kerbol_system_bodies[child_id];
+FrameChain frame_chain(enum BodyEnum frame_id, enum BodyEnum body_id)
+{
+    // The paths of both bodies from the root agree up to their lowest common ancestor;
+    // the orbits below it lead to each of them
+    BodyAncestry body = body_ancestry(body_id);
+    BodyAncestry frame = body_ancestry(frame_id);
+    FrameChain chain = {.n_links = 0, .n_toward_body = 0};
 
-    if (parent_id == child_id)
+    int common = 0;
+    while (common < body.depth && common < frame.depth && body.path[common + 1] == frame.path[common + 1])
     {
-        StateVector zero_state = {.position = {.x = 0,
-                                               .y = 0,
-                                               .z = 0},
-                                  .velocity = {.x = 0,
-                                               .y = 0,
-                                               .z = 0},
-                                  .time = t};
-        return zero_state;
+        common++;
     }
-    else if (parent_id == child.parent_id)
+
+    // Innermost orbits first, matching the order states were summed in before
+    for (int k = body.depth; k > common; k--)
     {
-        return get_direct_state_at_time(t, child_id);
+        chain.bodies[chain.n_links++] = body.path[k];
     }
-    else
+    chain.n_toward_body = chain.n_links;
+    for (int k = frame.depth; k > common; k--)
     {
-        StateVector parent_state = get_direct_state_at_time(t, parent_id);
-        StateVector child_state = get_direct_state_at_time(t, child_id);
-
-        StateVector true_rel_state = {
-            .position = vec_add(parent_state.position, child_state.position),
-            .velocity = vec_add(parent_state.velocity, child_state.velocity),
-            .time = parent_state.time};
-        return true_rel_state;
+        chain.bodies[chain.n_links++] = frame.path[k];
     }
+    return chain;
+}
+
+RelativeEphemeris prepare_rel_ephemeris(enum BodyEnum frame_id, enum BodyEnum body_id)
+{
+    // Works for any pair of bodies, e.g. a moon relative to another planet
+    RelativeEphemeris ephemeris = {.chain = frame_chain(frame_id, body_id)};
+
+    for (int k = 0; k < ephemeris.chain.n_links; k++)
+    {
+        ephemeris.orbits[k] = prepare_body_orbit(ephemeris.chain.bodies[k]);
+    }
+    return ephemeris;
+}
+
+static StateVector compose_chain(const FrameChain *chain, const StateVector link_states[], double t)
+{
+    // Sum of the states along a frame chain, given the state of each link relative to its parent
+    StateVector state = {.position = {.x = 0, .y = 0, .z = 0},
+                         .velocity = {.x = 0, .y = 0, .z = 0},
+                         .time = t};
+
+    for (int k = 0; k < chain->n_links; k++)
+    {
+        if (k < chain->n_toward_body)
+        {
+            state.position = vec_add(state.position, link_states[k].position);
+            state.velocity = vec_add(state.velocity, link_states[k].velocity);
+        }
+        else
+        {
+            state.position = vec_sub(state.position, link_states[k].position);
+            state.velocity = vec_sub(state.velocity, link_states[k].velocity);
+        }
+    }
+    return state;
+}
+
+StateVector rel_ephemeris_state_at_time(const RelativeEphemeris *ephemeris, double t)
+{
+    StateVector link_states[MAX_FRAME_CHAIN];
+    for (int k = 0; k < ephemeris->chain.n_links; k++)
+    {
+        link_states[k] = prepared_orbit_state(&ephemeris->orbits[k], t);
+    }
+    return compose_chain(&ephemeris->chain, link_states, t);
+}
+
+StateVector get_rel_state_at_time(double t, enum BodyEnum parent_id, enum BodyEnum child_id)
+{
+    // t is universal time in seconds
+    // calculates relative ECI position of child body rel. to parent, which may be any other body
+    RelativeEphemeris ephemeris = prepare_rel_ephemeris(parent_id, child_id);
+    return rel_ephemeris_state_at_time(&ephemeris, t);
 }
 
 StateVectorArray get_rel_state_at_many_times(int n, double times[], enum BodyEnum parent_id, enum BodyEnum child_id)
@@ -94,10 +165,10 @@ StateVectorArray get_rel_state_at_many_times(int n, double times[], enum BodyEnu
     StateVector *mem_buffer = (StateVector *)malloc(n * sizeof(StateVector));
     // Format: x, y, z, vx, vy, vz, t; t is left as 0
 
+    RelativeEphemeris ephemeris = prepare_rel_ephemeris(parent_id, child_id);
     for (int i = 0; i < n; i++)
     {
-        StateVector state = get_rel_state_at_time(times[i], parent_id, child_id);
-        mem_buffer[i] = state;
+        mem_buffer[i] = rel_ephemeris_state_at_time(&ephemeris, times[i]);
     }
 
     StateVectorArray result;
@@ -108,3 +179,88 @@ StateVectorArray get_rel_state_at_many_times(int n, double times[], enum BodyEnu
 
     return result;
 }
+
+void get_rel_states_into(int n_bodies, const enum BodyEnum parent_ids[], const enum BodyEnum child_ids[],
+                         int n_times, const double times[], double *out)
+{
+    // Fills out, a (n_bodies x n_times x 6) row-major array, with the position and velocity
+    // of each child body relative to its parent body at each time
+    for (int b = 0; b < n_bodies; b++)
+    {
+        RelativeEphemeris ephemeris = prepare_rel_ephemeris(parent_ids[b], child_ids[b]);
+        for (int i = 0; i < n_times; i++)
+        {
+            StateVector state = rel_ephemeris_state_at_time(&ephemeris, times[i]);
+            double *row = out + ((long)b * n_times + i) * 6;
+            for (int k = 0; k < 3; k++)
+            {
+                row[k] = state.position.v[k];
+                row[k + 3] = state.velocity.v[k];
+            }
+        }
+    }
+}
+
+void get_pairwise_states_into(int n_bodies, const enum BodyEnum body_ids[], int n_times, const double times[],
+                              double *out)
+{
+    // Fills out, a (n_bodies x n_bodies x n_times x 6) row-major array, with the position and velocity
+    // of body_ids[j] relative to body_ids[i] at out[i, j]. The orbit of each body is evaluated once per
+    // time, and states are composed along the frame chain of each pair.
+    PreparedOrbit orbits[EELOO + 1];
+    bool needed[EELOO + 1] = {false};
+    StateVector link_states[MAX_FRAME_CHAIN];
+
+    FrameChain *chains = (FrameChain *)malloc((size_t)n_bodies * n_bodies * sizeof(FrameChain));
+    for (int i = 0; i < n_bodies; i++)
+    {
+        for (int j = 0; j < n_bodies; j++)
+        {
+            FrameChain chain = frame_chain(body_ids[i], body_ids[j]);
+            for (int k = 0; k < chain.n_links; k++)
+            {
+                needed[chain.bodies[k]] = true;
+            }
+            chains[i * n_bodies + j] = chain;
+        }
+    }
+
+    for (int body_id = 0; body_id <= EELOO; body_id++)
+    {
+        if (needed[body_id])
+        {
+            orbits[body_id] = prepare_body_orbit(body_id);
+        }
+    }
+
+    StateVector orbit_states[EELOO + 1];
+    for (int t = 0; t < n_times; t++)
+    {
+        for (int body_id = 0; body_id <= EELOO; body_id++)
+        {
+            if (needed[body_id])
+            {
+                orbit_states[body_id] = prepared_orbit_state(&orbits[body_id], times[t]);
+            }
+        }
+
+        for (int pair = 0; pair < n_bodies * n_bodies; pair++)
+        {
+            const FrameChain *chain = &chains[pair];
+            for (int k = 0; k < chain->n_links; k++)
+            {
+                link_states[k] = orbit_states[chain->bodies[k]];
+            }
+
+            StateVector state = compose_chain(chain, link_states, times[t]);
+            double *row = out + ((long)pair * n_times + t) * 6;
+            for (int k = 0; k < 3; k++)
+            {
+                row[k] = state.position.v[k];
+                row[k + 3] = state.velocity.v[k];
+            }
+        }
+    }
+
+    free(chains);
+}
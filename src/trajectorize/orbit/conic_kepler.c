@@ -103,30 +103,79 @@ KeplerianElements ke_orbit_prop(double t, KeplerianElements orbit, double mu)
     return orbit_propagated;
 }
 
-StateVector state_vector_from_ke(KeplerianElements orbit, double mu)
+static StateVector state_from_true_anomaly(double theta, double e, double p, double sqrt_mu_over_p,
+                                          Matrix3 perifocal_to_eci, double t)
 {
-    double r = orbit.semi_major_axis * (1 - orbit.eccentricity * orbit.eccentricity) / (1 + orbit.eccentricity * cos(orbit.true_anomaly));
-    double x = r * cos(orbit.true_anomaly);
-    double y = r * sin(orbit.true_anomaly);
+    // State vector in the inertial frame, from the perifocal position and velocity
+    double r = p / (1 + e * cos(theta));
+    double x = r * cos(theta);
+    double y = r * sin(theta);
 
-    double h = sqrt(mu * orbit.semi_major_axis * (1 - orbit.eccentricity * orbit.eccentricity));
-    double vx = -mu / h * sin(orbit.true_anomaly);
-    double vy = mu / h * (orbit.eccentricity + cos(orbit.true_anomaly));
+    double vx = -sqrt_mu_over_p * sin(theta);
+    double vy = sqrt_mu_over_p * (e + cos(theta));
 
     Vector3 perifocal_position = {.v = {x, y, 0}};
     Vector3 perifocal_velocity = {.v = {vx, vy, 0}};
 
+    StateVector state_vector = {
+        mat_mul_vec(perifocal_to_eci, perifocal_position),
+        mat_mul_vec(perifocal_to_eci, perifocal_velocity),
+        t};
+
+    return state_vector;
+}
+
+StateVector state_vector_from_ke(KeplerianElements orbit, double mu)
+{
+    double p = orbit.semi_major_axis * (1 - orbit.eccentricity * orbit.eccentricity);
+
     // Rotation matrix from perifocal to inertial frame
     Matrix3 R = perifocal_to_eci(orbit.longitude_of_ascending_node,
                                  orbit.inclination,
                                  orbit.argument_of_periapsis);
 
-    StateVector state_vector = {
-        mat_mul_vec(R, perifocal_position),
-        mat_mul_vec(R, perifocal_velocity),
-        orbit.epoch};
+    return state_from_true_anomaly(orbit.true_anomaly, orbit.eccentricity, p, sqrt(mu / p), R, orbit.epoch);
+}
 
-    return state_vector;
+PreparedOrbit prepare_orbit(KeplerianElements orbit, double mu)
+{
+    return prepare_orbit_at_mean_anomaly(orbit, M_from_theta(orbit.true_anomaly, orbit.eccentricity), mu);
+}
+
+PreparedOrbit prepare_orbit_at_mean_anomaly(KeplerianElements orbit, double M_at_epoch, double mu)
+{
+    double e = orbit.eccentricity;
+    double p = orbit.semi_major_axis * (1 - e * e);
+
+    PreparedOrbit prepared = {
+        .orbit = orbit,
+        .mu = mu,
+        .perifocal_to_eci = perifocal_to_eci(orbit.longitude_of_ascending_node,
+                                             orbit.inclination,
+                                             orbit.argument_of_periapsis),
+        .mean_motion = 2 * M_PI / orbital_period(orbit.semi_major_axis, mu),
+        .M_at_epoch = M_at_epoch,
+        .p = p,
+        .sqrt_mu_over_p = sqrt(mu / p),
+        .tan_half_scale = sqrt((1 + e) / (1 - e))};
+
+    return prepared;
+}
+
+StateVector prepared_orbit_state_at_true_anomaly(const PreparedOrbit *prepared, double theta, double t)
+{
+    return state_from_true_anomaly(theta, prepared->orbit.eccentricity, prepared->p, prepared->sqrt_mu_over_p,
+                                   prepared->perifocal_to_eci, t);
+}
+
+StateVector prepared_orbit_state(const PreparedOrbit *prepared, double t)
+{
+    // Same steps as ke_orbit_prop, with the constants of the orbit already known
+    double M = remainder(prepared->mean_motion * (t - prepared->orbit.epoch) + prepared->M_at_epoch, 2 * M_PI);
+    double E = E_from_M(M, prepared->orbit.eccentricity);
+    double theta = 2 * atan(prepared->tan_half_scale * tan(E / 2));
+
+    return prepared_orbit_state_at_true_anomaly(prepared, theta, t);
 }
 
 StateVectorArray ke_state_locus(KeplerianElements orbit, double mu, int n)
@@ -162,18 +211,12 @@ StateVectorArray ke_state_locus(KeplerianElements orbit, double mu, int n)
         d_theta = 2 * effective_theta_infinity / (n - 1);
     }
 
+    // Only the true anomaly changes from one point to the next
+    PreparedOrbit prepared = prepare_orbit(orbit, mu);
     for (int i = 0; i < n; i++)
     {
         double theta = i * d_theta + initial_theta;
-        KeplerianElements orbit_i = {
-            .semi_major_axis = orbit.semi_major_axis,
-            .eccentricity = orbit.eccentricity,
-            .inclination = orbit.inclination,
-            .longitude_of_ascending_node = orbit.longitude_of_ascending_node,
-            .argument_of_periapsis = orbit.argument_of_periapsis,
-            .true_anomaly = theta,
-            .epoch = orbit.epoch};
-        mem_buffer[i] = state_vector_from_ke(orbit_i, mu);
+        mem_buffer[i] = prepared_orbit_state_at_true_anomaly(&prepared, theta, orbit.epoch);
     }
 
     StateVectorArray result;
@@ -189,9 +232,12 @@ StateVectorArray ke_orbit_prop_many(int n, double times[], KeplerianElements orb
 {
     StateVector *mem_buffer = (StateVector *)malloc(n * sizeof(StateVector));
     // Format: x, y, z, vx, vy, vz, t; t is set to the epoch of the orbit (invariant)
+    PreparedOrbit prepared = prepare_orbit(orbit, mu);
     for (int i = 0; i < n; i++)
     {
-        mem_buffer[i] = state_vector_from_ke(ke_orbit_prop(times[i], orbit, mu), mu);
+        // ke_orbit_prop doesn't propagate backwards in time, and returns the orbit itself at its epoch
+        mem_buffer[i] = times[i] <= orbit.epoch ? state_vector_from_ke(ke_orbit_prop(times[i], orbit, mu), mu)
+                                                : prepared_orbit_state(&prepared, times[i]);
     }
     StateVectorArray result;
     // Cast the pointer to a (Nx7) double array
@@ -1,15 +1,30 @@
+import asyncio
+import ctypes
+import weakref
+from concurrent.futures import (Executor, ProcessPoolExecutor,
+                                ThreadPoolExecutor, as_completed)
 from functools import partial
-from multiprocessing import Pool, cpu_count
-from typing import NamedTuple
+from multiprocessing import Pool, cpu_count, shared_memory
+from multiprocessing.sharedctypes import RawArray
+from typing import Callable, NamedTuple
 
 import numpy as np
 
 from trajectorize._c_extension import ffi, lib
-from trajectorize.c_ext_utils.extract_arrays import extract_double_array
 from trajectorize.ephemeris.kerbol_system import Body
+from trajectorize.trajectory.transfer_orbit import LambertSolver
+from trajectorize.trajectory.transfer_windows import window_bands
+
+# Number of tiles of t1 rows per worker when splitting up a grid search
+TILES_PER_WORKER = 8
 
 
 class InterplanetaryTransferResult(NamedTuple):
+    '''
+    Result of a grid search. t1 and tof are read-only (n_grid_t1, n_grid_tof)
+    broadcast views of the 1D axes t1_axis and tof_axis, like the output of
+    np.meshgrid(t1_axis, tof_axis, indexing="ij") but without the memory.
+    '''
     body1: Body
     body2: Body
     dv_ejection: np.ndarray
@@ -17,54 +32,472 @@ class InterplanetaryTransferResult(NamedTuple):
     t1: np.ndarray
     tof: np.ndarray
     include_capture: bool
+    branch: np.ndarray = None
+    v_inf_departure: np.ndarray = None
+    v_inf_arrival: np.ndarray = None
 
     @property
     def dv(self):
         return self.dv_ejection + self.dv_capture \
             if self.include_capture else self.dv_ejection
 
+    @property
+    def revolutions(self) -> np.ndarray:
+        '''
+        Number of complete revolutions of the cheapest transfer in each cell
+        '''
+        return (self.branch + 1) // 2
+
+    @property
+    def t1_axis(self) -> np.ndarray:
+        return self.t1[:, 0]
+
+    @property
+    def tof_axis(self) -> np.ndarray:
+        return self.tof[0]
+
+    def at_altitudes(self, parking_orbit_alt: float,
+                     capture_orbit_alt: float,
+                     include_capture: bool = None) \
+            -> "InterplanetaryTransferResult":
+        '''
+        Re-evaluates the dv of every cell for different parking and capture
+        orbit altitudes, from the stored excess velocities; no Lambert
+        problems are solved. include_capture defaults to that of the search.
+
+        With max_revs > 0, each cell keeps the transfer that was cheapest
+        at the altitudes of the original search.
+        '''
+        if self.v_inf_departure is None or self.v_inf_arrival is None:
+            raise ValueError("Result has no excess velocities to "
+                             "re-evaluate dv from.")
+
+        if include_capture is None:
+            include_capture = self.include_capture
+
+        dv_ejection = _ejection_capture_dv(self.body1, self.v_inf_departure,
+                                           parking_orbit_alt
+                                           + self.body1.radius)
+        if include_capture:
+            dv_capture = _ejection_capture_dv(self.body2, self.v_inf_arrival,
+                                              capture_orbit_alt
+                                              + self.body2.radius)
+        else:
+            dv_capture = np.full_like(dv_ejection, np.nan)
+
+        return self._replace(dv_ejection=dv_ejection, dv_capture=dv_capture,
+                             include_capture=include_capture)
+
+
+def _ejection_capture_dv(body: Body, v_inf: np.ndarray,
+                         periapsis_radius: float) -> np.ndarray:
+    # Vectorized ejection_capture_dv, over excess velocities along the
+    # last axis of v_inf
+    v_inf_sq = np.einsum("...i,...i->...", v_inf, v_inf)
+    return np.sqrt(v_inf_sq + 2 * body.mu / periapsis_radius) \
+        - np.sqrt(body.mu / periapsis_radius)
+
+
+def _broadcast_axes(t1: np.ndarray, tof: np.ndarray) \
+        -> "tuple(np.ndarray, np.ndarray)":
+    # 2D read-only views of the t1 and tof axes of a grid
+    shape = (len(t1), len(tof))
+    return np.broadcast_to(t1[:, None], shape), np.broadcast_to(tof, shape)
+
+
+def _grid_dtype(dtype) -> np.dtype:
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError(f"Unsupported dtype {dtype}; "
+                         "use float32 or float64.")
+    return dtype
+
+
+class _GridArrays(NamedTuple):
+    '''
+    Output arrays of a grid search: the t1 and tof axes, the dv_ejection
+    and dv_capture grids, the departure and arrival excess velocity grids,
+    and the Lambert solution used in each cell.
+    '''
+    t1: np.ndarray  # (n_grid_t1,)
+    tof: np.ndarray  # (n_grid_tof,)
+    dv: np.ndarray  # (2, n_grid_t1, n_grid_tof), float32 or float64
+    v_inf: np.ndarray  # (2, n_grid_t1, n_grid_tof, 3), same dtype as dv
+    branch: np.ndarray  # (n_grid_t1, n_grid_tof)
+
+    @classmethod
+    def empty(cls, n_grid_t1: int, n_grid_tof: int,
+              dtype: np.dtype = np.float64) -> "_GridArrays":
+        return cls(np.empty(n_grid_t1), np.empty(n_grid_tof),
+                   np.empty((2, n_grid_t1, n_grid_tof), dtype=dtype),
+                   np.empty((2, n_grid_t1, n_grid_tof, 3), dtype=dtype),
+                   np.empty((n_grid_t1, n_grid_tof), dtype=np.intc))
+
+    def rows(self, rows: slice) -> "_GridArrays":
+        # Views of a range of t1 rows
+        return _GridArrays(self.t1[rows], self.tof, self.dv[:, rows],
+                           self.v_inf[:, rows], self.branch[rows])
+
+    def assign(self, other: "_GridArrays"):
+        for array, values in zip(self, other):
+            array[...] = values
+
+    def result(self, body1: Body, body2: Body,
+               include_capture: bool) -> InterplanetaryTransferResult:
+        dv_ejection, dv_capture = self.dv
+        v_inf_departure, v_inf_arrival = self.v_inf
+        return InterplanetaryTransferResult(body1, body2,
+                                            dv_ejection, dv_capture,
+                                            *_broadcast_axes(self.t1,
+                                                             self.tof),
+                                            include_capture, self.branch,
+                                            v_inf_departure, v_inf_arrival)
+
+
+# Value of TransferConstraints.t1_bands to search around predicted windows
+PREDICTED_WINDOWS = "predicted"
+
+
+class TransferConstraints(NamedTuple):
+    '''
+    Constraints on the transfers of a grid search; cells that break them
+    are NaN. Cells ruled out by mask, t1_bands, tof_bounds or
+    arrival_deadline are skipped without solving anything. max_c3 and
+    max_v_inf_arrival can only be checked once a cell has been solved; with
+    max_revs > 0, the cheapest transfer satisfying them is kept.
+
+    Parameters
+    ----------
+    mask: np.ndarray
+        (n_grid, n_grid) boolean array, True for the cells to solve
+    t1_bands: list[tuple(float, float)] | str
+        Departure time ranges to search, or "predicted" for bands around
+        the transfer windows of the bodies of the search, as given by
+        transfer_windows.window_bands
+    tof_bounds: Callable
+        Function taking an array of departure times, and returning the
+        minimum and maximum time of flight for each (or scalars)
+    arrival_deadline: float
+        Latest arrival time, t1 + tof
+    max_c3: float
+        Maximum departure C3, i.e. squared excess velocity (m^2/s^2)
+    max_v_inf_arrival: float
+        Maximum arrival excess velocity (m/s)
+    '''
+    mask: np.ndarray = None
+    t1_bands: "list[tuple(float, float)] | str" = None
+    tof_bounds: Callable = None
+    arrival_deadline: float = None
+    max_c3: float = None
+    max_v_inf_arrival: float = None
 
-def _process_chunked_dv(t1_min: float, t1_max: float,
-                        tof_lim: "tuple(float, float)",
-                        body1: Body, body2: Body,
-                        parking_orbit_alt: float,
-                        capture_orbit_alt: float,
-                        include_capture: bool,
-                        n_grid_t1: int = 100,
-                        n_grid_tof: int = 100) -> np.ndarray:
+    def grid_mask(self, t1: np.ndarray, tof: np.ndarray,
+                  body1: Body = None, body2: Body = None) -> np.ndarray:
+        '''
+        Cells of the grid with axes t1 and tof that need to be solved,
+        or None if all of them do. body1 and body2 are needed for
+        predicted t1_bands.
+        '''
+        shape = (len(t1), len(tof))
+        if self.mask is None and self.t1_bands is None \
+                and self.tof_bounds is None and self.arrival_deadline is None:
+            return None
 
+        mask = np.ones(shape, dtype=bool)
+        if self.mask is not None:
+            if np.shape(self.mask) != shape:
+                raise ValueError(f"mask has shape {np.shape(self.mask)}; "
+                                 f"expected {shape}.")
+            mask &= self.mask
+
+        if self.t1_bands is not None:
+            t1_bands = self.t1_bands
+            if isinstance(t1_bands, str):
+                if t1_bands != PREDICTED_WINDOWS:
+                    raise ValueError(f"Unknown t1_bands {t1_bands}; use a "
+                                     f"list of bands or "
+                                     f"'{PREDICTED_WINDOWS}'.")
+                if body1 is None or body2 is None:
+                    raise ValueError("Predicted t1_bands need body1 and "
+                                     "body2.")
+                t1_bands = window_bands(body1, body2, (t1[0], t1[-1]))
+
+            in_band = np.zeros(len(t1), dtype=bool)
+            for t1_min, t1_max in t1_bands:
+                in_band |= (t1 >= t1_min) & (t1 <= t1_max)
+            mask &= in_band[:, None]
+
+        if self.tof_bounds is not None:
+            tof_min, tof_max = (np.broadcast_to(bound, t1.shape)
+                                for bound in self.tof_bounds(t1))
+            mask &= (tof >= tof_min[:, None]) & (tof <= tof_max[:, None])
+
+        if self.arrival_deadline is not None:
+            mask &= t1[:, None] + tof <= self.arrival_deadline
+
+        return mask
+
+    def limits(self) -> dict:
+        # Limits checked in C after solving; 0 means no limit
+        return {"max_c3": self.max_c3 or 0,
+                "max_v_inf_arrival": self.max_v_inf_arrival or 0}
+
+
+def _grid_search_problem(t1_min: float, t1_max: float,
+                         tof_lim: "tuple(float, float)",
+                         body1: Body, body2: Body,
+                         parking_orbit_alt: float,
+                         capture_orbit_alt: float,
+                         include_capture: bool,
+                         n_grid_t1: int, n_grid_tof: int,
+                         solver: LambertSolver, max_revs: int,
+                         max_c3: float = 0, max_v_inf_arrival: float = 0):
+    # Builds the C GridSearchProblem struct
     r_pe_1 = parking_orbit_alt + body1.radius
     if include_capture:
         r_pe_2 = capture_orbit_alt + body2.radius
     else:
         r_pe_2 = 0
 
-    gs_prob = ffi.new("struct GridSearchProblem *",
-                      {"body1": body1.c_data,
-                       "body2": body2.c_data,
-                       "include_capture": include_capture,
-                       "r_pe_1": r_pe_1,
-                       "r_pe_2": r_pe_2,
-                       "t1_min": t1_min,
-                       "t1_max": t1_max,
-                       "tof_min": tof_lim[0],
-                       "tof_max": tof_lim[1],
-                       "n_grid_t1": n_grid_t1,
-                       "n_grid_tof": n_grid_tof})[0]
+    return ffi.new("struct GridSearchProblem *",
+                   {"body1": body1.c_data,
+                    "body2": body2.c_data,
+                    "include_capture": include_capture,
+                    "r_pe_1": r_pe_1,
+                    "r_pe_2": r_pe_2,
+                    "t1_min": t1_min,
+                    "t1_max": t1_max,
+                    "tof_min": tof_lim[0],
+                    "tof_max": tof_lim[1],
+                    "n_grid_t1": n_grid_t1,
+                    "n_grid_tof": n_grid_tof,
+                    "solver": int(solver),
+                    "max_revs": max_revs,
+                    "max_c3": max_c3,
+                    "max_v_inf_arrival": max_v_inf_arrival})[0]
+
+
+def _fill_dv(gs_prob, arrays: _GridArrays, thread_count: int,
+             mask: np.ndarray = None):
+    '''
+    Runs the grid search in C on thread_count threads, writing straight
+    into arrays. Only cells where mask is True are solved, if given.
+
+    Each plane of arrays.dv and arrays.v_inf must be C-contiguous,
+    as must mask.
+    '''
+    if arrays.dv.dtype == np.float32:
+        precision, suffix, dv_type, v_inf_type = \
+            lib.GRID_SINGLE, "_single", "float[]", "float[]"
+    else:
+        precision, suffix, dv_type, v_inf_type = \
+            lib.GRID_DOUBLE, "", "double[]", "Vector3[]"
+
+    # Keep references to the buffers alive for the duration of the call
+    buffers = {"t1": ffi.from_buffer("double[]", arrays.t1),
+               "tof": ffi.from_buffer("double[]", arrays.tof),
+               "branch": ffi.from_buffer("int[]", arrays.branch),
+               "dv_ejection" + suffix: ffi.from_buffer(dv_type, arrays.dv[0]),
+               "dv_capture" + suffix: ffi.from_buffer(dv_type, arrays.dv[1]),
+               "v_inf_departure" + suffix: ffi.from_buffer(v_inf_type,
+                                                           arrays.v_inf[0]),
+               "v_inf_arrival" + suffix: ffi.from_buffer(v_inf_type,
+                                                         arrays.v_inf[1])}
+
+    gs_sol = ffi.new("struct GridSearchResult *",
+                     {"precision": precision, **buffers})
+
+    mask_buffer = ffi.from_buffer("bool[]", mask) if mask is not None \
+        else ffi.NULL
+    gs_prob.mask = mask_buffer
+
+    # cffi releases the GIL for the duration of the call
+    lib.transfer_dv_into(gs_prob, gs_sol, thread_count)
+
+
+def _result_nbytes(n_grid_t1: int, n_grid_tof: int,
+                   dtype: np.dtype) -> int:
+    # Size of a result block holding the t1 and tof axes, the
+    # (2, n_grid_t1, n_grid_tof) dv planes, the (2, n_grid_t1, n_grid_tof, 3)
+    # excess velocities and the branch array, in that order
+    n_cells = n_grid_t1 * n_grid_tof
+    return (n_grid_t1 + n_grid_tof) * np.dtype(np.float64).itemsize \
+        + n_cells * (8 * np.dtype(dtype).itemsize
+                     + np.dtype(np.intc).itemsize)
+
+
+def _result_arrays(buffer, n_grid_t1: int, n_grid_tof: int,
+                   dtype: np.dtype) -> _GridArrays:
+    # numpy views of a result block
+    n_cells = n_grid_t1 * n_grid_tof
+    axes = np.frombuffer(buffer, dtype=np.float64,
+                         count=n_grid_t1 + n_grid_tof)
+    floats = np.frombuffer(buffer, dtype=dtype, count=8 * n_cells,
+                           offset=axes.nbytes)
+    branch = np.frombuffer(buffer, dtype=np.intc, count=n_cells,
+                           offset=axes.nbytes + floats.nbytes)
+    return _GridArrays(axes[:n_grid_t1], axes[n_grid_t1:],
+                       floats[:2 * n_cells].reshape(2, n_grid_t1, n_grid_tof),
+                       floats[2 * n_cells:].reshape(2, n_grid_t1,
+                                                    n_grid_tof, 3),
+                       branch.reshape(n_grid_t1, n_grid_tof))
+
+
+def _shared_memory_arrays(shm: shared_memory.SharedMemory, n_grid_t1: int,
+                          n_grid_tof: int, dtype: np.dtype) -> _GridArrays:
+    # numpy views of a result block in shared memory, which is closed along
+    # with the last view. The views go through the address of the block, as
+    # a block can't be closed while a buffer exported from it is alive
+    address = ctypes.addressof(ctypes.c_byte.from_buffer(shm.buf))
+    block = (ctypes.c_byte * _result_nbytes(n_grid_t1, n_grid_tof, dtype)) \
+        .from_address(address)
+    arrays = _result_arrays(block, n_grid_t1, n_grid_tof, dtype)
+    weakref.finalize(block, shm.close).atexit = False
+    return arrays
+
+
+def _row_tiles(t1_lim: "tuple(float, float)", n_grid: int,
+               worker_count: int) -> "list[tuple]":
+    '''
+    Splits the n_grid rows of t1 into tiles of consecutive rows,
+    as (row_start, t1_min, t1_max, n_grid_t1) tuples.
+
+    There are several tiles per worker so that they can be handed out
+    dynamically; a tile of expensive cells then only holds up one worker
+    for a short while. Tile limits lie exactly on the full grid.
+    '''
+    tile_rows = max(1, n_grid // (worker_count * TILES_PER_WORKER))
+    d_t1 = (t1_lim[1] - t1_lim[0]) / n_grid
+
+    return [(row_start, t1_lim[0] + d_t1 * row_start,
+             t1_lim[0] + d_t1 * min(row_start + tile_rows, n_grid),
+             min(tile_rows, n_grid - row_start))
+            for row_start in range(0, n_grid, tile_rows)]
+
+
+def _tile_mask(mask: np.ndarray, row_start: int,
+               n_grid_t1: int) -> np.ndarray:
+    # Rows of a grid mask covered by a tile, so that each worker is only
+    # sent its own rows
+    return mask[row_start:row_start + n_grid_t1] if mask is not None \
+        else None
 
-    gs_sol = lib.transfer_dv(gs_prob)
 
-    # parse arrays
-    arr_shape = (gs_prob.n_grid_t1, gs_prob.n_grid_tof)
+def _solve_tile(arrays: _GridArrays, row_start: int,
+                t1_min: float, t1_max: float, n_grid_t1: int,
+                mask: np.ndarray = None, **problem_args):
+    # Solves a tile of n_grid_t1 rows, writing them into the result
+    # arrays starting at row_start; mask covers the tile only
+    gs_prob = _grid_search_problem(t1_min, t1_max, n_grid_t1=n_grid_t1,
+                                   **problem_args)
 
-    dv_ejection = extract_double_array(gs_sol.dv_ejection, arr_shape)
-    dv_capture = extract_double_array(gs_sol.dv_capture, arr_shape)
-    t1 = extract_double_array(gs_sol.t1, arr_shape)
-    tof = extract_double_array(gs_sol.tof, arr_shape)
+    rows = slice(row_start, row_start + n_grid_t1)
+    _fill_dv(gs_prob, arrays.rows(rows), 1, mask)
 
-    lib.free_GridSearchResult(gs_sol)
 
-    return np.stack((dv_ejection, dv_capture, t1, tof), -1)
+# Result block shared with multiprocessing pool workers; set by _init_worker
+_shared_arrays = None
+
+
+def _init_worker(buffer, n_grid_t1: int, n_grid_tof: int, dtype: np.dtype):
+    global _shared_arrays
+    _shared_arrays = _result_arrays(buffer, n_grid_t1, n_grid_tof, dtype)
+
+
+def _process_chunked_dv(row_start: int, t1_min: float, t1_max: float,
+                        n_grid_t1: int, mask: np.ndarray, **problem_args):
+    _solve_tile(_shared_arrays, row_start, t1_min, t1_max, n_grid_t1, mask,
+                **problem_args)
+
+
+def _shared_memory_chunked_dv(shm_name: str, n_rows: int, dtype: np.dtype,
+                              row_start: int, t1_min: float, t1_max: float,
+                              n_grid_t1: int, **problem_args):
+    # Same as _process_chunked_dv, for workers of a persistent executor,
+    # which attach to a named shared memory block instead
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        arrays = _result_arrays(shm.buf, n_rows, problem_args["n_grid_tof"],
+                                dtype)
+        _solve_tile(arrays, row_start, t1_min, t1_max, n_grid_t1,
+                    **problem_args)
+        del arrays
+    finally:
+        shm.close()
+
+
+class TransferSearchPool:
+    '''
+    Persistent workers for repeated calls to interplanetary_transfer_dv.
+
+    A new multiprocessing pool for each call pays for process startup and
+    for importing the C extension in every worker; a TransferSearchPool
+    keeps its workers warm between calls. Use it as a context manager,
+    or call shutdown() when done.
+
+    Parameters
+    ----------
+    max_workers: int
+        Number of worker processes to start; ignored if executor is given
+    executor: concurrent.futures.Executor
+        Existing executor to run on instead of starting new processes.
+        It is not shut down along with the pool. Strips solved on a
+        ThreadPoolExecutor are written in place; any other executor
+        is assumed to run out of process, and workers write into a
+        shared memory block.
+    '''
+
+    def __init__(self, max_workers: int = cpu_count(),
+                 executor: Executor = None):
+        self._owns_executor = executor is None
+        self.executor = executor if executor is not None \
+            else ProcessPoolExecutor(max_workers)
+
+    def __enter__(self) -> "TransferSearchPool":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def shutdown(self):
+        if self._owns_executor:
+            self.executor.shutdown()
+
+    def _solve_tiles(self, tiles: "list[tuple]", n_rows: int,
+                     problem_args: dict, dtype: np.dtype,
+                     mask: np.ndarray = None) -> _GridArrays:
+        # Solves (row_start, t1_min, t1_max, n_grid_t1) tiles on the executor
+        n_grid_tof = problem_args["n_grid_tof"]
+
+        if isinstance(self.executor, ThreadPoolExecutor):
+            arrays = _GridArrays.empty(n_rows, n_grid_tof, dtype)
+            futures = [self.executor.submit(
+                _solve_tile, arrays, *tile,
+                mask=_tile_mask(mask, tile[0], tile[3]), **problem_args)
+                for tile in tiles]
+            for future in futures:
+                future.result()
+            return arrays
+
+        shm = shared_memory.SharedMemory(
+            create=True, size=_result_nbytes(n_rows, n_grid_tof, dtype))
+        try:
+            futures = [self.executor.submit(
+                _shared_memory_chunked_dv, shm.name, n_rows, dtype, *tile,
+                mask=_tile_mask(mask, tile[0], tile[3]), **problem_args)
+                for tile in tiles]
+            for future in futures:
+                future.result()
+
+            # Returned as views, instead of copying the whole result
+            arrays = _shared_memory_arrays(shm, n_rows, n_grid_tof, dtype)
+        except BaseException:
+            shm.close()
+            raise
+        finally:
+            # The memory itself lasts until it is closed
+            shm.unlink()
+        return arrays
 
 
 def interplanetary_transfer_dv(body1: Body, body2: Body,
@@ -74,41 +507,760 @@ def interplanetary_transfer_dv(body1: Body, body2: Body,
                                capture_orbit_alt: float,
                                include_capture: bool,
                                n_grid: int = 200,
-                               process_count: int = cpu_count()) \
+                               process_count: int = cpu_count(),
+                               solver: LambertSolver = LambertSolver.CURTIS,
+                               max_revs: int = 0,
+                               backend: str = "threads",
+                               pool: TransferSearchPool = None,
+                               dtype: np.dtype = np.float64,
+                               constraints: TransferConstraints = None) \
         -> InterplanetaryTransferResult:
+    '''
+    Grid search of departure time and time of flight for a transfer
+    from body1 to body2.
+
+    With max_revs > 0, transfers with up to max_revs complete revolutions
+    around the parent body are also considered (always solved with Izzo's
+    solver), and each cell holds the cheapest one. The branch field of the
+    result identifies it: 0 for the single revolution transfer, and
+    2N - 1 or 2N for the left or right branch of N revolutions.
+
+    With the default "threads" backend, the whole grid is solved in a single
+    call to the C extension using process_count threads. The "processes"
+    backend instead splits the grid into tiles of consecutive t1 rows,
+    handed out dynamically to a multiprocessing pool of process_count
+    workers.
+
+    If a TransferSearchPool is given, the tiles are solved on its workers
+    instead (sized for process_count workers), and backend is ignored.
+
+    The result also holds the departure and arrival excess velocities of
+    each cell, so dv for other parking and capture orbit altitudes can be
+    found with InterplanetaryTransferResult.at_altitudes.
+
+    dv and excess velocities are stored as dtype, either float64 or
+    float32; float32 halves the memory of large grids.
+
+    Cells that break the given TransferConstraints are NaN; those that
+    can be ruled out up front aren't solved at all.
+    '''
+
+    if backend not in ("threads", "processes"):
+        raise ValueError(f"Unknown backend {backend}; "
+                         "use 'threads' or 'processes'.")
+
+    if body1.parent != body2.parent:
+        raise ValueError("body1 and body2 must have the same parent.")
+
+    dtype = _grid_dtype(dtype)
+
+    mask, limits = None, {}
+    if constraints is not None:
+        mask = constraints.grid_mask(
+            np.linspace(*t1_lim, n_grid, endpoint=False),
+            np.linspace(*tof_lim, n_grid, endpoint=False), body1, body2)
+        limits = constraints.limits()
+
+    if pool is None and backend == "threads":
+        gs_prob = _grid_search_problem(*t1_lim, tof_lim, body1, body2,
+                                       parking_orbit_alt, capture_orbit_alt,
+                                       include_capture, n_grid, n_grid,
+                                       solver, max_revs, **limits)
+        arrays = _GridArrays.empty(n_grid, n_grid, dtype)
+        _fill_dv(gs_prob, arrays, process_count, mask)
+
+        return arrays.result(body1, body2, include_capture)
+
+    tiles = _row_tiles(t1_lim, n_grid, process_count)
+
+    problem_args = {"tof_lim": tof_lim,
+                    "body1": body1, "body2": body2,
+                    "parking_orbit_alt": parking_orbit_alt,
+                    "capture_orbit_alt": capture_orbit_alt,
+                    "include_capture": include_capture,
+                    "n_grid_tof": n_grid,
+                    "solver": solver,
+                    "max_revs": max_revs,
+                    **limits}
+
+    if pool is not None:
+        arrays = pool._solve_tiles(tiles, n_grid, problem_args, dtype, mask)
+    else:
+        # Workers write their tiles directly into a single shared block,
+        # which is returned as views; it is freed along with the last view.
+        # Tiles are handed out one at a time as workers become free
+        buffer = RawArray(ctypes.c_byte,
+                          _result_nbytes(n_grid, n_grid, dtype))
+
+        with Pool(process_count, initializer=_init_worker,
+                  initargs=(buffer, n_grid, n_grid, dtype)) as mp_pool:
+            mp_pool.starmap(partial(_process_chunked_dv, **problem_args),
+                            [(*tile, _tile_mask(mask, tile[0], tile[3]))
+                             for tile in tiles], chunksize=1)
+
+        arrays = _result_arrays(buffer, n_grid, n_grid, dtype)
+
+    return arrays.result(body1, body2, include_capture)
+
+
+class TransferTile(NamedTuple):
+    '''
+    A finished tile of a streamed grid search (see iter_transfer_dv).
+
+    Rows row_start to row_stop (exclusive) of result have been solved.
+    result holds the whole grid and is shared by all tiles of a search;
+    rows that haven't been solved yet have NaN dv.
+    '''
+    row_start: int
+    row_stop: int
+    result: InterplanetaryTransferResult
+
+
+def _stream_tile(arrays: _GridArrays, row_start: int,
+                 t1_min: float, t1_max: float, n_grid_t1: int,
+                 **problem_args) -> tuple:
+    # Solves a tile in place, for executors sharing memory with the caller
+    _solve_tile(arrays, row_start, t1_min, t1_max, n_grid_t1,
+                **problem_args)
+    return row_start, n_grid_t1, None
+
+
+def _stream_tile_arrays(dtype: np.dtype, row_start: int, t1_min: float,
+                        t1_max: float, n_grid_t1: int,
+                        **problem_args) -> tuple:
+    # Solves a tile and returns its arrays, for out of process executors
+    arrays = _GridArrays.empty(n_grid_t1, problem_args["n_grid_tof"], dtype)
+    _solve_tile(arrays, 0, t1_min, t1_max, n_grid_t1, **problem_args)
+    return row_start, n_grid_t1, arrays
+
+
+class _TileStream:
+    '''
+    Submits the tiles of a grid search to an executor, and assembles
+    finished tiles into a shared result as they come back.
+    '''
+
+    def __init__(self, body1: Body, body2: Body,
+                 t1_lim: "tuple(float, float)",
+                 tof_lim: "tuple(float, float)",
+                 parking_orbit_alt: float,
+                 capture_orbit_alt: float,
+                 include_capture: bool,
+                 n_grid: int,
+                 process_count: int,
+                 solver: LambertSolver,
+                 max_revs: int,
+                 pool: TransferSearchPool,
+                 dtype: np.dtype,
+                 constraints: TransferConstraints):
+        if body1.parent != body2.parent:
+            raise ValueError("body1 and body2 must have the same parent.")
+
+        dtype = _grid_dtype(dtype)
+
+        self._owns_executor = pool is None
+        executor = ThreadPoolExecutor(process_count) if pool is None \
+            else pool.executor
+        self._executor = executor
+
+        # Grid coordinates are known up front, so partial results can be
+        # drawn straight away
+        self.arrays = _GridArrays(
+            np.linspace(*t1_lim, n_grid, endpoint=False),
+            np.linspace(*tof_lim, n_grid, endpoint=False),
+            np.full((2, n_grid, n_grid), np.nan, dtype=dtype),
+            np.full((2, n_grid, n_grid, 3), np.nan, dtype=dtype),
+            np.zeros((n_grid, n_grid), dtype=np.intc))
+
+        self.result = self.arrays.result(body1, body2, include_capture)
+
+        problem_args = {"tof_lim": tof_lim,
+                        "body1": body1, "body2": body2,
+                        "parking_orbit_alt": parking_orbit_alt,
+                        "capture_orbit_alt": capture_orbit_alt,
+                        "include_capture": include_capture,
+                        "n_grid_tof": n_grid,
+                        "solver": solver,
+                        "max_revs": max_revs}
+        mask = None
+        if constraints is not None:
+            mask = constraints.grid_mask(self.arrays.t1, self.arrays.tof,
+                                         body1, body2)
+            problem_args.update(constraints.limits())
+
+        tiles = _row_tiles(t1_lim, n_grid, process_count)
+        if isinstance(executor, ThreadPoolExecutor):
+            self.futures = [executor.submit(
+                _stream_tile, self.arrays, *tile,
+                mask=_tile_mask(mask, tile[0], tile[3]), **problem_args)
+                for tile in tiles]
+        else:
+            self.futures = [executor.submit(
+                _stream_tile_arrays, dtype, *tile,
+                mask=_tile_mask(mask, tile[0], tile[3]), **problem_args)
+                for tile in tiles]
 
-    if process_count > n_grid:
-        raise ValueError(f"process_count of {process_count} is greater"
-                         f" than grid size of {n_grid}, cannot slice"
-                         " problem so finely. Use fewer processes.")
+    def collect(self, tile_result: tuple) -> TransferTile:
+        # Copies a finished tile into the result, if it was solved elsewhere
+        row_start, n_rows, arrays = tile_result
+        rows = slice(row_start, row_start + n_rows)
+        if arrays is not None:
+            self.arrays.rows(rows).assign(arrays)
+        return TransferTile(row_start, row_start + n_rows, self.result)
 
+    def close(self):
+        # Drop tiles that haven't started yet, e.g. if the caller stops early
+        for future in self.futures:
+            future.cancel()
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+
+def iter_transfer_dv(body1: Body, body2: Body,
+                     t1_lim: "tuple(float, float)",
+                     tof_lim: "tuple(float, float)",
+                     parking_orbit_alt: float,
+                     capture_orbit_alt: float,
+                     include_capture: bool,
+                     n_grid: int = 200,
+                     process_count: int = cpu_count(),
+                     solver: LambertSolver = LambertSolver.CURTIS,
+                     max_revs: int = 0,
+                     pool: TransferSearchPool = None,
+                     dtype: np.dtype = np.float64,
+                     constraints: TransferConstraints = None) \
+        -> "Iterator[TransferTile]":
+    '''
+    Streaming version of interplanetary_transfer_dv, which yields tiles of
+    t1 rows as they are finished, in order of completion.
+
+    Every tile refers to the same, partially filled, result; once all
+    tiles have been yielded it is complete. Stopping early (e.g. once a
+    good enough transfer has been found) cancels the remaining tiles.
+
+    Tiles are solved on process_count threads, or on the workers of pool
+    if given.
+    '''
+    stream = _TileStream(body1, body2, t1_lim, tof_lim, parking_orbit_alt,
+                         capture_orbit_alt, include_capture, n_grid,
+                         process_count, solver, max_revs, pool, dtype,
+                         constraints)
+    try:
+        for future in as_completed(stream.futures):
+            yield stream.collect(future.result())
+    finally:
+        stream.close()
+
+
+async def aiter_transfer_dv(body1: Body, body2: Body,
+                            t1_lim: "tuple(float, float)",
+                            tof_lim: "tuple(float, float)",
+                            parking_orbit_alt: float,
+                            capture_orbit_alt: float,
+                            include_capture: bool,
+                            n_grid: int = 200,
+                            process_count: int = cpu_count(),
+                            solver: LambertSolver = LambertSolver.CURTIS,
+                            max_revs: int = 0,
+                            pool: TransferSearchPool = None,
+                            dtype: np.dtype = np.float64,
+                            constraints: TransferConstraints = None) \
+        -> "AsyncIterator[TransferTile]":
+    '''
+    Asynchronous version of iter_transfer_dv, for use with asyncio;
+    the event loop is free while tiles are being solved.
+    '''
+    stream = _TileStream(body1, body2, t1_lim, tof_lim, parking_orbit_alt,
+                         capture_orbit_alt, include_capture, n_grid,
+                         process_count, solver, max_revs, pool, dtype,
+                         constraints)
+    try:
+        for future in asyncio.as_completed([asyncio.wrap_future(future)
+                                            for future in stream.futures]):
+            yield stream.collect(await future)
+    finally:
+        stream.close()
+
+
+class TransferSummary(NamedTuple):
+    '''
+    Result of summarize_transfer_dv: reductions of a grid search along its
+    t1 and tof axes, without the grid itself.
+
+    dv is the total dv of a cell (including capture if include_capture).
+    row_min_dv[i] is the minimum dv departing at t1[i], found at time of
+    flight tof[row_argmin[i]]; col_min_dv[j] is the minimum dv with time of
+    flight tof[j], departing at t1[col_argmin[j]]. best_dv holds the dv of
+    the top_k best cells in increasing order, at (t1[best_i], tof[best_j]).
+    NaN dv and -1 indices mean there was no valid transfer.
+    '''
+    body1: Body
+    body2: Body
+    t1: np.ndarray
+    tof: np.ndarray
+    include_capture: bool
+    row_min_dv: np.ndarray
+    row_argmin: np.ndarray
+    col_min_dv: np.ndarray
+    col_argmin: np.ndarray
+    best_dv: np.ndarray
+    best_i: np.ndarray
+    best_j: np.ndarray
+
+    @property
+    def row_min_tof(self) -> np.ndarray:
+        '''
+        Time of flight of the cheapest transfer departing at each t1
+        '''
+        return np.where(self.row_argmin >= 0, self.tof[self.row_argmin],
+                        np.nan)
+
+    @property
+    def best(self) -> "tuple(float, float, float)":
+        '''
+        (t1, tof, dv) of the cheapest transfer, or None if there is none
+        '''
+        if len(self.best_i) == 0 or self.best_i[0] < 0:
+            return None
+        return (self.t1[self.best_i[0]], self.tof[self.best_j[0]],
+                self.best_dv[0])
+
+    def pareto_front(self) -> "tuple(np.ndarray, np.ndarray, np.ndarray)":
+        '''
+        Transfers for which no faster transfer is as cheap, as arrays of
+        (t1, tof, dv) in order of increasing tof.
+        '''
+        dv = np.where(self.col_argmin >= 0, self.col_min_dv, np.inf)
+        faster_dv = np.minimum.accumulate(np.concatenate(([np.inf], dv[:-1])))
+        j = np.flatnonzero(dv < faster_dv)
+        return self.t1[self.col_argmin[j]], self.tof[j], dv[j]
+
+
+def _new_reduction(n_grid_t1: int, n_grid_tof: int, top_k: int):
+    # Allocates the arrays of a GridSearchReduction: the t1 and tof axes,
+    # row minima, column minima and best cells, as in TransferSummary.
+    # Returns them along with the C struct pointing into them
+    arrays = [np.empty(n_grid_t1), np.empty(n_grid_tof),
+              np.empty(n_grid_t1), np.empty(n_grid_t1, dtype=np.intc),
+              np.empty(n_grid_tof), np.empty(n_grid_tof, dtype=np.intc),
+              np.empty(top_k), np.empty(top_k, dtype=np.intc)]
+
+    buffers = [ffi.from_buffer("int[]" if array.dtype == np.intc
+                               else "double[]", array) for array in arrays]
+    reduction = ffi.new("struct GridSearchReduction *",
+                        {"t1": buffers[0],
+                         "tof": buffers[1],
+                         "row_min_dv": buffers[2],
+                         "row_argmin": buffers[3],
+                         "col_min_dv": buffers[4],
+                         "col_argmin": buffers[5],
+                         "k": top_k,
+                         "best_dv": buffers[6],
+                         "best_idx": buffers[7]})
+    return arrays, reduction
+
+
+def _reduce_dv(gs_prob, top_k: int, thread_count: int) -> "list[np.ndarray]":
+    # Runs transfer_dv_reduce, returning the arrays of _new_reduction
+    arrays, reduction = _new_reduction(gs_prob.n_grid_t1, gs_prob.n_grid_tof,
+                                       top_k)
+
+    # cffi releases the GIL for the duration of the call
+    lib.transfer_dv_reduce(gs_prob, reduction, thread_count)
+    return arrays
+
+
+def _reduce_tile(top_k: int, row_start: int, t1_min: float, t1_max: float,
+                 n_grid_t1: int, **problem_args) -> "list[np.ndarray]":
+    # Summarizes a tile of rows, with indices relative to the whole grid
+    gs_prob = _grid_search_problem(t1_min, t1_max, n_grid_t1=n_grid_t1,
+                                   **problem_args)
+    arrays = _reduce_dv(gs_prob, top_k, 1)
+
+    n_grid_tof = problem_args["n_grid_tof"]
+    col_argmin, best_idx = arrays[5], arrays[7]
+    col_argmin[col_argmin >= 0] += row_start
+    best_idx[best_idx >= 0] += row_start * n_grid_tof
+    return arrays
+
+
+def _merge_summaries(tiles: "list[list[np.ndarray]]",
+                     top_k: int) -> "list[np.ndarray]":
+    # Combines the summaries of tiles of consecutive rows, in order of t1
+    t1 = np.concatenate([tile[0] for tile in tiles])
+    tof = tiles[0][1]
+    row_min_dv = np.concatenate([tile[2] for tile in tiles])
+    row_argmin = np.concatenate([tile[3] for tile in tiles])
+
+    # Ties go to the earliest departure, as within a tile
+    col_min_dv = np.full(len(tof), np.inf)
+    col_argmin = np.full(len(tof), -1, dtype=np.intc)
+    for tile in tiles:
+        tile_dv = np.where(tile[5] >= 0, tile[4], np.inf)
+        better = tile_dv < col_min_dv
+        col_min_dv[better] = tile_dv[better]
+        col_argmin[better] = tile[5][better]
+    col_min_dv[col_argmin < 0] = np.nan
+
+    best_dv = np.concatenate([tile[6] for tile in tiles])
+    best_idx = np.concatenate([tile[7] for tile in tiles])
+    valid = best_idx >= 0
+    best_dv, best_idx = best_dv[valid], best_idx[valid]
+    order = np.lexsort((best_idx, best_dv))[:top_k]
+
+    n_missing = top_k - len(order)
+    best_dv = np.concatenate((best_dv[order], np.full(n_missing, np.nan)))
+    best_idx = np.concatenate((best_idx[order],
+                               np.full(n_missing, -1, dtype=np.intc)))
+
+    return [t1, tof, row_min_dv, row_argmin, col_min_dv, col_argmin,
+            best_dv, best_idx]
+
+
+def summarize_transfer_dv(body1: Body, body2: Body,
+                          t1_lim: "tuple(float, float)",
+                          tof_lim: "tuple(float, float)",
+                          parking_orbit_alt: float,
+                          capture_orbit_alt: float,
+                          include_capture: bool,
+                          n_grid_t1: int = 200,
+                          n_grid_tof: int = 200,
+                          top_k: int = 10,
+                          process_count: int = cpu_count(),
+                          solver: LambertSolver = LambertSolver.CURTIS,
+                          max_revs: int = 0,
+                          pool: TransferSearchPool = None) \
+        -> TransferSummary:
+    '''
+    Same grid search as interplanetary_transfer_dv (with separate grid
+    sizes for t1 and tof), reduced to the cheapest transfer for each
+    departure time and for each time of flight, and the top_k cheapest
+    transfers overall. The grid itself is never stored, so memory use only
+    grows with n_grid_t1 + n_grid_tof; suited to surveys of launch windows
+    over long spans of time.
+
+    Rows are solved on process_count threads in a single call to the C
+    extension, or in tiles on the workers of pool if given.
+    '''
     if body1.parent != body2.parent:
         raise ValueError("body1 and body2 must have the same parent.")
 
-    # Chunk the problem into multiple "strips" of t1 to be solve
-    n_grid_t1 = round(n_grid / process_count)
-
-    t1_limit_vals = np.linspace(*t1_lim, process_count + 1)
-    t1_limit_zip = zip(t1_limit_vals[:-1], t1_limit_vals[1:])
-
-    with Pool(process_count) as pool:
-        arr_seq = pool.starmap(partial(_process_chunked_dv,
-                                       body1=body1, body2=body2,
-                                       tof_lim=tof_lim,
-                                       parking_orbit_alt=parking_orbit_alt,
-                                       capture_orbit_alt=capture_orbit_alt,
-                                       include_capture=include_capture,
-                                       n_grid_t1=n_grid_t1, n_grid_tof=n_grid),
-                               t1_limit_zip)
-
-    big_arr = np.concatenate(arr_seq, 0)
-
-    dv_ejection = big_arr[:, :, 0]
-    dv_capture = big_arr[:, :, 1]
-    t1 = big_arr[:, :, 2]
-    tof = big_arr[:, :, 3]
-
-    return InterplanetaryTransferResult(body1, body2,
-                                        dv_ejection, dv_capture,
-                                        t1, tof,
-                                        include_capture)
+    if top_k < 0:
+        raise ValueError("top_k must be non-negative.")
+
+    problem_args = {"tof_lim": tof_lim,
+                    "body1": body1, "body2": body2,
+                    "parking_orbit_alt": parking_orbit_alt,
+                    "capture_orbit_alt": capture_orbit_alt,
+                    "include_capture": include_capture,
+                    "n_grid_tof": n_grid_tof,
+                    "solver": solver,
+                    "max_revs": max_revs}
+
+    if pool is None:
+        gs_prob = _grid_search_problem(*t1_lim, n_grid_t1=n_grid_t1,
+                                       **problem_args)
+        arrays = _reduce_dv(gs_prob, top_k, process_count)
+    else:
+        tiles = _row_tiles(t1_lim, n_grid_t1, process_count)
+        futures = [pool.executor.submit(_reduce_tile, top_k, *tile,
+                                        **problem_args)
+                   for tile in tiles]
+        arrays = _merge_summaries([future.result() for future in futures],
+                                  top_k)
+
+    (t1, tof, row_min_dv, row_argmin, col_min_dv, col_argmin,
+     best_dv, best_idx) = arrays
+    best_i = np.where(best_idx >= 0, best_idx // n_grid_tof, -1)
+    best_j = np.where(best_idx >= 0, best_idx % n_grid_tof, -1)
+
+    return TransferSummary(body1, body2, t1, tof, include_capture,
+                           row_min_dv, row_argmin, col_min_dv, col_argmin,
+                           best_dv, best_i, best_j)
+
+
+def _evaluate_points(gs_prob, t1: np.ndarray, tof: np.ndarray,
+                     thread_count: int) -> np.ndarray:
+    '''
+    Evaluates transfers at scattered (t1, tof) points.
+
+    Returns a (9, n) array of dv_ejection, dv_capture, branch, and the
+    departure and arrival excess velocities.
+    '''
+    n = len(t1)
+    out = np.empty((4, n))
+    out[2] = t1
+    out[3] = tof
+    v_inf = np.empty((2, n, 3))
+    branch = np.empty(n, dtype=np.intc)
+
+    buffers = [ffi.from_buffer("double[]", plane) for plane in out]
+    v_inf_buffers = [ffi.from_buffer("Vector3[]", plane) for plane in v_inf]
+    branch_buffer = ffi.from_buffer("int[]", branch)
+
+    gs_sol = ffi.new("struct GridSearchResult *",
+                     {"n_grid_t1": n,
+                      "n_grid_tof": 1,
+                      "dv_ejection": buffers[0],
+                      "dv_capture": buffers[1],
+                      "t1": buffers[2],
+                      "tof": buffers[3],
+                      "branch": branch_buffer,
+                      "v_inf_departure": v_inf_buffers[0],
+                      "v_inf_arrival": v_inf_buffers[1]})
+
+    lib.transfer_dv_points(gs_prob, gs_sol, thread_count)
+
+    return np.concatenate((out[:2], branch[None], v_inf[0].T, v_inf[1].T))
+
+
+# Offsets of the 8 neighbours of a cell
+_NEIGHBOURS = [(di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1)
+               if di or dj]
+
+
+class AdaptiveTransferResult(NamedTuple):
+    '''
+    Result of adaptive_transfer_dv, as the leaf cells of a quadtree.
+
+    Leaf cell k at refinement level level[k] spans
+    [t1[k], t1[k] + d_t1[k]) x [tof[k], tof[k] + d_tof[k]), and holds the
+    transfer departing at its lower corner, like a cell of a dense grid.
+    '''
+    body1: Body
+    body2: Body
+    t1_lim: "tuple(float, float)"
+    tof_lim: "tuple(float, float)"
+    n_coarse: int
+    max_depth: int
+    level: np.ndarray
+    t1: np.ndarray
+    tof: np.ndarray
+    dv_ejection: np.ndarray
+    dv_capture: np.ndarray
+    branch: np.ndarray
+    include_capture: bool
+    n_evaluations: int
+    v_inf_departure: np.ndarray = None
+    v_inf_arrival: np.ndarray = None
+
+    @property
+    def dv(self):
+        return self.dv_ejection + self.dv_capture \
+            if self.include_capture else self.dv_ejection
+
+    @property
+    def d_t1(self) -> np.ndarray:
+        return (self.t1_lim[1] - self.t1_lim[0]) / \
+            (self.n_coarse * 2 ** self.level)
+
+    @property
+    def d_tof(self) -> np.ndarray:
+        return (self.tof_lim[1] - self.tof_lim[0]) / \
+            (self.n_coarse * 2 ** self.level)
+
+    def rasterize(self, n_grid_t1: int, n_grid_tof: int = None) \
+            -> InterplanetaryTransferResult:
+        '''
+        Samples the leaf cells onto a dense grid with the same layout as
+        interplanetary_transfer_dv. Each grid point takes the values of the
+        leaf cell containing it.
+
+        At a resolution of n_coarse * 2 ** max_depth, grid points inside
+        fully refined regions match a dense search exactly.
+        '''
+        if n_grid_tof is None:
+            n_grid_tof = n_grid_t1
+
+        n_fine = self.n_coarse * 2 ** self.max_depth
+
+        # Position of each grid point on the finest level of the quadtree
+        i_fine = (np.arange(n_grid_t1) * n_fine) // n_grid_t1
+        j_fine = (np.arange(n_grid_tof) * n_fine) // n_grid_tof
+        i_fine, j_fine = np.meshgrid(i_fine, j_fine, indexing="ij")
+
+        leaf = np.full(i_fine.shape, -1)
+        for level in range(self.max_depth + 1):
+            shift = self.max_depth - level
+            n_level = self.n_coarse * 2 ** level
+
+            leaf_idx = np.flatnonzero(self.level == level)
+            leaf_keys = _cell_keys(self.t1[leaf_idx], self.tof[leaf_idx],
+                                   self.t1_lim, self.tof_lim, n_level)
+            order = np.argsort(leaf_keys)
+
+            keys = (i_fine >> shift) * n_level + (j_fine >> shift)
+            found, pos = _search(leaf_keys[order], keys)
+            leaf[found] = leaf_idx[order][pos[found]]
+
+        t1, tof = _broadcast_axes(
+            np.linspace(*self.t1_lim, n_grid_t1, endpoint=False),
+            np.linspace(*self.tof_lim, n_grid_tof, endpoint=False))
+
+        v_inf_departure = self.v_inf_departure[leaf] \
+            if self.v_inf_departure is not None else None
+        v_inf_arrival = self.v_inf_arrival[leaf] \
+            if self.v_inf_arrival is not None else None
+
+        return InterplanetaryTransferResult(self.body1, self.body2,
+                                            self.dv_ejection[leaf],
+                                            self.dv_capture[leaf],
+                                            t1, tof,
+                                            self.include_capture,
+                                            self.branch[leaf],
+                                            v_inf_departure, v_inf_arrival)
+
+
+def _cell_keys(t1: np.ndarray, tof: np.ndarray,
+               t1_lim: "tuple(float, float)",
+               tof_lim: "tuple(float, float)", n_level: int) -> np.ndarray:
+    # Integer key of the cells with lower corners (t1, tof) on a level
+    # of the quadtree with n_level cells along each axis
+    i = np.rint((t1 - t1_lim[0]) / (t1_lim[1] - t1_lim[0]) * n_level)
+    j = np.rint((tof - tof_lim[0]) / (tof_lim[1] - tof_lim[0]) * n_level)
+    return i.astype(np.int64) * n_level + j.astype(np.int64)
+
+
+def _search(sorted_keys: np.ndarray, keys: np.ndarray) \
+        -> "tuple(np.ndarray, np.ndarray)":
+    # Whether each key is in sorted_keys, and where
+    pos = np.searchsorted(sorted_keys, keys)
+    pos = np.minimum(pos, len(sorted_keys) - 1)
+    if len(sorted_keys) == 0:
+        return np.zeros(keys.shape, dtype=bool), pos
+    return sorted_keys[pos] == keys, pos
+
+
+def _cells_to_refine(i: np.ndarray, j: np.ndarray, dv: np.ndarray,
+                     n_level: int, best_dv: float,
+                     dv_threshold: float) -> np.ndarray:
+    '''
+    Picks the cells of one level of the quadtree to subdivide: those within
+    dv_threshold of best_dv, and those at local minima of dv among the
+    cells of the level, along with the neighbours sharing their corner
+    (the minimum may lie on either side of it).
+    '''
+    keys = i * n_level + j
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+
+    dv_cmp = np.where(np.isnan(dv), np.inf, dv)
+
+    def neighbour(di: int, dj: int) -> "tuple(np.ndarray, np.ndarray)":
+        # Index of the neighbour of each cell at an offset, if it exists
+        ni, nj = i + di, j + dj
+        inside = (ni >= 0) & (ni < n_level) & (nj >= 0) & (nj < n_level)
+        found, pos = _search(sorted_keys, ni * n_level + nj)
+        found &= inside
+        return found, order[pos]
+
+    local_min = np.isfinite(dv_cmp)
+    for di, dj in _NEIGHBOURS:
+        found, idx = neighbour(di, dj)
+        local_min &= ~found | (dv_cmp <= dv_cmp[idx])
+
+    refine = local_min.copy()
+    if dv_threshold is not None:
+        refine |= dv_cmp <= best_dv + dv_threshold
+
+    for di, dj in [(-1, 0), (0, -1), (-1, -1)]:
+        found, idx = neighbour(di, dj)
+        refine[idx[found & local_min]] = True
+
+    return refine
+
+
+def adaptive_transfer_dv(body1: Body, body2: Body,
+                         t1_lim: "tuple(float, float)",
+                         tof_lim: "tuple(float, float)",
+                         parking_orbit_alt: float,
+                         capture_orbit_alt: float,
+                         include_capture: bool,
+                         n_coarse: int = 50,
+                         max_depth: int = 5,
+                         dv_threshold: float = None,
+                         thread_count: int = cpu_count(),
+                         solver: LambertSolver = LambertSolver.CURTIS,
+                         max_revs: int = 0) -> AdaptiveTransferResult:
+    '''
+    Adaptive version of interplanetary_transfer_dv, which only resolves
+    the interesting parts of the porkchop plot finely.
+
+    Starts from an n_coarse x n_coarse grid, then repeatedly splits cells
+    into four (up to max_depth times). Cells are split if they are local
+    minima of dv (or next to one), or if they are within dv_threshold of
+    the best dv found so far. The finest cells are those of a dense grid
+    of n_coarse * 2 ** max_depth points along each axis, and points shared
+    between levels are only evaluated once.
+
+    Returns the leaf cells of the quadtree; use
+    AdaptiveTransferResult.rasterize to get a dense grid.
+    '''
+    if body1.parent != body2.parent:
+        raise ValueError("body1 and body2 must have the same parent.")
+
+    gs_prob = _grid_search_problem(*t1_lim, tof_lim, body1, body2,
+                                   parking_orbit_alt, capture_orbit_alt,
+                                   include_capture, 0, 0, solver, max_revs)
+
+    n_fine = n_coarse * 2 ** max_depth
+    d_t1 = (t1_lim[1] - t1_lim[0]) / n_fine
+    d_tof = (tof_lim[1] - tof_lim[0]) / n_fine
+
+    # Every point evaluated so far, by key on the finest level
+    known_keys = np.empty(0, dtype=np.int64)
+    known_values = np.empty((9, 0))
+
+    i, j = np.meshgrid(np.arange(n_coarse, dtype=np.int64),
+                       np.arange(n_coarse, dtype=np.int64), indexing="ij")
+    i, j = i.ravel(), j.ravel()
+
+    leaves = []
+    for level in range(max_depth + 1):
+        shift = max_depth - level
+        keys = (i << shift) * n_fine + (j << shift)
+
+        # Evaluate the corners of new cells that haven't been seen before
+        new_keys = np.setdiff1d(keys, known_keys)
+        new_values = _evaluate_points(gs_prob,
+                                      t1_lim[0] + (new_keys // n_fine) * d_t1,
+                                      tof_lim[0] + (new_keys % n_fine) * d_tof,
+                                      thread_count)
+
+        known_keys = np.concatenate((known_keys, new_keys))
+        known_values = np.concatenate((known_values, new_values), 1)
+        order = np.argsort(known_keys)
+        known_keys, known_values = known_keys[order], known_values[:, order]
+
+        values = known_values[:, np.searchsorted(known_keys, keys)]
+        dv = values[0] + values[1] if include_capture else values[0]
+
+        if level == max_depth:
+            refine = np.zeros(len(keys), dtype=bool)
+        else:
+            known_dv = known_values[0] + known_values[1] \
+                if include_capture else known_values[0]
+            best_dv = np.nanmin(known_dv) \
+                if np.any(~np.isnan(known_dv)) else np.inf
+            refine = _cells_to_refine(i, j, dv, n_coarse * 2 ** level,
+                                      best_dv, dv_threshold)
+
+        leaves.append((np.full(np.count_nonzero(~refine), level),
+                       keys[~refine], values[:, ~refine]))
+
+        # Split each refined cell into four
+        i = (2 * i[refine, None] + np.array([0, 0, 1, 1])).ravel()
+        j = (2 * j[refine, None] + np.array([0, 1, 0, 1])).ravel()
+
+    level = np.concatenate([leaf[0] for leaf in leaves])
+    keys = np.concatenate([leaf[1] for leaf in leaves])
+    values = np.concatenate([leaf[2] for leaf in leaves], 1)
+
+    return AdaptiveTransferResult(body1, body2, tuple(t1_lim), tuple(tof_lim),
+                                  n_coarse, max_depth, level,
+                                  t1_lim[0] + (keys // n_fine) * d_t1,
+                                  tof_lim[0] + (keys % n_fine) * d_tof,
+                                  values[0], values[1],
+                                  values[2].astype(int), include_capture,
+                                  len(known_keys), values[3:6].T,
+                                  values[6:9].T)
@@ -11,6 +11,10 @@
 #define ATOL (1e-6)
 #define MAX_ITER (500)
 #define NEWTON_SWITCHOVER_POINT (1e-6) // Newton has been disabled for now
+#define FULL_BRACKET_MIN (-20)
+#define FULL_BRACKET_MAX (20)
+#define WARM_START_BRACKET (0.5) // initial step away from a warm start guess
+#define WARM_START_MAX_EXPANSIONS (6)
 
 double func_y(double z, double r1, double r2, double A)
 {
@@ -34,29 +38,32 @@ double func_F(double z, double t, double r1, double r2, double A, double mu)
 
 double deriv_F_z(double z, double r1, double r2, double A, double mu)
 {
-    double y0 = func_y(0, r1, r2, A);
     // Equation 5.43 from Curtis
     if (fabs(z) < ATOL) // close to zero
     {
-        return sqrt(2) / 40 * pow(y0, 1.5) + A / 8 * (sqrt(y0)) + A * sqrt(1 / 2 / y0);
+        double y0 = func_y(0, r1, r2, A);
+        return sqrt(2) / 40 * pow(y0, 1.5) + A / 8 * (sqrt(y0) + A * sqrt(1 / (2 * y0)));
     }
     double y = func_y(z, r1, r2, A);
-    return pow(y / stumpC(z), 1.5) * (1 / 2 / z * (stumpC(z) - 3 * stumpS(z) / 2 / stumpC(z)) + 3 * pow(stumpS(z), 2) / 4 / stumpC(z)) + A / 8 * (3 * stumpS(z) / stumpC(z) * sqrt(y) + A * sqrt(stumpC(z) / y));
+    double C = stumpC(z);
+    double S = stumpS(z);
+    return pow(y / C, 1.5) * (1 / (2 * z) * (C - 3 * S / (2 * C)) + 3 * S * S / (4 * C)) + A / 8 * (3 * S / C * sqrt(y) + A * sqrt(C / y));
 }
 
-LambertSolution lambert(Vector3 R1, Vector3 R2, double dt, double mu, enum TrajectoryType type)
+static bool lambert_geometry(Vector3 R1, Vector3 R2, enum TrajectoryType type,
+                             double *r1, double *r2, double *A)
 {
-    // Implementing algorithm D.25 from Curtis
-    double r1 = vec_norm(R1);
-    double r2 = vec_norm(R2);
+    // Computes the constants of Lambert's problem; returns false if the
+    // problem is degenerate
+    *r1 = vec_norm(R1);
+    *r2 = vec_norm(R2);
 
     double norm_vec_dot = vec_dot(vec_normalized(R1), vec_normalized(R2));
 
     // Check for nearly colinear vectors (dot product of unit vectors is +/- 1)
     if (fabs(fabs(norm_vec_dot) - 1) < 1e-4)
     {
-        LambertSolution solution = {.v1 = {{0}}, .v2 = {{0}}, .dt = dt, .valid = false};
-        return solution;
+        return false;
     }
 
     Vector3 c12 = vec_cross(R1, R2);
@@ -71,22 +78,28 @@ LambertSolution lambert(Vector3 R1, Vector3 R2, double dt, double mu, enum Traje
     }
 
     // Calculate A
-    double A = sin(theta) * sqrt(r1 * r2 / (1 - cos(theta)));
+    *A = sin(theta) * sqrt(*r1 * *r2 / (1 - cos(theta)));
+    return true;
+}
 
+static bool bisection_newton(double dt, double r1, double r2, double A, double mu,
+                             double *z_out, int *iterations)
+{
     // find approximate sign change point of F(z, t) in z using
     // Hybrid Newton-Bisection method
 
     // Strategy
     // 1. Find a bracket for the sign change point
     // 2. Switch over to Newton's method when the bracket is sufficiently small
-    double a = -20;
-    double b = 20;
+    double a = FULL_BRACKET_MIN;
+    double b = FULL_BRACKET_MAX;
     double z = (a + b) / 2;
 
     double dz = 2 * ATOL;
 
     for (int i = 0; i < MAX_ITER; i++)
     {
+        (*iterations)++;
         double F = func_F(z, dt, r1, r2, A, mu);
 
         // decide if we want to use bisection or newton for next iteration
@@ -114,6 +127,93 @@ LambertSolution lambert(Vector3 R1, Vector3 R2, double dt, double mu, enum Traje
         }
     }
 
+    *z_out = z;
+    return fabs(dz) < ATOL;
+}
+
+static bool safeguarded_newton(double dt, double r1, double r2, double A, double mu,
+                               double a, double b, double *z, int *iterations)
+{
+    // Newton's method from *z, using bisection whenever a Newton step
+    // would leave the bracket [a, b]. Requires F(a) <= 0 < F(b).
+    double z_i = *z;
+
+    for (int i = 0; i < MAX_ITER; i++)
+    {
+        (*iterations)++;
+        double F = func_F(z_i, dt, r1, r2, A, mu);
+
+        if (F > 0)
+            b = z_i;
+        else
+            a = z_i;
+
+        // F is flat where y is clamped to zero, so Newton can't be trusted there
+        double z_next = (a + b) / 2;
+        if (func_y(z_i, r1, r2, A) > 0)
+        {
+            double z_newton = z_i - F / deriv_F_z(z_i, r1, r2, A, mu);
+            if (z_newton > a && z_newton < b) // also rejects NaN
+            {
+                z_next = z_newton;
+            }
+        }
+
+        double dz = z_next - z_i;
+        z_i = z_next;
+
+        if (fabs(dz) < ATOL)
+        {
+            *z = z_i;
+            return true;
+        }
+    }
+
+    *z = z_i;
+    return false;
+}
+
+static bool warm_start_bracket(double dt, double r1, double r2, double A, double mu,
+                               double z_guess, double *a, double *b, int *iterations)
+{
+    // Walk away from the guess in the direction of the root until F changes sign
+    double half_width = WARM_START_BRACKET;
+
+    (*iterations)++;
+    double F_guess = func_F(z_guess, dt, r1, r2, A, mu);
+
+    double edge = z_guess;
+    for (int k = 0; k < WARM_START_MAX_EXPANSIONS; k++)
+    {
+        double next_edge = F_guess > 0 ? edge - half_width : edge + half_width;
+
+        (*iterations)++;
+        double F_edge = func_F(next_edge, dt, r1, r2, A, mu);
+
+        if (F_guess > 0 && F_edge <= 0)
+        {
+            *a = next_edge;
+            *b = edge;
+            return true;
+        }
+        if (F_guess <= 0 && F_edge > 0)
+        {
+            *a = edge;
+            *b = next_edge;
+            return true;
+        }
+
+        edge = next_edge;
+        half_width *= 2;
+    }
+
+    return false;
+}
+
+static LambertSolution lambert_velocities(Vector3 R1, Vector3 R2, double dt, double mu,
+                                          double r1, double r2, double A, double z,
+                                          bool converged, int iterations)
+{
     // Calculate orbit using lagrange f and g functions
     double y = func_y(z, r1, r2, A);
     double f = 1 - y / r1;
@@ -126,7 +226,55 @@ LambertSolution lambert(Vector3 R1, Vector3 R2, double dt, double mu, enum Traje
     // V2 = 1/g * (gdot*R2 - R1)
     Vector3 V2 = vec_mul_scalar(1 / g, vec_sub(vec_mul_scalar(gdot, R2), R1));
 
-    bool converged = fabs(dz) < ATOL;
+    return (LambertSolution){V1, V2, dt, converged, z, iterations};
+}
 
-    return (LambertSolution){V1, V2, dt, converged};
-}
\ No newline at end of file
+LambertSolution lambert(Vector3 R1, Vector3 R2, double dt, double mu, enum TrajectoryType type)
+{
+    // Implementing algorithm D.25 from Curtis
+    double r1, r2, A;
+    if (!lambert_geometry(R1, R2, type, &r1, &r2, &A))
+    {
+        LambertSolution solution = {.v1 = {{0}}, .v2 = {{0}}, .dt = dt, .valid = false, .z = 0, .iterations = 0};
+        return solution;
+    }
+
+    double z;
+    int iterations = 0;
+    bool converged = bisection_newton(dt, r1, r2, A, mu, &z, &iterations);
+
+    return lambert_velocities(R1, R2, dt, mu, r1, r2, A, z, converged, iterations);
+}
+
+LambertSolution lambert_warm_start(Vector3 R1, Vector3 R2, double dt, double mu, enum TrajectoryType type, double z_guess)
+{
+    double r1, r2, A;
+    if (!lambert_geometry(R1, R2, type, &r1, &r2, &A))
+    {
+        LambertSolution solution = {.v1 = {{0}}, .v2 = {{0}}, .dt = dt, .valid = false, .z = 0, .iterations = 0};
+        return solution;
+    }
+
+    double a, b;
+    double z = z_guess;
+    int iterations = 0;
+    bool converged = warm_start_bracket(dt, r1, r2, A, mu, z_guess, &a, &b, &iterations) &&
+                     safeguarded_newton(dt, r1, r2, A, mu, a, b, &z, &iterations);
+
+    if (!converged)
+    {
+        // Guess was no good; search the full bracket instead
+        converged = bisection_newton(dt, r1, r2, A, mu, &z, &iterations);
+    }
+
+    return lambert_velocities(R1, R2, dt, mu, r1, r2, A, z, converged, iterations);
+}
+
+LambertSolution solve_lambert(Vector3 R1, Vector3 R2, double dt, double mu, enum TrajectoryType type, enum LambertSolver solver)
+{
+    if (solver == LAMBERT_IZZO)
+    {
+        return lambert_izzo(R1, R2, dt, mu, type);
+    }
+    return lambert(R1, R2, dt, mu, type);
+}
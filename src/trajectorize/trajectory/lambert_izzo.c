@@ -0,0 +1,336 @@
+#include "lambert.h"
+#include "vec_math.h"
+
+#define _USE_MATH_DEFINES
+#include <math.h>
+#ifndef M_PI
+#define M_PI (3.14159265358979323846)
+#endif // M_PI
+
+#define ATOL (1e-11)
+#define MAX_ITER (15)
+#define BATTIN_THRESHOLD (0.01)   // use Battin's series when |x - 1| is below this
+#define LAGRANGE_THRESHOLD (0.2)  // use Lagrange's expression when |x - 1| is below this
+#define HYPERGEOMETRIC_ATOL (1e-11)
+
+/*
+Implementation of Izzo's Lambert solver
+D. Izzo, "Revisiting Lambert's problem", Celestial Mechanics and Dynamical Astronomy (2015)
+
+The problem is expressed in non-dimensional form as a single variable x, with
+time of flight T(x) monotonic on each branch. A good initial guess followed by
+Householder (third order) iterations typically converges in 2-3 iterations.
+*/
+
+static double hypergeometric_F(double z)
+{
+    // Gauss hypergeometric function 2F1(3, 1, 5/2, z), as a power series
+    double S = 1;
+    double C = 1;
+    for (int j = 0; fabs(C) > HYPERGEOMETRIC_ATOL && j < 1000; j++)
+    {
+        C = C * (3 + j) * (1 + j) / (2.5 + j) * z / (j + 1);
+        S += C;
+    }
+    return S;
+}
+
+static double x2tof_lagrange(double x, double lambda, int N)
+{
+    // Time of flight from Lagrange's expression; well conditioned near x = 1
+    double a = 1 / (1 - x * x);
+    if (a > 0) // ellipse
+    {
+        double alpha = 2 * acos(x);
+        double beta = 2 * asin(sqrt(lambda * lambda / a));
+        if (lambda < 0)
+            beta = -beta;
+        return a * sqrt(a) * ((alpha - sin(alpha)) - (beta - sin(beta)) + 2 * M_PI * N) / 2;
+    }
+    else // hyperbola
+    {
+        double alpha = 2 * acosh(x);
+        double beta = 2 * asinh(sqrt(-lambda * lambda / a));
+        if (lambda < 0)
+            beta = -beta;
+        return -a * sqrt(-a) * ((beta - sinh(beta)) - (alpha - sinh(alpha))) / 2;
+    }
+}
+
+static double x2tof(double x, double lambda, int N)
+{
+    // Non-dimensional time of flight as a function of x
+    double dist = fabs(x - 1);
+    if (dist < LAGRANGE_THRESHOLD && dist > BATTIN_THRESHOLD)
+    {
+        return x2tof_lagrange(x, lambda, N);
+    }
+
+    double K = lambda * lambda;
+    double E = x * x - 1;
+    double rho = fabs(E);
+    double z = sqrt(1 + K * E);
+
+    if (dist < BATTIN_THRESHOLD)
+    {
+        // Battin's series expression, for near-parabolic cases
+        double eta = z - lambda * x;
+        double S1 = 0.5 * (1 - lambda - x * eta);
+        double Q = 4.0 / 3.0 * hypergeometric_F(S1);
+        return (eta * eta * eta * Q + 4 * lambda * eta) / 2 + N * M_PI / pow(rho, 1.5);
+    }
+
+    // Lancaster's expression
+    double y = sqrt(rho);
+    double g = x * z - lambda * E;
+    double d;
+    if (E < 0)
+    {
+        d = N * M_PI + acos(g);
+    }
+    else
+    {
+        double f = y * (z - lambda * x);
+        d = log(f + g);
+    }
+    return (x - lambda * z - d / y) / E;
+}
+
+static void dTdx(double x, double T, double lambda, double *DT, double *DDT, double *DDDT)
+{
+    // First three derivatives of the time of flight wrt x
+    double l2 = lambda * lambda;
+    double l3 = l2 * lambda;
+    double umx2 = 1 - x * x;
+    double y = sqrt(1 - l2 * umx2);
+    double y2 = y * y;
+    double y3 = y2 * y;
+
+    *DT = 1 / umx2 * (3 * T * x - 2 + 2 * l3 * x / y);
+    *DDT = 1 / umx2 * (3 * T + 5 * x * *DT + 2 * (1 - l2) * l3 / y3);
+    *DDDT = 1 / umx2 * (7 * x * *DDT + 8 * *DT - 6 * (1 - l2) * l2 * l3 * x / y3 / y2);
+}
+
+static bool householder(double T, double lambda, int N, double *x, int *iterations)
+{
+    // Householder iterations to solve T(x) = T, starting from *x
+    double x0 = *x;
+    for (int i = 0; i < MAX_ITER; i++)
+    {
+        (*iterations)++;
+        double tof = x2tof(x0, lambda, N);
+        double DT, DDT, DDDT;
+        dTdx(x0, tof, lambda, &DT, &DDT, &DDDT);
+
+        double delta = tof - T;
+        double DT2 = DT * DT;
+        double x_new = x0 - delta * (DT2 - delta * DDT / 2) / (DT * (DT2 - delta * DDT) + DDDT * delta * delta / 6);
+
+        double err = fabs(x0 - x_new);
+        x0 = x_new;
+
+        if (err < ATOL)
+        {
+            *x = x0;
+            return isfinite(x0);
+        }
+    }
+    *x = x0;
+    return false;
+}
+
+static double x_initial_guess(double T, double lambda)
+{
+    // Initial guess for the single revolution branch
+    double T00 = acos(lambda) + lambda * sqrt(1 - lambda * lambda);
+    double T1 = 2.0 / 3.0 * (1 - lambda * lambda * lambda);
+
+    if (T >= T00)
+    {
+        return -(T - T00) / (T - T00 + 4);
+    }
+    else if (T <= T1)
+    {
+        return T1 * (T1 - T) / (2.0 / 5.0 * (1 - pow(lambda, 5)) * T) + 1;
+    }
+    return pow(T / T00, log(2) / log(T1 / T00)) - 1;
+}
+
+static double z_from_x(double x, double lambda, int N)
+{
+    // Equivalent universal variable z = alpha * chi^2 used by the Curtis solver;
+    // the square of the eccentric (or hyperbolic) anomaly swept by the transfer
+    double a = 1 / (1 - x * x);
+    if (a > 0)
+    {
+        double alpha = 2 * acos(x);
+        double beta = 2 * asin(sqrt(lambda * lambda / a));
+        if (lambda < 0)
+            beta = -beta;
+        double dE = alpha - beta + 2 * M_PI * N;
+        return dE * dE;
+    }
+    double alpha = 2 * acosh(x);
+    double beta = 2 * asinh(sqrt(-lambda * lambda / a));
+    if (lambda < 0)
+        beta = -beta;
+    double dF = alpha - beta;
+    return -dF * dF;
+}
+
+static LambertSolution izzo_velocities(Vector3 ir1, Vector3 ir2, Vector3 it1, Vector3 it2,
+                                       double r1, double r2, double c, double s,
+                                       double lambda, double x, double dt, double mu)
+{
+    // Reconstruct velocities from radial and tangential components
+    double gamma = sqrt(mu * s / 2);
+    double rho = (r1 - r2) / c;
+    double sigma = sqrt(1 - rho * rho);
+
+    double y = sqrt(1 - lambda * lambda + lambda * lambda * x * x);
+    double vr1 = gamma * ((lambda * y - x) - rho * (lambda * y + x)) / r1;
+    double vr2 = -gamma * ((lambda * y - x) + rho * (lambda * y + x)) / r2;
+    double vt = gamma * sigma * (y + lambda * x);
+
+    Vector3 V1 = vec_add(vec_mul_scalar(vr1, ir1), vec_mul_scalar(vt / r1, it1));
+    Vector3 V2 = vec_add(vec_mul_scalar(vr2, ir2), vec_mul_scalar(vt / r2, it2));
+
+    return (LambertSolution){.v1 = V1, .v2 = V2, .dt = dt, .valid = true};
+}
+
+static int max_feasible_revolutions(double T, double lambda)
+{
+    // Largest number of revolutions for which a solution exists,
+    // found by comparing T with the minimum time of flight of that branch
+    int N_max = (int)floor(T / M_PI);
+    double T00 = acos(lambda) + lambda * sqrt(1 - lambda * lambda);
+    double T0 = T00 + N_max * M_PI;
+
+    if (T < T0 && N_max > 0)
+    {
+        // Halley iterations on dT/dx = 0 to find the minimum time of flight
+        double T_min = T0;
+        double x_old = 0;
+        double x_new = 0;
+        for (int i = 0; i < 13; i++)
+        {
+            double DT, DDT, DDDT;
+            dTdx(x_old, T_min, lambda, &DT, &DDT, &DDDT);
+            if (DT != 0)
+            {
+                x_new = x_old - DT * DDT / (DDT * DDT - DT * DDDT / 2);
+            }
+            if (fabs(x_old - x_new) < 1e-13)
+            {
+                break;
+            }
+            T_min = x2tof(x_new, lambda, N_max);
+            x_old = x_new;
+        }
+        if (T_min > T)
+        {
+            N_max -= 1;
+        }
+    }
+    return N_max;
+}
+
+int lambert_izzo_multi_rev(Vector3 R1, Vector3 R2, double dt, double mu, enum TrajectoryType type,
+                           int max_revs, LambertSolution solutions[])
+{
+    LambertSolution invalid = {.v1 = {{0}}, .v2 = {{0}}, .dt = dt, .valid = false, .z = 0, .iterations = 0,
+                               .revolutions = 0, .branch = LAMBERT_LEFT};
+    solutions[0] = invalid;
+
+    double r1 = vec_norm(R1);
+    double r2 = vec_norm(R2);
+
+    Vector3 ir1 = vec_normalized(R1);
+    Vector3 ir2 = vec_normalized(R2);
+
+    // Same degeneracy check as the Curtis solver; the transfer plane is undefined
+    if (fabs(fabs(vec_dot(ir1, ir2)) - 1) < 1e-4 || dt <= 0)
+    {
+        return 1;
+    }
+
+    double c = vec_norm(vec_sub(R2, R1));
+    double s = (r1 + r2 + c) / 2;
+
+    Vector3 ih = vec_normalized(vec_cross(ir1, ir2));
+
+    double lambda = sqrt(1 - c / s);
+    Vector3 it1, it2;
+
+    // Long way round if the short way would be retrograde (and vice versa)
+    if (ih.z < 0)
+    {
+        lambda = -lambda;
+        it1 = vec_cross(ir1, ih);
+        it2 = vec_cross(ir2, ih);
+    }
+    else
+    {
+        it1 = vec_cross(ih, ir1);
+        it2 = vec_cross(ih, ir2);
+    }
+
+    if (type == RETROGRADE)
+    {
+        lambda = -lambda;
+        it1 = vec_mul_scalar(-1, it1);
+        it2 = vec_mul_scalar(-1, it2);
+    }
+
+    // Non-dimensional time of flight
+    double T = sqrt(2 * mu / (s * s * s)) * dt;
+
+    // Single revolution
+    double x = x_initial_guess(T, lambda);
+    int iterations = 0;
+    if (householder(T, lambda, 0, &x, &iterations))
+    {
+        solutions[0] = izzo_velocities(ir1, ir2, it1, it2, r1, r2, c, s, lambda, x, dt, mu);
+        solutions[0].z = z_from_x(x, lambda, 0);
+    }
+    solutions[0].iterations = iterations;
+
+    // Multiple revolutions; two solutions (left and right branch) for each
+    int N_max = max_feasible_revolutions(T, lambda);
+    if (N_max > max_revs)
+    {
+        N_max = max_revs;
+    }
+
+    for (int N = 1; N <= N_max; N++)
+    {
+        for (int side = 0; side < 2; side++)
+        {
+            enum LambertBranch branch = side == 0 ? LAMBERT_LEFT : LAMBERT_RIGHT;
+            double tmp = branch == LAMBERT_LEFT ? pow((N * M_PI + M_PI) / (8 * T), 2.0 / 3.0)
+                                                : pow((8 * T) / (N * M_PI), 2.0 / 3.0);
+            x = (tmp - 1) / (tmp + 1);
+            iterations = 0;
+
+            LambertSolution *sol = &solutions[2 * N - 1 + side];
+            *sol = invalid;
+            if (householder(T, lambda, N, &x, &iterations))
+            {
+                *sol = izzo_velocities(ir1, ir2, it1, it2, r1, r2, c, s, lambda, x, dt, mu);
+                sol->z = z_from_x(x, lambda, N);
+            }
+            sol->iterations = iterations;
+            sol->revolutions = N;
+            sol->branch = branch;
+        }
+    }
+
+    return 2 * N_max + 1;
+}
+
+LambertSolution lambert_izzo(Vector3 R1, Vector3 R2, double dt, double mu, enum TrajectoryType type)
+{
+    LambertSolution solution;
+    lambert_izzo_multi_rev(R1, R2, dt, mu, type, 0, &solution);
+    return solution;
+}
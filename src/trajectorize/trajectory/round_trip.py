@@ -0,0 +1,152 @@
+from multiprocessing import cpu_count
+from typing import NamedTuple
+
+import numpy as np
+
+from trajectorize.ephemeris.kerbol_system import Body
+from trajectorize.trajectory.interplanetary_transfer import (
+    interplanetary_transfer_dv, summarize_transfer_dv)
+from trajectorize.trajectory.transfer_orbit import LambertSolver
+
+
+class RoundTripMission(NamedTuple):
+    '''
+    A mission from body1 to body2 and back: departing body1 at t1, arriving
+    at body2 after tof_outbound, staying there until t3, then returning to
+    body1 after tof_return.
+    '''
+    body1: Body
+    body2: Body
+    t1: float
+    tof_outbound: float
+    t3: float
+    tof_return: float
+    dv_outbound: float
+    dv_return: float
+
+    @property
+    def dv(self) -> float:
+        return self.dv_outbound + self.dv_return
+
+    @property
+    def stay(self) -> float:
+        return self.t3 - self.t1 - self.tof_outbound
+
+    @property
+    def duration(self) -> float:
+        return self.t3 + self.tof_return - self.t1
+
+
+def _window_argmin(values: np.ndarray, start: np.ndarray,
+                   stop: np.ndarray) -> np.ndarray:
+    '''
+    Index of the minimum of values[start:stop] for each pair of start and
+    stop, or -1 where the range is empty or all NaN. Ties go to the lowest
+    index.
+
+    Uses a sparse table of the minima of every range whose length is a
+    power of two, so each query is the better of two overlapping ranges.
+    '''
+    values = np.where(np.isnan(values), np.inf, values)
+    n = len(values)
+
+    # table[k][i] is the argmin of values[i:i + 2 ** k]
+    table = [np.arange(n)]
+    while 2 ** len(table) <= n:
+        half = 2 ** (len(table) - 1)
+        left, right = table[-1][:-half], table[-1][half:]
+        table.append(np.where(values[right] < values[left], right, left))
+
+    start, stop = np.broadcast_arrays(start, stop)
+    valid = stop > start
+    argmin = np.full(start.shape, -1)
+
+    first, last = start[valid], stop[valid]
+    k = np.log2(last - first).astype(int)
+    candidates = np.empty((2, len(first)), dtype=int)
+    for level in np.unique(k):
+        at_level = k == level
+        candidates[0, at_level] = table[level][first[at_level]]
+        candidates[1, at_level] = table[level][last[at_level] - 2 ** level]
+    best = np.where(values[candidates[1]] < values[candidates[0]],
+                    candidates[1], candidates[0])
+
+    argmin[valid] = np.where(np.isfinite(values[best]), best, -1)
+    return argmin
+
+
+def plan_round_trip(body1: Body, body2: Body,
+                    t1_lim: "tuple(float, float)",
+                    tof_lim: "tuple(float, float)",
+                    stay_lim: "tuple(float, float)",
+                    parking_orbit_alt: float,
+                    capture_orbit_alt: float,
+                    include_capture: bool,
+                    n_grid: int = 200,
+                    return_tof_lim: "tuple(float, float)" = None,
+                    top_k: int = 10,
+                    process_count: int = cpu_count(),
+                    solver: LambertSolver = LambertSolver.CURTIS,
+                    max_revs: int = 0) -> "list[RoundTripMission]":
+    '''
+    Finds the top_k cheapest round trips from body1 to body2 and back,
+    departing within t1_lim with a time of flight within tof_lim, and
+    staying at body2 for between stay_lim[0] and stay_lim[1]. The return
+    leg departs from and is captured into orbits at the same altitudes as
+    the outbound one, with a time of flight within return_tof_lim (tof_lim
+    by default). Missions are in order of increasing total dv, each with a
+    different outbound transfer.
+
+    The outbound grid is solved once, and the return leg reduced once to
+    its cheapest transfer for each departure time, at the same spacing as
+    the outbound departures. The best return for every outbound cell is
+    then a range minimum query over the return departures allowed by the
+    stay, instead of a scan over every pair of cells.
+    '''
+    if stay_lim[0] > stay_lim[1]:
+        raise ValueError("stay_lim must be increasing.")
+
+    if top_k < 0:
+        raise ValueError("top_k must be non-negative.")
+
+    if return_tof_lim is None:
+        return_tof_lim = tof_lim
+
+    outbound = interplanetary_transfer_dv(
+        body1, body2, t1_lim, tof_lim, parking_orbit_alt, capture_orbit_alt,
+        include_capture, n_grid, process_count=process_count, solver=solver,
+        max_revs=max_revs)
+
+    # Return departures covering every possible stay after every arrival
+    d_t1 = (t1_lim[1] - t1_lim[0]) / n_grid
+    t3_min = t1_lim[0] + tof_lim[0] + stay_lim[0]
+    n_grid_t3 = max(1, int(np.ceil(
+        (t1_lim[1] + tof_lim[1] + stay_lim[1] - t3_min) / d_t1)))
+    inbound = summarize_transfer_dv(
+        body2, body1, (t3_min, t3_min + n_grid_t3 * d_t1), return_tof_lim,
+        capture_orbit_alt, parking_orbit_alt, include_capture,
+        n_grid_t1=n_grid_t3, n_grid_tof=n_grid, top_k=0,
+        process_count=process_count, solver=solver, max_revs=max_revs)
+
+    arrival = outbound.t1 + outbound.tof
+    return_start = np.searchsorted(inbound.t1, arrival + stay_lim[0], "left")
+    return_stop = np.searchsorted(inbound.t1, arrival + stay_lim[1], "right")
+    best_return = _window_argmin(inbound.row_min_dv, return_start,
+                                 return_stop)
+
+    dv = np.where(best_return >= 0,
+                  outbound.dv + inbound.row_min_dv[best_return], np.nan)
+    cells = np.flatnonzero(np.isfinite(dv))
+    if top_k < len(cells):
+        cells = cells[np.argpartition(dv.flat[cells], top_k - 1)[:top_k]] \
+            if top_k else cells[:0]
+    cells = cells[np.lexsort((cells, dv.flat[cells]))]
+
+    missions = []
+    for i, j in zip(*np.unravel_index(cells, dv.shape)):
+        m = best_return[i, j]
+        missions.append(RoundTripMission(
+            body1, body2, float(outbound.t1[i, j]), float(outbound.tof[i, j]),
+            float(inbound.t1[m]), float(inbound.row_min_tof[m]),
+            float(outbound.dv[i, j]), float(inbound.row_min_dv[m])))
+    return missions
@@ -1,65 +1,880 @@
 #include "trajectory_optimizers.h"
 #include "transfer_orbit.h"
 #include "delta_v_estimate.h"
+#include "kerbol_system_ephemeris.h"
+#include "kerbol_system_bodies.h"
 #include "vec_math.h"
+
+#include <limits.h>
+#include <math.h>
 #include <stdlib.h>
 
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
+#define LATTICE_RTOL (1e-9)
+#define N_BODIES (EELOO + 1)
+
+static int min_int(int a, int b)
+{
+    return a < b ? a : b;
+}
+
+static int max_int(int a, int b)
+{
+    return a > b ? a : b;
+}
+
 void free_GridSearchResult(GridSearchResult result)
 {
     free(result.dv_ejection);
     free(result.dv_capture);
     free(result.t1);
     free(result.tof);
+    free(result.branch);
+    free(result.v_inf_departure);
+    free(result.v_inf_arrival);
 }
 
-GridSearchResult transfer_dv(GridSearchProblem problem)
+// Arrival times of the grid, t2 = t1 + tof, arranged on a 1D lattice
+// so that arrival ephemerides can be shared between cells.
+// Cell (i, j) arrives at lattice index i * stride_t1 + j * stride_tof
+typedef struct ArrivalLattice
 {
+    double t0;
+    double dt;
+    int stride_t1;
+    int stride_tof;
+    int n;
+} ArrivalLattice;
 
-    double d_t1 = (problem.t1_max - problem.t1_min) / problem.n_grid_t1;
-    double d_tof = (problem.tof_max - problem.tof_min) / problem.n_grid_tof;
+static int integer_ratio(double numerator, double denominator)
+// Returns k if numerator == k * denominator for some integer k >= 1, else 0
+{
+    if (denominator == 0)
+    {
+        return 0;
+    }
+    double ratio = numerator / denominator;
+    double k = round(ratio);
+    if (k < 1 || fabs(ratio - k) > LATTICE_RTOL * k)
+    {
+        return 0;
+    }
+    return (int)k;
+}
 
-    int n2_grid = problem.n_grid_t1 * problem.n_grid_tof;
+static ArrivalLattice arrival_lattice(GridSearchProblem problem, double d_t1, double d_tof)
+{
+    // Arrival times only collapse onto a small set of distinct values
+    // when one grid spacing is an integer multiple of the other.
+    // Otherwise, the lattice is left empty (n = 0) and each cell computes
+    // its own arrival state.
+    ArrivalLattice lattice = {.t0 = problem.t1_min + problem.tof_min, .dt = 0, .stride_t1 = 0, .stride_tof = 0, .n = 0};
 
-    double *t1_arr = malloc(sizeof(double) * n2_grid);
-    double *tof_arr = malloc(sizeof(double) * n2_grid);
-    double *dv_ejection_arr = malloc(sizeof(double) * n2_grid);
-    double *dv_capture_arr = malloc(sizeof(double) * n2_grid);
+    int k;
+    if (d_tof == 0)
+    {
+        lattice.dt = d_t1;
+        lattice.stride_t1 = 1;
+    }
+    else if (d_t1 == 0)
+    {
+        lattice.dt = d_tof;
+        lattice.stride_tof = 1;
+    }
+    else if ((k = integer_ratio(d_tof, d_t1)))
+    {
+        lattice.dt = d_t1;
+        lattice.stride_t1 = 1;
+        lattice.stride_tof = k;
+    }
+    else if ((k = integer_ratio(d_t1, d_tof)))
+    {
+        lattice.dt = d_tof;
+        lattice.stride_t1 = k;
+        lattice.stride_tof = 1;
+    }
+    else
+    {
+        return lattice;
+    }
 
-    // Init arrays
-    for (int i = 0; i < problem.n_grid_t1; i++)
+    // Only worth tabulating if it's smaller than the grid itself
+    long n = (long)(problem.n_grid_t1 - 1) * lattice.stride_t1 + (long)(problem.n_grid_tof - 1) * lattice.stride_tof + 1;
+    if (n > (long)problem.n_grid_t1 * problem.n_grid_tof)
+    {
+        lattice.stride_t1 = 0;
+        lattice.stride_tof = 0;
+        return lattice;
+    }
+    lattice.n = (int)n;
+    return lattice;
+}
+
+static StateVector *state_table(Body body, double t0, double dt, int n)
+// CALLER MUST FREE RETURNED ARRAY
+{
+    // Tabulate the state of a body wrt its parent at t0 + k * dt, k = 0..n-1
+    StateVector *table = (StateVector *)malloc(n * sizeof(StateVector));
+    RelativeEphemeris ephemeris = prepare_rel_ephemeris(body.parent_id, body.body_id);
+    for (int k = 0; k < n; k++)
+    {
+        table[k] = rel_ephemeris_state_at_time(&ephemeris, t0 + dt * k);
+    }
+    return table;
+}
+
+static void store_cell(GridSearchResult *result, int idx, double dv_ejection, double dv_capture, int branch,
+                       Vector3 v_inf_departure, Vector3 v_inf_arrival)
+{
+    // Writes the outputs of a grid cell to element idx of result, at its precision
+    result->branch[idx] = branch;
+
+    if (result->precision == GRID_SINGLE)
     {
-        for (int j = 0; j < problem.n_grid_tof; j++)
+        result->dv_ejection_single[idx] = (float)dv_ejection;
+        result->dv_capture_single[idx] = (float)dv_capture;
+        for (int k = 0; k < 3; k++)
         {
-            int idx = i * problem.n_grid_tof + j;
+            if (result->v_inf_departure_single)
+            {
+                result->v_inf_departure_single[3 * idx + k] = (float)v_inf_departure.v[k];
+            }
+            if (result->v_inf_arrival_single)
+            {
+                result->v_inf_arrival_single[3 * idx + k] = (float)v_inf_arrival.v[k];
+            }
+        }
+        return;
+    }
 
-            double t1 = problem.t1_min + d_t1 * i;
-            t1_arr[idx] = t1;
+    result->dv_ejection[idx] = dv_ejection;
+    result->dv_capture[idx] = dv_capture;
+    if (result->v_inf_departure)
+    {
+        result->v_inf_departure[idx] = v_inf_departure;
+    }
+    if (result->v_inf_arrival)
+    {
+        result->v_inf_arrival[idx] = v_inf_arrival;
+    }
+}
 
-            double tof = problem.tof_min + d_tof * j;
-            tof_arr[idx] = tof;
+static void store_skipped_cell(GridSearchResult *result, int idx)
+{
+    // Marks a cell that was masked out as having no valid transfer
+    Vector3 nan_vec = {.x = NAN, .y = NAN, .z = NAN};
+    store_cell(result, idx, NAN, NAN, 0, nan_vec, nan_vec);
+}
 
-            double t2 = t1 + tof;
+static bool within_limits(GridSearchProblem problem, Vector3 v_inf_departure, Vector3 v_inf_arrival)
+{
+    // Whether a transfer satisfies the C3 and arrival excess speed limits of the problem
+    if (problem.max_c3 > 0 && vec_dot(v_inf_departure, v_inf_departure) > problem.max_c3)
+    {
+        return false;
+    }
+    if (problem.max_v_inf_arrival > 0 && vec_norm(v_inf_arrival) > problem.max_v_inf_arrival)
+    {
+        return false;
+    }
+    return true;
+}
 
-            TransferOrbit to = get_transfer_orbit(problem.body1,
-                                                  problem.body2,
-                                                  t1, t2);
-            Vector3 dep_xs_vel = excess_velocity_at_body(to, DEPARTURE);
-            dv_ejection_arr[idx] = ejection_capture_dv(problem.body1, dep_xs_vel, problem.r_pe_1);
+static void evaluate_cell(GridSearchProblem problem, StateVector b1t1, StateVector b2t2,
+                          LambertSolution *previous, LambertSolution *solutions,
+                          GridSearchResult *result, int idx)
+{
+    // Computes the dv of the cheapest transfer for a single grid cell,
+    // writing it to element idx of result
+    Vector3 v_inf_departure = {.x = NAN, .y = NAN, .z = NAN};
+    Vector3 v_inf_arrival = v_inf_departure;
+    double dv_ejection = NAN;
+    double dv_capture = NAN;
+    int branch = 0;
+
+    if (problem.max_revs == 0)
+    {
+        TransferExcessVelocities xs_vel = get_transfer_excess_velocities_from_states(problem.body1,
+                                                                                     problem.body2,
+                                                                                     b1t1, b2t2, problem.solver, previous);
+        if (xs_vel.lambert.valid)
+        {
+            *previous = xs_vel.lambert;
+        }
+
+        if (xs_vel.valid && within_limits(problem, xs_vel.departure, xs_vel.arrival))
+        {
+            v_inf_departure = xs_vel.departure;
+            v_inf_arrival = xs_vel.arrival;
+
+            dv_ejection = ejection_capture_dv(problem.body1, xs_vel.departure, problem.r_pe_1);
 
             // Calculate arrival dv if needed
             if (problem.include_capture)
             {
-                Vector3 arr_xs_vel = excess_velocity_at_body(to, ARRIVAL);
-                dv_capture_arr[idx] = ejection_capture_dv(problem.body2, arr_xs_vel, problem.r_pe_2);
+                dv_capture = ejection_capture_dv(problem.body2, xs_vel.arrival, problem.r_pe_2);
+            }
+        }
+    }
+    else
+    {
+        // Pick the cheapest of all the revolution branches
+        double mu = kerbol_system_bodies[problem.body1.parent_id].mu;
+        int n_solutions = lambert_izzo_multi_rev(b1t1.position, b2t2.position, b2t2.time - b1t1.time, mu,
+                                                 PROGRADE, problem.max_revs, solutions);
+
+        double best_dv = INFINITY;
+        for (int k = 0; k < n_solutions; k++)
+        {
+            if (!solutions[k].valid)
+            {
+                continue;
+            }
+
+            Vector3 v_inf_dep = vec_sub(solutions[k].v1, b1t1.velocity);
+            Vector3 v_inf_arr = vec_sub(solutions[k].v2, b2t2.velocity);
+            if (!within_limits(problem, v_inf_dep, v_inf_arr))
+            {
+                continue;
+            }
+
+            double dv_ej = ejection_capture_dv(problem.body1, v_inf_dep, problem.r_pe_1);
+            double dv_cap = problem.include_capture ? ejection_capture_dv(problem.body2, v_inf_arr, problem.r_pe_2)
+                                                    : NAN;
+            double dv = problem.include_capture ? dv_ej + dv_cap : dv_ej;
+
+            if (dv < best_dv)
+            {
+                best_dv = dv;
+                v_inf_departure = v_inf_dep;
+                v_inf_arrival = v_inf_arr;
+                dv_ejection = dv_ej;
+                dv_capture = dv_cap;
+                branch = k;
             }
         }
     }
 
-    GridSearchResult sol = {.dv_ejection = dv_ejection_arr,
-                            .dv_capture = dv_capture_arr,
-                            .t1 = t1_arr,
-                            .tof = tof_arr,
-                            .n_grid_t1 = problem.n_grid_t1,
-                            .n_grid_tof = problem.n_grid_tof};
+    store_cell(result, idx, dv_ejection, dv_capture, branch, v_inf_departure, v_inf_arrival);
+}
+
+static void fill_grid_axes(GridSearchProblem problem, double *t1, double *tof)
+{
+    double d_t1 = (problem.t1_max - problem.t1_min) / problem.n_grid_t1;
+    double d_tof = (problem.tof_max - problem.tof_min) / problem.n_grid_tof;
+
+    for (int i = 0; i < problem.n_grid_t1; i++)
+    {
+        t1[i] = problem.t1_min + d_t1 * i;
+    }
+    for (int j = 0; j < problem.n_grid_tof; j++)
+    {
+        tof[j] = problem.tof_min + d_tof * j;
+    }
+}
+
+// Axes and ephemerides shared by all rows of a grid search
+typedef struct GridEphemeris
+{
+    double *t1;
+    double *tof;
+    StateVector *departure_states;
+    StateVector *arrival_states; // NULL if arrival states aren't tabulated
+    ArrivalLattice lattice;
+    RelativeEphemeris arrival_ephemeris; // for arrival states that aren't tabulated
+    bool shared; // whether the states belong to tables shared with other grid searches
+} GridEphemeris;
+
+static GridEphemeris grid_ephemeris(GridSearchProblem problem, double *t1, double *tof)
+// CALLER MUST FREE WITH free_grid_ephemeris
+{
+    // Fills in the t1 and tof axes, then precomputes ephemerides; each departure time
+    // is shared by a row of the grid, and arrival times are shared along diagonals
+    // whenever the grid allows it
+    double d_t1 = (problem.t1_max - problem.t1_min) / problem.n_grid_t1;
+    double d_tof = (problem.tof_max - problem.tof_min) / problem.n_grid_tof;
+    fill_grid_axes(problem, t1, tof);
+
+    GridEphemeris ephemeris = {.t1 = t1,
+                               .tof = tof,
+                               .arrival_ephemeris = prepare_rel_ephemeris(problem.body2.parent_id,
+                                                                          problem.body2.body_id),
+                               .shared = false};
+    ephemeris.departure_states = state_table(problem.body1, problem.t1_min, d_t1, problem.n_grid_t1);
+    ephemeris.lattice = arrival_lattice(problem, d_t1, d_tof);
+    ephemeris.arrival_states = ephemeris.lattice.n ? state_table(problem.body2, ephemeris.lattice.t0,
+                                                                 ephemeris.lattice.dt, ephemeris.lattice.n)
+                                                   : NULL;
+    return ephemeris;
+}
+
+static void free_grid_ephemeris(GridEphemeris ephemeris)
+{
+    if (ephemeris.shared)
+    {
+        return;
+    }
+    free(ephemeris.departure_states);
+    free(ephemeris.arrival_states);
+}
+
+static void solve_row(GridSearchProblem problem, const GridEphemeris *ephemeris, int i,
+                      LambertSolution *solutions, GridSearchResult *result, int offset)
+{
+    // Solves row i of the grid, writing cell j to element offset + j of result.
+    // Neighbouring cells along a row have nearly identical Lambert solutions,
+    // so each one is used as a warm start for the next
+    LambertSolution previous = {.valid = false};
+
+    for (int j = 0; j < problem.n_grid_tof; j++)
+    {
+        if (problem.mask && !problem.mask[i * problem.n_grid_tof + j])
+        {
+            store_skipped_cell(result, offset + j);
+            continue;
+        }
+
+        StateVector b1t1 = ephemeris->departure_states[i];
+        StateVector b2t2;
+        if (ephemeris->arrival_states)
+        {
+            b2t2 = ephemeris->arrival_states[i * ephemeris->lattice.stride_t1 + j * ephemeris->lattice.stride_tof];
+        }
+        else
+        {
+            b2t2 = rel_ephemeris_state_at_time(&ephemeris->arrival_ephemeris, ephemeris->t1[i] + ephemeris->tof[j]);
+        }
+
+        evaluate_cell(problem, b1t1, b2t2, &previous, solutions, result, offset + j);
+    }
+}
+
+void transfer_dv_into(GridSearchProblem problem, GridSearchResult *result, int n_threads)
+{
+    result->n_grid_t1 = problem.n_grid_t1;
+    result->n_grid_tof = problem.n_grid_tof;
+
+    if (n_threads < 1)
+    {
+        n_threads = 1;
+    }
+
+    GridEphemeris ephemeris = grid_ephemeris(problem, result->t1, result->tof);
+
+    // Rows are independent, so they are shared between threads;
+    // cost varies along t1, so rows are handed out dynamically
+#pragma omp parallel num_threads(n_threads)
+    {
+        // Scratch space for multi-revolution solutions
+        LambertSolution *solutions = malloc(sizeof(LambertSolution) * (2 * problem.max_revs + 1));
+
+#pragma omp for schedule(dynamic)
+        for (int i = 0; i < problem.n_grid_t1; i++)
+        {
+            solve_row(problem, &ephemeris, i, solutions, result, i * problem.n_grid_tof);
+        }
+
+        free(solutions);
+    }
+
+    free_grid_ephemeris(ephemeris);
+}
+
+static bool cell_before(double dv_a, int idx_a, double dv_b, int idx_b)
+{
+    // Orders cells by dv, breaking ties by index so that reductions
+    // don't depend on how rows were split between threads
+    return dv_a < dv_b || (dv_a == dv_b && idx_a < idx_b);
+}
+
+static void insert_best(double *best_dv, int *best_idx, int k, double dv, int idx)
+{
+    // Inserts a cell into the sorted list of the k best cells so far, if it belongs there
+    if (k == 0 || !cell_before(dv, idx, best_dv[k - 1], best_idx[k - 1]))
+    {
+        return;
+    }
+
+    int pos = k - 1;
+    while (pos > 0 && cell_before(dv, idx, best_dv[pos - 1], best_idx[pos - 1]))
+    {
+        best_dv[pos] = best_dv[pos - 1];
+        best_idx[pos] = best_idx[pos - 1];
+        pos--;
+    }
+    best_dv[pos] = dv;
+    best_idx[pos] = idx;
+}
+
+// Column minima and best cells of a grid search, as kept by a single thread
+typedef struct PartialReduction
+{
+    double *col_min_dv;
+    int *col_argmin;
+    double *best_dv;
+    int *best_idx;
+} PartialReduction;
+
+static void clear_minima(double *min_dv, int *argmin, int n)
+{
+    // Marks n minima as not found yet
+    for (int m = 0; m < n; m++)
+    {
+        min_dv[m] = INFINITY;
+        argmin[m] = -1;
+    }
+}
+
+static PartialReduction new_partial_reduction(int n_tof, int k)
+// CALLER MUST FREE WITH free_partial_reduction
+{
+    PartialReduction partial = {.col_min_dv = malloc(sizeof(double) * n_tof),
+                                .col_argmin = malloc(sizeof(int) * n_tof),
+                                .best_dv = malloc(sizeof(double) * k),
+                                .best_idx = malloc(sizeof(int) * k)};
+    clear_minima(partial.col_min_dv, partial.col_argmin, n_tof);
+    clear_minima(partial.best_dv, partial.best_idx, k);
+    return partial;
+}
+
+static void free_partial_reduction(PartialReduction partial)
+{
+    free(partial.col_min_dv);
+    free(partial.col_argmin);
+    free(partial.best_dv);
+    free(partial.best_idx);
+}
+
+static GridSearchResult new_row_scratch(int n_tof)
+// CALLER MUST FREE WITH free_GridSearchResult
+{
+    // Space to solve a single row into, without v_inf
+    GridSearchResult row = {.t1 = NULL,
+                            .tof = NULL,
+                            .precision = GRID_DOUBLE,
+                            .dv_ejection = malloc(sizeof(double) * n_tof),
+                            .dv_capture = malloc(sizeof(double) * n_tof),
+                            .branch = malloc(sizeof(int) * n_tof),
+                            .v_inf_departure = NULL,
+                            .v_inf_arrival = NULL};
+    return row;
+}
+
+static void start_reduction(GridSearchProblem problem, GridSearchReduction *reduction)
+{
+    reduction->n_grid_t1 = problem.n_grid_t1;
+    reduction->n_grid_tof = problem.n_grid_tof;
+    clear_minima(reduction->col_min_dv, reduction->col_argmin, problem.n_grid_tof);
+    clear_minima(reduction->best_dv, reduction->best_idx, reduction->k);
+}
+
+static void reduce_row(GridSearchProblem problem, const GridSearchResult *row, int i,
+                       GridSearchReduction *reduction, PartialReduction *partial)
+{
+    // Folds solved row i into its row minimum, and the column minima and best cells of partial
+    int n_tof = problem.n_grid_tof;
+    double row_min_dv = INFINITY;
+    int row_argmin = -1;
+
+    for (int j = 0; j < n_tof; j++)
+    {
+        double dv = problem.include_capture ? row->dv_ejection[j] + row->dv_capture[j] : row->dv_ejection[j];
+        if (isnan(dv))
+        {
+            continue;
+        }
+
+        if (dv < row_min_dv)
+        {
+            row_min_dv = dv;
+            row_argmin = j;
+        }
+        if (cell_before(dv, i, partial->col_min_dv[j], partial->col_argmin[j]))
+        {
+            partial->col_min_dv[j] = dv;
+            partial->col_argmin[j] = i;
+        }
+        insert_best(partial->best_dv, partial->best_idx, reduction->k, dv, i * n_tof + j);
+    }
+
+    reduction->row_min_dv[i] = row_argmin < 0 ? NAN : row_min_dv;
+    reduction->row_argmin[i] = row_argmin;
+}
+
+static void merge_partial_reduction(GridSearchReduction *reduction, PartialReduction partial)
+{
+    // Folds the column minima and best cells of one thread into reduction;
+    // not thread safe
+    for (int j = 0; j < reduction->n_grid_tof; j++)
+    {
+        if (partial.col_argmin[j] >= 0 && cell_before(partial.col_min_dv[j], partial.col_argmin[j],
+                                                      reduction->col_min_dv[j], reduction->col_argmin[j]))
+        {
+            reduction->col_min_dv[j] = partial.col_min_dv[j];
+            reduction->col_argmin[j] = partial.col_argmin[j];
+        }
+    }
+    for (int m = 0; m < reduction->k && partial.best_idx[m] >= 0; m++)
+    {
+        insert_best(reduction->best_dv, reduction->best_idx, reduction->k, partial.best_dv[m], partial.best_idx[m]);
+    }
+}
+
+static void finish_reduction(GridSearchReduction *reduction)
+{
+    // Minima that were never found have no valid transfer
+    for (int j = 0; j < reduction->n_grid_tof; j++)
+    {
+        if (reduction->col_argmin[j] < 0)
+        {
+            reduction->col_min_dv[j] = NAN;
+        }
+    }
+    for (int m = 0; m < reduction->k; m++)
+    {
+        if (reduction->best_idx[m] < 0)
+        {
+            reduction->best_dv[m] = NAN;
+        }
+    }
+}
+
+void transfer_dv_reduce(GridSearchProblem problem, GridSearchReduction *reduction, int n_threads)
+{
+    if (n_threads < 1)
+    {
+        n_threads = 1;
+    }
+
+    start_reduction(problem, reduction);
+    GridEphemeris ephemeris = grid_ephemeris(problem, reduction->t1, reduction->tof);
+
+#pragma omp parallel num_threads(n_threads)
+    {
+        // Each thread solves whole rows into scratch space, and keeps its own
+        // column minima and best cells until the end
+        LambertSolution *solutions = malloc(sizeof(LambertSolution) * (2 * problem.max_revs + 1));
+        GridSearchResult row = new_row_scratch(problem.n_grid_tof);
+        PartialReduction partial = new_partial_reduction(problem.n_grid_tof, reduction->k);
+
+#pragma omp for schedule(dynamic)
+        for (int i = 0; i < problem.n_grid_t1; i++)
+        {
+            solve_row(problem, &ephemeris, i, solutions, &row, 0);
+            reduce_row(problem, &row, i, reduction, &partial);
+        }
+
+#pragma omp critical
+        merge_partial_reduction(reduction, partial);
+
+        free(solutions);
+        free_GridSearchResult(row);
+        free_partial_reduction(partial);
+    }
+
+    free_grid_ephemeris(ephemeris);
+    finish_reduction(reduction);
+}
+
+// Placement of a grid search on the time lattice t0 + k * dt of a batch
+typedef struct LatticePlacement
+{
+    bool on_lattice;
+    int t1_offset; // lattice index of the first departure
+    int t2_offset; // lattice index of the first arrival
+    int stride_tof;
+    int n_arrivals; // lattice points spanned by the arrivals
+} LatticePlacement;
+
+static int lattice_index(double t, double dt)
+// Returns k if t == k * dt for some integer k >= 0, else -1
+{
+    double ratio = t / dt;
+    double k = round(ratio);
+    if (k < 0 || k > INT_MAX || fabs(ratio - k) > LATTICE_RTOL * fmax(k, 1))
+    {
+        return -1;
+    }
+    return (int)k;
+}
+
+static LatticePlacement lattice_placement(GridSearchProblem problem, double t0, double dt)
+{
+    // A grid search is on the lattice if its departures are spaced by dt, and its
+    // first departure, first time of flight and tof spacing are multiples of dt
+    LatticePlacement placement = {.on_lattice = false};
+
+    double d_t1 = (problem.t1_max - problem.t1_min) / problem.n_grid_t1;
+    double d_tof = (problem.tof_max - problem.tof_min) / problem.n_grid_tof;
+    if (fabs(d_t1 - dt) > LATTICE_RTOL * dt)
+    {
+        return placement;
+    }
+
+    int t1_offset = lattice_index(problem.t1_min - t0, dt);
+    int tof_offset = lattice_index(problem.tof_min, dt);
+    int stride_tof = problem.n_grid_tof == 1 ? 1 : integer_ratio(d_tof, dt);
+    if (t1_offset < 0 || tof_offset < 0 || stride_tof == 0)
+    {
+        return placement;
+    }
+
+    placement.on_lattice = true;
+    placement.t1_offset = t1_offset;
+    placement.t2_offset = t1_offset + tof_offset;
+    placement.stride_tof = stride_tof;
+    placement.n_arrivals = problem.n_grid_t1 + (problem.n_grid_tof - 1) * stride_tof;
+    return placement;
+}
+
+static int problem_of_row(const long *row_start, int n_problems, long r)
+{
+    // Index of the problem that batch row r belongs to, by bisection
+    int lo = 0;
+    int hi = n_problems - 1;
+    while (lo < hi)
+    {
+        int mid = (lo + hi + 1) / 2;
+        if (row_start[mid] <= r)
+        {
+            lo = mid;
+        }
+        else
+        {
+            hi = mid - 1;
+        }
+    }
+    return lo;
+}
+
+void transfer_dv_reduce_batch(const GridSearchProblem *problems, GridSearchReduction *reductions,
+                              int n_problems, int n_threads)
+{
+    if (n_problems < 1)
+    {
+        return;
+    }
+    if (n_threads < 1)
+    {
+        n_threads = 1;
+    }
+
+    // The lattice of the batch: spacing of the first problem's departures,
+    // starting at the earliest departure
+    double dt = (problems[0].t1_max - problems[0].t1_min) / problems[0].n_grid_t1;
+    double t0 = problems[0].t1_min;
+    for (int p = 1; p < n_problems; p++)
+    {
+        t0 = fmin(t0, problems[p].t1_min);
+    }
+
+    // Range of lattice points needed from each body, and the number of states
+    // the problems would have tabulated on their own
+    LatticePlacement *placements = malloc(sizeof(LatticePlacement) * n_problems);
+    int first[N_BODIES];
+    int last[N_BODIES];
+    long n_needed[N_BODIES];
+    for (int b = 0; b < N_BODIES; b++)
+    {
+        first[b] = INT_MAX;
+        last[b] = -1;
+        n_needed[b] = 0;
+    }
+
+    for (int p = 0; p < n_problems; p++)
+    {
+        placements[p] = dt > 0 ? lattice_placement(problems[p], t0, dt) : (LatticePlacement){.on_lattice = false};
+        if (!placements[p].on_lattice)
+        {
+            continue;
+        }
+
+        int b1 = problems[p].body1.body_id;
+        int b2 = problems[p].body2.body_id;
+        first[b1] = min_int(first[b1], placements[p].t1_offset);
+        last[b1] = max_int(last[b1], placements[p].t1_offset + problems[p].n_grid_t1 - 1);
+        n_needed[b1] += problems[p].n_grid_t1;
+        first[b2] = min_int(first[b2], placements[p].t2_offset);
+        last[b2] = max_int(last[b2], placements[p].t2_offset + placements[p].n_arrivals - 1);
+        n_needed[b2] += placements[p].n_arrivals;
+    }
+
+    // Each body gets one table covering all its problems, unless the problems are
+    // spread out so thinly that it would be larger than their own tables combined
+    StateVector *tables[N_BODIES];
+    for (int b = 0; b < N_BODIES; b++)
+    {
+        long n = (long)last[b] - first[b] + 1;
+        tables[b] = NULL;
+        if (n <= 0 || n > n_needed[b])
+        {
+            continue;
+        }
+
+        Body body = kerbol_system_bodies[b];
+        RelativeEphemeris ephemeris = prepare_rel_ephemeris(body.parent_id, body.body_id);
+        tables[b] = malloc(sizeof(StateVector) * n);
+#pragma omp parallel for schedule(static) num_threads(n_threads)
+        for (long m = 0; m < n; m++)
+        {
+            tables[b][m] = rel_ephemeris_state_at_time(&ephemeris, t0 + dt * (first[b] + m));
+        }
+    }
+
+    // Axes and ephemerides of each problem, pointing into the shared tables where possible
+    GridEphemeris *ephemerides = malloc(sizeof(GridEphemeris) * n_problems);
+    long *row_start = malloc(sizeof(long) * (n_problems + 1));
+    int max_tof = 0;
+    int max_revs = 0;
+    row_start[0] = 0;
+    for (int p = 0; p < n_problems; p++)
+    {
+        GridSearchProblem problem = problems[p];
+        LatticePlacement placement = placements[p];
+        StateVector *departures = tables[problem.body1.body_id];
+        StateVector *arrivals = tables[problem.body2.body_id];
+
+        start_reduction(problem, &reductions[p]);
+        if (placement.on_lattice && departures && arrivals)
+        {
+            fill_grid_axes(problem, reductions[p].t1, reductions[p].tof);
+            ephemerides[p] = (GridEphemeris){
+                .t1 = reductions[p].t1,
+                .tof = reductions[p].tof,
+                .departure_states = departures + placement.t1_offset - first[problem.body1.body_id],
+                .arrival_states = arrivals + placement.t2_offset - first[problem.body2.body_id],
+                .lattice = {.t0 = t0 + dt * placement.t2_offset,
+                            .dt = dt,
+                            .stride_t1 = 1,
+                            .stride_tof = placement.stride_tof,
+                            .n = placement.n_arrivals},
+                .shared = true};
+        }
+        else
+        {
+            ephemerides[p] = grid_ephemeris(problem, reductions[p].t1, reductions[p].tof);
+        }
+
+        row_start[p + 1] = row_start[p] + problem.n_grid_t1;
+        max_tof = max_int(max_tof, problem.n_grid_tof);
+        max_revs = max_int(max_revs, problem.max_revs);
+    }
+    long n_rows = row_start[n_problems];
+
+#pragma omp parallel num_threads(n_threads)
+    {
+        LambertSolution *solutions = malloc(sizeof(LambertSolution) * (2 * max_revs + 1));
+        GridSearchResult row = new_row_scratch(max_tof);
+
+        // Partial reductions of the problems this thread has worked on
+        PartialReduction *partials = calloc(n_problems, sizeof(PartialReduction));
+
+        // Rows of all problems are handed out from one queue, so that threads stay
+        // busy however unevenly the work is split between problems
+#pragma omp for schedule(dynamic)
+        for (long r = 0; r < n_rows; r++)
+        {
+            int p = problem_of_row(row_start, n_problems, r);
+            int i = (int)(r - row_start[p]);
+            if (!partials[p].col_min_dv)
+            {
+                partials[p] = new_partial_reduction(problems[p].n_grid_tof, reductions[p].k);
+            }
+
+            solve_row(problems[p], &ephemerides[p], i, solutions, &row, 0);
+            reduce_row(problems[p], &row, i, &reductions[p], &partials[p]);
+        }
+
+#pragma omp critical
+        {
+            for (int p = 0; p < n_problems; p++)
+            {
+                if (partials[p].col_min_dv)
+                {
+                    merge_partial_reduction(&reductions[p], partials[p]);
+                    free_partial_reduction(partials[p]);
+                }
+            }
+        }
+
+        free(solutions);
+        free_GridSearchResult(row);
+        free(partials);
+    }
+
+    for (int p = 0; p < n_problems; p++)
+    {
+        free_grid_ephemeris(ephemerides[p]);
+        finish_reduction(&reductions[p]);
+    }
+    for (int b = 0; b < N_BODIES; b++)
+    {
+        free(tables[b]);
+    }
+    free(placements);
+    free(ephemerides);
+    free(row_start);
+}
+
+void transfer_dv_points(GridSearchProblem problem, GridSearchResult *result, int n_threads)
+{
+    int n_points = result->n_grid_t1 * result->n_grid_tof;
+
+    if (n_threads < 1)
+    {
+        n_threads = 1;
+    }
+
+    RelativeEphemeris departure_ephemeris = prepare_rel_ephemeris(problem.body1.parent_id, problem.body1.body_id);
+    RelativeEphemeris arrival_ephemeris = prepare_rel_ephemeris(problem.body2.parent_id, problem.body2.body_id);
+
+#pragma omp parallel num_threads(n_threads)
+    {
+        // Scratch space for multi-revolution solutions
+        LambertSolution *solutions = malloc(sizeof(LambertSolution) * (2 * problem.max_revs + 1));
+
+        // Points are usually given in clusters of nearby transfers, so each thread
+        // works through a contiguous run, warm starting from the previous point
+        LambertSolution previous = {.valid = false};
+
+#pragma omp for schedule(static)
+        for (int k = 0; k < n_points; k++)
+        {
+            if (problem.mask && !problem.mask[k])
+            {
+                store_skipped_cell(result, k);
+                continue;
+            }
+
+            double t1 = result->t1[k];
+            double t2 = t1 + result->tof[k];
+
+            StateVector b1t1 = rel_ephemeris_state_at_time(&departure_ephemeris, t1);
+            StateVector b2t2 = rel_ephemeris_state_at_time(&arrival_ephemeris, t2);
+
+            evaluate_cell(problem, b1t1, b2t2, &previous, solutions, result, k);
+        }
+
+        free(solutions);
+    }
+}
+
+GridSearchResult transfer_dv(GridSearchProblem problem)
+{
+    int n2_grid = problem.n_grid_t1 * problem.n_grid_tof;
+
+    GridSearchResult sol = {.t1 = malloc(sizeof(double) * problem.n_grid_t1),
+                            .tof = malloc(sizeof(double) * problem.n_grid_tof),
+                            .precision = GRID_DOUBLE,
+                            .dv_ejection = malloc(sizeof(double) * n2_grid),
+                            .dv_capture = malloc(sizeof(double) * n2_grid),
+                            .branch = malloc(sizeof(int) * n2_grid),
+                            .v_inf_departure = malloc(sizeof(Vector3) * n2_grid),
+                            .v_inf_arrival = malloc(sizeof(Vector3) * n2_grid)};
+
+    transfer_dv_into(problem, &sol, 1);
     return sol;
 }
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from trajectorize import __version__
+from trajectorize.ephemeris.kerbol_system import Body, BodyEnum
+from trajectorize.trajectory.interplanetary_transfer import (
+    InterplanetaryTransferResult, TransferConstraints,
+    interplanetary_transfer_dv)
+from trajectorize.trajectory.transfer_orbit import LambertSolver
+
+# Bump whenever cached results would change, so that stale entries
+# are no longer found
+CACHE_FORMAT_VERSION = 4
+
+_ARRAYS = ("dv_ejection", "dv_capture", "t1_axis", "tof_axis", "branch",
+           "v_inf_departure", "v_inf_arrival")
+
+
+class TransferCache:
+    '''
+    On-disk cache of interplanetary_transfer_dv results.
+
+    Entries are keyed by a hash of the problem parameters (and the version
+    of trajectorize), and stored as .npy files which are memory-mapped
+    read-only when loaded, so a cache hit costs no memory until the arrays
+    are used. Once the cache grows beyond max_bytes, the least recently
+    used entries are removed.
+
+    Parameters
+    ----------
+    directory: str | Path
+        Directory to keep the cache in; created if needed
+    max_bytes: int
+        Size limit of the cache
+    '''
+
+    def __init__(self, directory: "str | Path", max_bytes: int = 2 ** 30):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(body1: Body, body2: Body,
+            t1_lim: "tuple(float, float)",
+            tof_lim: "tuple(float, float)",
+            parking_orbit_alt: float,
+            capture_orbit_alt: float,
+            include_capture: bool,
+            n_grid: int,
+            solver: LambertSolver = LambertSolver.CURTIS,
+            max_revs: int = 0,
+            dtype: np.dtype = np.float64,
+            constraints: TransferConstraints = None) -> str:
+        '''
+        Key of the result of interplanetary_transfer_dv with these arguments.
+
+        Constraints are keyed by the cells of the grid they leave to solve
+        (tof_bounds can be any function, so it is keyed by its effect) and
+        by the limits checked after solving.
+        '''
+        params = {"body1": body1.body_id,
+                  "body2": body2.body_id,
+                  "t1_lim": [float(t) for t in t1_lim],
+                  "tof_lim": [float(t) for t in tof_lim],
+                  "parking_orbit_alt": float(parking_orbit_alt),
+                  "capture_orbit_alt": float(capture_orbit_alt)
+                  if include_capture else None,
+                  "include_capture": bool(include_capture),
+                  "n_grid": int(n_grid),
+                  "solver": int(solver),
+                  "max_revs": int(max_revs),
+                  "dtype": np.dtype(dtype).name,
+                  "format": CACHE_FORMAT_VERSION,
+                  "version": __version__}
+
+        if constraints is not None:
+            mask = constraints.grid_mask(
+                np.linspace(*t1_lim, n_grid, endpoint=False),
+                np.linspace(*tof_lim, n_grid, endpoint=False), body1, body2)
+            limits = {name: float(limit)
+                      for name, limit in constraints.limits().items()}
+            # Constraints which rule nothing out give the same result as none
+            if mask is not None or any(limits.values()):
+                params["constraints"] = {
+                    "mask": hashlib.sha256(np.packbits(mask)).hexdigest()
+                    if mask is not None else None,
+                    **limits}
+
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()) \
+            .hexdigest()
+
+    def get(self, key: str) -> InterplanetaryTransferResult:
+        '''
+        Loads a cached result, or returns None if there is none.
+        '''
+        path = self.directory / key
+        try:
+            with open(path / "meta.json") as f:
+                meta = json.load(f)
+            arrays = [np.load(path / f"{name}.npy", mmap_mode="r")
+                      for name in _ARRAYS]
+        except FileNotFoundError:
+            return None
+
+        # Mark as recently used
+        os.utime(path)
+
+        (dv_ejection, dv_capture, t1_axis, tof_axis, branch,
+         v_inf_departure, v_inf_arrival) = arrays
+        shape = (len(t1_axis), len(tof_axis))
+        return InterplanetaryTransferResult(
+            Body.from_identifier(BodyEnum(meta["body1"])),
+            Body.from_identifier(BodyEnum(meta["body2"])),
+            dv_ejection, dv_capture,
+            np.broadcast_to(t1_axis[:, None], shape),
+            np.broadcast_to(tof_axis, shape),
+            meta["include_capture"], branch, v_inf_departure, v_inf_arrival)
+
+    def put(self, key: str, result: InterplanetaryTransferResult):
+        '''
+        Stores a result, then evicts old entries if the cache is too large.
+        '''
+        path = self.directory / key
+
+        # Write to a temporary directory first, so that a partially written
+        # entry is never visible
+        tmp_path = Path(tempfile.mkdtemp(dir=self.directory, prefix=".tmp"))
+        try:
+            for name in _ARRAYS:
+                np.save(tmp_path / f"{name}.npy", getattr(result, name))
+            with open(tmp_path / "meta.json", "w") as f:
+                json.dump({"body1": result.body1.body_id,
+                           "body2": result.body2.body_id,
+                           "include_capture": bool(result.include_capture)},
+                          f)
+            os.replace(tmp_path, path)
+        except OSError:
+            # Most likely stored concurrently by someone else
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if not path.exists():
+                raise
+
+        self.evict()
+
+    def evict(self):
+        '''
+        Removes least recently used entries until the cache fits in max_bytes.
+        '''
+        entries = []
+        for path in self.directory.iterdir():
+            if path.name.startswith("."):
+                continue
+            size = sum(f.stat().st_size for f in path.iterdir())
+            entries.append((path.stat().st_mtime, size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        for path in self.directory.iterdir():
+            shutil.rmtree(path, ignore_errors=True)
+
+    def interplanetary_transfer_dv(
+            self, body1: Body, body2: Body,
+            t1_lim: "tuple(float, float)",
+            tof_lim: "tuple(float, float)",
+            parking_orbit_alt: float,
+            capture_orbit_alt: float,
+            include_capture: bool,
+            n_grid: int = 200,
+            solver: LambertSolver = LambertSolver.CURTIS,
+            max_revs: int = 0,
+            dtype: np.dtype = np.float64,
+            constraints: TransferConstraints = None,
+            **kwargs) -> InterplanetaryTransferResult:
+        '''
+        Cached version of interplanetary_transfer_dv; results with different
+        constraints are cached separately. Other keyword arguments (e.g.
+        process_count, backend) only affect how a result is computed on a
+        cache miss.
+        '''
+        key = self.key(body1, body2, t1_lim, tof_lim, parking_orbit_alt,
+                       capture_orbit_alt, include_capture, n_grid, solver,
+                       max_revs, dtype, constraints)
+
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        result = interplanetary_transfer_dv(
+            body1, body2, t1_lim, tof_lim, parking_orbit_alt,
+            capture_orbit_alt, include_capture, n_grid, solver=solver,
+            max_revs=max_revs, dtype=dtype, constraints=constraints,
+            **kwargs)
+        self.put(key, result)
+        return result
@@ -0,0 +1,182 @@
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from trajectorize.ephemeris.kerbol_system import Body
+from trajectorize.trajectory.interplanetary_transfer import \
+    interplanetary_transfer_dv
+from trajectorize.trajectory.transfer_orbit import (
+    LambertSolver, ejection_capture_dv, get_transfer_excess_velocities)
+
+
+class OptimalTransfer(NamedTuple):
+    body1: Body
+    body2: Body
+    t1: float
+    tof: float
+    dv_ejection: float
+    dv_capture: float
+    v_inf_departure: np.ndarray
+    v_inf_arrival: np.ndarray
+    include_capture: bool
+    n_evaluations: int
+
+    @property
+    def dv(self):
+        return self.dv_ejection + self.dv_capture \
+            if self.include_capture else self.dv_ejection
+
+
+def _nelder_mead(f: Callable, x0: np.ndarray, step: np.ndarray,
+                 xatol: float = 1e-4, fatol: float = 1e-3,
+                 max_iter: int = 200) -> "tuple(np.ndarray, float)":
+    '''
+    Minimizes f with the Nelder-Mead simplex method,
+    starting from a simplex of x0 and x0 + step along each axis.
+
+    Stops once the simplex is smaller than xatol (relative to step)
+    and the spread of f across it is below fatol.
+    '''
+    n = len(x0)
+    simplex = np.vstack([x0] + [x0 + step * e for e in np.eye(n)])
+    f_simplex = np.array([f(x) for x in simplex])
+
+    for _ in range(max_iter):
+        order = np.argsort(f_simplex)
+        simplex, f_simplex = simplex[order], f_simplex[order]
+
+        if np.max(np.abs(simplex[1:] - simplex[0]) / np.abs(step)) < xatol \
+                and f_simplex[-1] - f_simplex[0] < fatol:
+            break
+
+        centroid = simplex[:-1].mean(0)
+
+        # Reflect
+        x_r = 2 * centroid - simplex[-1]
+        f_r = f(x_r)
+
+        if f_r < f_simplex[0]:
+            # Expand
+            x_e = 3 * centroid - 2 * simplex[-1]
+            f_e = f(x_e)
+            if f_e < f_r:
+                simplex[-1], f_simplex[-1] = x_e, f_e
+            else:
+                simplex[-1], f_simplex[-1] = x_r, f_r
+        elif f_r < f_simplex[-2]:
+            simplex[-1], f_simplex[-1] = x_r, f_r
+        else:
+            # Contract, towards the better of the worst and reflected points
+            if f_r < f_simplex[-1]:
+                x_c = (centroid + x_r) / 2
+            else:
+                x_c = (centroid + simplex[-1]) / 2
+            f_c = f(x_c)
+
+            if f_c < min(f_r, f_simplex[-1]):
+                simplex[-1], f_simplex[-1] = x_c, f_c
+            else:
+                # Shrink towards the best point
+                simplex[1:] = (simplex[0] + simplex[1:]) / 2
+                f_simplex[1:] = [f(x) for x in simplex[1:]]
+
+    best = np.argmin(f_simplex)
+    return simplex[best], f_simplex[best]
+
+
+def _grid_local_minima(dv: np.ndarray) -> "tuple(np.ndarray, np.ndarray)":
+    # Indices of the cells of a grid that are no larger than
+    # any of their neighbours, in order of increasing dv
+    dv = np.where(np.isnan(dv), np.inf, dv)
+    padded = np.pad(dv, 1, constant_values=np.inf)
+
+    is_min = np.isfinite(dv)
+    n_t1, n_tof = dv.shape
+    for di in (-1, 0, 1):
+        for dj in (-1, 0, 1):
+            if di or dj:
+                is_min &= dv <= padded[1 + di:1 + di + n_t1,
+                                       1 + dj:1 + dj + n_tof]
+
+    i, j = np.nonzero(is_min)
+    order = np.argsort(dv[i, j])
+    return i[order], j[order]
+
+
+def optimize_transfer(body1: Body, body2: Body,
+                      t1_lim: "tuple(float, float)",
+                      tof_lim: "tuple(float, float)",
+                      parking_orbit_alt: float,
+                      capture_orbit_alt: float,
+                      include_capture: bool,
+                      n_coarse: int = 12,
+                      n_starts: int = 8,
+                      solver: LambertSolver = LambertSolver.IZZO) \
+        -> OptimalTransfer:
+    '''
+    Finds the minimum dv transfer from body1 to body2 departing within
+    t1_lim with a time of flight within tof_lim, without a full grid search.
+
+    A coarse n_coarse x n_coarse grid search seeds Nelder-Mead searches
+    from its n_starts best local minima; the best result is returned.
+
+    Returns None if no valid transfer was found.
+    '''
+    if body1.parent != body2.parent:
+        raise ValueError("body1 and body2 must have the same parent.")
+
+    r_pe_1 = parking_orbit_alt + body1.radius
+    r_pe_2 = capture_orbit_alt + body2.radius
+
+    coarse = interplanetary_transfer_dv(body1, body2, t1_lim, tof_lim,
+                                        parking_orbit_alt, capture_orbit_alt,
+                                        include_capture, n_coarse,
+                                        process_count=1, solver=solver)
+    n_evaluations = n_coarse ** 2
+
+    # Optimize in units of coarse grid cells
+    lower = np.array([t1_lim[0], tof_lim[0]])
+    upper = np.array([t1_lim[1], tof_lim[1]])
+    cell = (upper - lower) / n_coarse
+
+    def cost(x: np.ndarray) -> float:
+        nonlocal n_evaluations
+        t1, tof = lower + x * cell
+        if np.any(x < 0) or np.any(x > n_coarse):
+            return np.inf
+
+        n_evaluations += 1
+        excess_velocities = get_transfer_excess_velocities(
+            body1, body2, t1, t1 + tof, solver)
+        if excess_velocities is None:
+            return np.inf
+
+        v_inf_dep, v_inf_arr = excess_velocities
+        dv = ejection_capture_dv(body1, v_inf_dep, r_pe_1)
+        if include_capture:
+            dv += ejection_capture_dv(body2, v_inf_arr, r_pe_2)
+        return dv
+
+    seeds_i, seeds_j = _grid_local_minima(coarse.dv)
+
+    best_x, best_dv = None, np.inf
+    for i, j in zip(seeds_i[:n_starts], seeds_j[:n_starts]):
+        x, dv = _nelder_mead(cost, np.array([i, j], dtype=float),
+                             np.array([0.5, 0.5]))
+        if dv < best_dv:
+            best_x, best_dv = x, dv
+
+    if best_x is None:
+        return None
+
+    t1, tof = lower + best_x * cell
+    v_inf_dep, v_inf_arr = get_transfer_excess_velocities(
+        body1, body2, t1, t1 + tof, solver)
+
+    dv_ejection = ejection_capture_dv(body1, v_inf_dep, r_pe_1)
+    dv_capture = ejection_capture_dv(body2, v_inf_arr, r_pe_2) \
+        if include_capture else np.nan
+
+    return OptimalTransfer(body1, body2, t1, tof, dv_ejection, dv_capture,
+                           v_inf_dep, v_inf_arr, include_capture,
+                           n_evaluations)
@@ -14,7 +14,7 @@
 #define M_PI (3.14159265358979323846)
 #endif // M_PI
 
-TransferOrbit get_transfer_orbit(Body body1, Body body2, double t1, double t2)
+TransferOrbit get_transfer_orbit(Body body1, Body body2, double t1, double t2, enum LambertSolver solver)
 {
     // Calculates a transfer orbit from body1 to body2 at time t1 to arrive at body2 at time t2
     // Keplerian elements are given in terms of the common parent body at time t1
@@ -26,15 +26,24 @@ TransferOrbit get_transfer_orbit(Body body1, Body body2, double t1, double t2)
         return (TransferOrbit){.valid = false, .ke = {0}, .t1 = 0, .t2 = 0, .body1 = body1, .body2 = body2};
     }
 
-    Body parent = kerbol_system_bodies[body1.parent_id];
-
     // Calculate the state vectors at time t1 and t2
     StateVector b1t1 = get_rel_state_at_time(t1, body1.parent_id, body1.body_id);
     StateVector b2t2 = get_rel_state_at_time(t2, body2.parent_id, body2.body_id);
 
+    return get_transfer_orbit_from_states(body1, body2, b1t1, b2t2, solver);
+}
+
+TransferOrbit get_transfer_orbit_from_states(Body body1, Body body2, StateVector b1t1, StateVector b2t2, enum LambertSolver solver)
+{
+    // Bodies are assumed to share a common parent; states are wrt that parent
+    Body parent = kerbol_system_bodies[body1.parent_id];
+
+    double t1 = b1t1.time;
+    double t2 = b2t2.time;
+
     // Solve Lambert's problem to find the transfer orbit
     enum TrajectoryType type = PROGRADE;
-    LambertSolution sol = lambert(b1t1.position, b2t2.position, t2 - t1, parent.mu, type);
+    LambertSolution sol = solve_lambert(b1t1.position, b2t2.position, t2 - t1, parent.mu, type, solver);
 
     if (!sol.valid)
     {
@@ -52,34 +61,73 @@ TransferOrbit get_transfer_orbit(Body body1, Body body2, double t1, double t2)
     return (TransferOrbit){.valid = true, .ke = ke, .t1 = t1, .t2 = t2, .body1 = body1, .body2 = body2};
 }
 
-Vector3 excess_velocity_at_body(TransferOrbit transfer_orbit,
-                                enum ArrivalDepartureEnum arrival_or_departure)
+TransferExcessVelocities get_transfer_excess_velocities(Body body1, Body body2, double t1, double t2, enum LambertSolver solver)
 {
-    Body parent = kerbol_system_bodies[transfer_orbit.body1.parent_id];
+    // Ensure bodies have a common parent
+    if (body1.parent_id != body2.parent_id)
+    {
+        fprintf(stderr, "Error: Bodies do not have a common parent.\n");
+        return (TransferExcessVelocities){.departure = {{0}}, .arrival = {{0}}, .valid = false};
+    }
+
+    StateVector b1t1 = get_rel_state_at_time(t1, body1.parent_id, body1.body_id);
+    StateVector b2t2 = get_rel_state_at_time(t2, body2.parent_id, body2.body_id);
 
-    double ut;
+    return get_transfer_excess_velocities_from_states(body1, body2, b1t1, b2t2, solver, NULL);
+}
+
+TransferExcessVelocities get_transfer_excess_velocities_from_states(Body body1, Body body2, StateVector b1t1, StateVector b2t2,
+                                                                    enum LambertSolver solver, const LambertSolution *warm_start)
+{
+    // Lambert already gives the transfer velocity at both ends, so
+    // the excess velocities are just the differences wrt the bodies
+    Body parent = kerbol_system_bodies[body1.parent_id];
+
+    enum TrajectoryType type = PROGRADE;
+    double dt = b2t2.time - b1t1.time;
+    LambertSolution sol = (solver == LAMBERT_CURTIS && warm_start && warm_start->valid)
+                              ? lambert_warm_start(b1t1.position, b2t2.position, dt, parent.mu, type, warm_start->z)
+                              : solve_lambert(b1t1.position, b2t2.position, dt, parent.mu, type, solver);
+
+    if (!sol.valid)
+    {
+        return (TransferExcessVelocities){.departure = {{0}}, .arrival = {{0}}, .valid = false, .lambert = sol};
+    }
 
+    return (TransferExcessVelocities){.departure = vec_sub(sol.v1, b1t1.velocity),
+                                      .arrival = vec_sub(sol.v2, b2t2.velocity),
+                                      .valid = true,
+                                      .lambert = sol};
+}
+
+Vector3 excess_velocity_at_body(TransferOrbit transfer_orbit,
+                                enum ArrivalDepartureEnum arrival_or_departure)
+{
     StateVector body_state;
     if (arrival_or_departure == DEPARTURE)
     {
-        ut = transfer_orbit.t1;
-        body_state = get_rel_state_at_time(ut,
+        body_state = get_rel_state_at_time(transfer_orbit.t1,
                                            transfer_orbit.body1.parent_id,
                                            transfer_orbit.body1.body_id);
     }
     else
     {
-        ut = transfer_orbit.t2;
-        body_state = get_rel_state_at_time(ut,
+        body_state = get_rel_state_at_time(transfer_orbit.t2,
                                            transfer_orbit.body2.parent_id,
                                            transfer_orbit.body2.body_id);
     }
 
+    return excess_velocity_wrt_state(transfer_orbit, body_state);
+}
+
+Vector3 excess_velocity_wrt_state(TransferOrbit transfer_orbit, StateVector body_state)
+{
     // Calculate the excess velocity at a body given a transfer orbit
     // Excess velocity is the velocity of the transfer orbit relative to the body
+    Body parent = kerbol_system_bodies[transfer_orbit.body1.parent_id];
 
-    // Ensure that we are evaluating state at time ut
-    KeplerianElements orbit_ke = ke_orbit_prop(ut, transfer_orbit.ke, parent.mu);
+    // Ensure that we are evaluating state at the same time as the body
+    KeplerianElements orbit_ke = ke_orbit_prop(body_state.time, transfer_orbit.ke, parent.mu);
     StateVector transfer_state = state_vector_from_ke(orbit_ke, parent.mu);
 
     Vector3 excess_velocity = vec_sub(transfer_state.velocity, body_state.velocity);
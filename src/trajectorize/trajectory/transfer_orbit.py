@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from enum import IntEnum
+from typing import NamedTuple
 
 import numpy as np
 
@@ -15,6 +16,35 @@ class TrajectoryDirection(IntEnum):
     RETROGRADE = lib.RETROGRADE
 
 
+class LambertSolver(IntEnum):
+    '''
+    Algorithm used to solve Lambert's problem.
+
+    CURTIS: universal variable bisection/Newton (Curtis, algorithm 5.2)
+    IZZO: Householder iterations on Izzo's formulation; much faster
+    '''
+    CURTIS = lib.LAMBERT_CURTIS
+    IZZO = lib.LAMBERT_IZZO
+
+
+class LambertBranch(IntEnum):
+    '''
+    Branch of a multi-revolution Lambert solution.
+
+    For N >= 1 revolutions there are two transfers with the same time of
+    flight; LEFT has the smaller semi-major axis.
+    '''
+    LEFT = lib.LAMBERT_LEFT
+    RIGHT = lib.LAMBERT_RIGHT
+
+
+class LambertRevolutionSolution(NamedTuple):
+    revolutions: int
+    branch: LambertBranch
+    v1: np.ndarray
+    v2: np.ndarray
+
+
 class ArrivalDeparture(IntEnum):
     ARRIVAL = lib.ARRIVAL
     DEPARTURE = lib.DEPARTURE
@@ -51,15 +81,38 @@ class TransferOrbit:
         })[0]
 
 
-def get_transfer_orbit(body1: Body, body2: Body, t1: float, t2: float) \
+def get_transfer_orbit(body1: Body, body2: Body, t1: float, t2: float,
+                       solver: LambertSolver = LambertSolver.CURTIS) \
         -> TransferOrbit:
-    sol = lib.get_transfer_orbit(body1.c_data, body2.c_data, t1, t2)
+    sol = lib.get_transfer_orbit(body1.c_data, body2.c_data, t1, t2,
+                                 int(solver))
 
     if not sol.valid:
         return None
     return TransferOrbit.from_c_data(sol)
 
 
+def get_transfer_excess_velocities(
+        body1: Body, body2: Body, t1: float, t2: float,
+        solver: LambertSolver = LambertSolver.CURTIS) \
+        -> "tuple(np.ndarray, np.ndarray)":
+    '''
+    Gets the excess velocities at departure from body1 and arrival at body2
+    for a transfer from t1 to t2, straight from the Lambert solution.
+
+    Equivalent to get_excess_velocity on the result of get_transfer_orbit
+    at both ends, but without the round trip through Keplerian elements.
+
+    Returns None if no valid transfer exists.
+    '''
+    sol = lib.get_transfer_excess_velocities(body1.c_data, body2.c_data,
+                                             t1, t2, int(solver))
+
+    if not sol.valid:
+        return None
+    return np_array_from_vec3(sol.departure), np_array_from_vec3(sol.arrival)
+
+
 def get_excess_velocity(transfer_orbit: TransferOrbit,
                         arrival_or_departure: ArrivalDeparture) \
         -> np.ndarray:
@@ -91,16 +144,43 @@ def approximate_time_of_flight(body1: Body, body2: Body) -> float:
 
 def solve_lambert_problem(r1: np.ndarray, r2: np.ndarray,
                           dt: float, mu: float,
-                          direction: TrajectoryDirection) \
+                          direction: TrajectoryDirection,
+                          solver: LambertSolver = LambertSolver.CURTIS) \
         -> "tuple(np.ndarray, np.ndarray)":
     r1_c = vec3_from_np_array(r1)
     r2_c = vec3_from_np_array(r2)
-    sol = lib.lambert(r1_c, r2_c, dt, mu, int(direction))
+    sol = lib.solve_lambert(r1_c, r2_c, dt, mu, int(direction), int(solver))
     v1 = np_array_from_vec3(sol.v1)
     v2 = np_array_from_vec3(sol.v2)
     return v1, v2
 
 
+def solve_lambert_problem_multi_rev(r1: np.ndarray, r2: np.ndarray,
+                                    dt: float, mu: float,
+                                    direction: TrajectoryDirection,
+                                    max_revs: int) \
+        -> "list[LambertRevolutionSolution]":
+    '''
+    Solves Lambert's problem for up to max_revs complete revolutions
+    using Izzo's solver.
+
+    Returns every feasible solution: the single revolution transfer,
+    followed by the left and right branches of each feasible N.
+    Revolution counts too large for the time of flight are omitted.
+    '''
+    solutions = ffi.new("LambertSolution[]", 2 * max_revs + 1)
+    n_solutions = lib.lambert_izzo_multi_rev(vec3_from_np_array(r1),
+                                             vec3_from_np_array(r2),
+                                             dt, mu, int(direction),
+                                             max_revs, solutions)
+
+    return [LambertRevolutionSolution(sol.revolutions,
+                                      LambertBranch(sol.branch),
+                                      np_array_from_vec3(sol.v1),
+                                      np_array_from_vec3(sol.v2))
+            for sol in solutions[0:n_solutions] if sol.valid]
+
+
 def trajectory_ejection_dv(t1: float, t2: float,
                            body1: Body, body2: Body,
                            parking_orbit_alt: float = 100000):
@@ -124,13 +204,12 @@ def trajectory_ejection_dv(t1: float, t2: float,
     '''
     if body1.parent != body2.parent:
         raise ValueError("body1 and body2 must have the same parent.")
-    transfer_orbit = get_transfer_orbit(
-        body1, body2, t1, t2)
+    excess_velocities = get_transfer_excess_velocities(body1, body2, t1, t2)
 
-    if transfer_orbit is None:
+    if excess_velocities is None:
         return np.nan
 
-    excess_velocity = get_excess_velocity(body1, transfer_orbit, t1)
+    excess_velocity, _ = excess_velocities
     delta_v = ejection_capture_dv(
         body1, excess_velocity,
         body1.radius + parking_orbit_alt)
@@ -0,0 +1,127 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from trajectorize.ephemeris.kerbol_system import Body, state_vector_at_time
+from trajectorize.trajectory.transfer_orbit import approximate_time_of_flight
+
+# Iterations used to refine each predicted window against the ephemeris;
+# the circular orbit estimate is already close
+WINDOW_REFINE_ITER = 4
+
+# Default half width of the departure time band searched around each
+# window, as a fraction of the synodic period
+WINDOW_BAND_FRACTION = 0.15
+
+
+class TransferWindow(NamedTuple):
+    '''
+    A predicted transfer window: departing at t1, body2 leads body1 by the
+    phase angle of a Hohmann transfer, which takes tof.
+    '''
+    t1: float
+    tof: float
+
+
+def mean_motion(body: Body) -> float:
+    return np.sqrt(body.parent.mu / body.orbit.semi_major_axis ** 3)
+
+
+def synodic_period(body1: Body, body2: Body) -> float:
+    '''
+    Time between successive alignments of two bodies sharing a parent
+    '''
+    if body1.parent != body2.parent:
+        raise ValueError("body1 and body2 must have the same parent.")
+
+    rate = mean_motion(body2) - mean_motion(body1)
+    if rate == 0:
+        raise ValueError("body1 and body2 have the same orbital period.")
+    return 2 * np.pi / abs(rate)
+
+
+def phase_angle(body1: Body, body2: Body, t: float) -> float:
+    '''
+    Angle by which body2 leads body1 around their parent at time t,
+    in [0, 2 pi), measured in the direction of motion of body1.
+    '''
+    state1 = state_vector_at_time(t, body1.parent_id, body1.body_id)
+    state2 = state_vector_at_time(t, body2.parent_id, body2.body_id)
+
+    h = np.cross(state1.position, state1.velocity)
+    angle = np.arctan2(np.dot(np.cross(state1.position, state2.position), h)
+                       / np.linalg.norm(h),
+                       np.dot(state1.position, state2.position))
+    return angle % (2 * np.pi)
+
+
+def hohmann_phase_angle(body1: Body, body2: Body) -> float:
+    '''
+    Phase angle of body2 at departure from body1 for a Hohmann transfer,
+    so that body2 arrives at the opposite side of the parent.
+    '''
+    tof = approximate_time_of_flight(body1, body2)
+    return (np.pi - mean_motion(body2) * tof) % (2 * np.pi)
+
+
+def _wrap_angle(angle: float) -> float:
+    # Wraps an angle to [-pi, pi)
+    return (angle + np.pi) % (2 * np.pi) - np.pi
+
+
+def predict_windows(body1: Body, body2: Body,
+                    t_lim: "tuple(float, float)") -> "list[TransferWindow]":
+    '''
+    Predicts the transfer windows from body1 to body2 departing within
+    t_lim: the times at which the phase angle of body2 matches that of a
+    Hohmann transfer, once per synodic period.
+
+    Crossings are first placed assuming circular orbits, where the phase
+    angle changes at a constant rate, then refined against the ephemeris.
+    '''
+    period = synodic_period(body1, body2)
+    rate = mean_motion(body2) - mean_motion(body1)
+    target = hohmann_phase_angle(body1, body2)
+    tof = approximate_time_of_flight(body1, body2)
+
+    # First crossing at or after t_lim[0], for circular orbits
+    t_first = t_lim[0] + \
+        ((target - phase_angle(body1, body2, t_lim[0])) / rate) % period
+
+    windows = []
+    # Refinement can move crossings across the ends of t_lim, so
+    # candidates start one synodic period early
+    for t in np.arange(t_first - period, t_lim[1] + period, period):
+        # Secant iterations, starting from the circular orbit rate
+        slope, t_prev, error_prev = rate, None, None
+        for _ in range(WINDOW_REFINE_ITER):
+            error = _wrap_angle(phase_angle(body1, body2, t) - target)
+            if error == 0:
+                break
+            if t_prev is not None and error != error_prev:
+                slope = (error - error_prev) / (t - t_prev)
+            t_prev, error_prev = t, error
+            t -= error / slope
+
+        if t_lim[0] <= t <= t_lim[1]:
+            windows.append(TransferWindow(float(t), tof))
+
+    return windows
+
+
+def window_bands(body1: Body, body2: Body,
+                 t_lim: "tuple(float, float)",
+                 half_width: float = None) -> "list[tuple(float, float)]":
+    '''
+    Departure time bands around the predicted transfer windows within
+    t_lim, for use as TransferConstraints.t1_bands. half_width defaults to
+    WINDOW_BAND_FRACTION of the synodic period.
+    '''
+    if half_width is None:
+        half_width = WINDOW_BAND_FRACTION * synodic_period(body1, body2)
+
+    # Windows just outside t_lim can still have bands reaching into it
+    windows = predict_windows(body1, body2, (t_lim[0] - half_width,
+                                             t_lim[1] + half_width))
+    return [(max(window.t1 - half_width, t_lim[0]),
+             min(window.t1 + half_width, t_lim[1])) for window in windows]
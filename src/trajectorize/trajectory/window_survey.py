@@ -0,0 +1,157 @@
+from multiprocessing import cpu_count
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from trajectorize._c_extension import ffi, lib
+from trajectorize.ephemeris.kerbol_system import Body
+from trajectorize.trajectory.interplanetary_transfer import (
+    _grid_search_problem, _new_reduction)
+from trajectorize.trajectory.transfer_orbit import (LambertSolver,
+                                                    approximate_time_of_flight)
+from trajectorize.trajectory.transfer_windows import (WINDOW_BAND_FRACTION,
+                                                      synodic_period,
+                                                      window_bands)
+
+
+class SurveyWindow(NamedTuple):
+    '''
+    Cheapest transfer from body1 to body2 found within one transfer window;
+    dv includes capture if the survey does.
+    '''
+    body1: Body
+    body2: Body
+    t1: float
+    tof: float
+    dv: float
+
+
+class _WindowGrid(NamedTuple):
+    # Grid searched for one window of a survey
+    body1: Body
+    body2: Body
+    t1_min: float
+    t1_max: float
+    n_grid_t1: int
+    tof_lim: "tuple(float, float)"
+    n_grid_tof: int
+
+
+def body_pairs(parent: Body) -> "list[tuple(Body, Body)]":
+    '''
+    All ordered pairs of distinct bodies orbiting parent,
+    e.g. every pair of planets for Kerbol, or of moons for Jool.
+    '''
+    return [(body1, body2) for body1 in parent.children
+            for body2 in parent.children if body1 is not body2]
+
+
+def _window_grids(pairs: "list[tuple(Body, Body)]",
+                  t_lim: "tuple(float, float)",
+                  n_grid_t1: int, n_grid_tof: int,
+                  band_fraction: float) -> "list[_WindowGrid]":
+    # Grids for every window of pairs of bodies sharing a parent, all on the
+    # time lattice t_lim[0] + k * dt, with dt set by the narrowest band
+    dt = min(2 * band_fraction * synodic_period(body1, body2)
+             for body1, body2 in pairs) / n_grid_t1
+
+    grids = []
+    for body1, body2 in pairs:
+        # Times of flight between half and twice that of a Hohmann transfer,
+        # spaced by a multiple of dt
+        tof = approximate_time_of_flight(body1, body2)
+        stride = max(1, round(1.5 * tof / (n_grid_tof * dt)))
+        tof_min = round(tof / (2 * dt)) * dt
+        n_tof = int(np.ceil(1.5 * tof / (stride * dt)))
+        tof_lim = (tof_min, tof_min + n_tof * stride * dt)
+
+        half_width = band_fraction * synodic_period(body1, body2)
+        for t1_min, t1_max in window_bands(body1, body2, t_lim, half_width):
+            i_min = int(np.floor((t1_min - t_lim[0]) / dt))
+            n_t1 = max(1, int(np.ceil((t1_max - t_lim[0]) / dt)) - i_min)
+            grids.append(_WindowGrid(body1, body2,
+                                     t_lim[0] + i_min * dt,
+                                     t_lim[0] + (i_min + n_t1) * dt,
+                                     n_t1, tof_lim, n_tof))
+    return grids
+
+
+def _altitude(altitude: "float | Callable[[Body], float]",
+              body: Body) -> float:
+    return altitude(body) if callable(altitude) else altitude
+
+
+def survey_windows(pairs: "list[tuple(Body, Body)]",
+                   t_lim: "tuple(float, float)",
+                   parking_orbit_alt: "float | Callable[[Body], float]",
+                   capture_orbit_alt: "float | Callable[[Body], float]",
+                   include_capture: bool,
+                   n_grid_t1: int = 40,
+                   n_grid_tof: int = 40,
+                   band_fraction: float = WINDOW_BAND_FRACTION,
+                   thread_count: int = cpu_count(),
+                   solver: LambertSolver = LambertSolver.CURTIS,
+                   max_revs: int = 0) -> "list[SurveyWindow]":
+    '''
+    Finds the cheapest transfer in each transfer window departing within
+    t_lim, for every (body1, body2) in pairs, as a table ordered by pair
+    (as given) then departure time. Windows without a valid transfer are
+    left out.
+
+    Windows are predicted from phase angles (see window_bands, with half
+    width band_fraction of the synodic period), and each is grid searched
+    as in summarize_transfer_dv, with times of flight between half and
+    twice that of a Hohmann transfer. The altitudes can be given per body,
+    as functions of the body.
+
+    All windows of pairs sharing a parent are solved together in a single
+    call to the C extension on thread_count threads. They are placed on a
+    common time lattice, so that each body's ephemeris is computed once,
+    however many pairs and windows it is part of; the lattice spacing
+    splits the narrowest band into n_grid_t1 departure times, so wider
+    bands get proportionally more.
+    '''
+    if any(body1.parent != body2.parent for body1, body2 in pairs):
+        raise ValueError("Each pair of bodies must have the same parent.")
+
+    systems = {}
+    for body1, body2 in pairs:
+        systems.setdefault(body1.parent_id, []).append((body1, body2))
+
+    windows = {}
+    for system_pairs in systems.values():
+        grids = _window_grids(system_pairs, t_lim, n_grid_t1, n_grid_tof,
+                              band_fraction)
+        if not grids:
+            continue
+
+        problems = ffi.new("struct GridSearchProblem[]", len(grids))
+        reductions = ffi.new("struct GridSearchReduction[]", len(grids))
+        arrays = []
+        for p, grid in enumerate(grids):
+            problems[p] = _grid_search_problem(
+                grid.t1_min, grid.t1_max, grid.tof_lim, grid.body1,
+                grid.body2, _altitude(parking_orbit_alt, grid.body1),
+                _altitude(capture_orbit_alt, grid.body2), include_capture,
+                grid.n_grid_t1, grid.n_grid_tof, solver, max_revs)
+
+            grid_arrays, reduction = _new_reduction(grid.n_grid_t1,
+                                                    grid.n_grid_tof, 1)
+            reductions[p] = reduction[0]
+            arrays.append(grid_arrays)
+
+        # cffi releases the GIL for the duration of the call
+        lib.transfer_dv_reduce_batch(problems, reductions, len(grids),
+                                     thread_count)
+
+        for grid, (t1, tof, *_, best_dv, best_idx) in zip(grids, arrays):
+            if best_idx[0] < 0:
+                continue
+            i, j = divmod(int(best_idx[0]), grid.n_grid_tof)
+            windows.setdefault((grid.body1.body_id, grid.body2.body_id),
+                               []).append(SurveyWindow(
+                                   grid.body1, grid.body2, float(t1[i]),
+                                   float(tof[j]), float(best_dv[0])))
+
+    return [window for body1, body2 in pairs
+            for window in windows.get((body1.body_id, body2.body_id), [])]
@@ -8,6 +8,36 @@ from trajectorize.trajectory.interplanetary_transfer import \
 from trajectorize.visualizers.parula_colourmap import parula_map
 
 
+DISP_PERCENTILE_MAX = 90
+
+# Colour limits while no dv is known yet, e.g. when the first tiles of a
+# streamed search are all masked or outside of the departure bands
+DEFAULT_COLOUR_LIMITS = (0, 1)
+
+
+def _porkchop_dv(dv_info: InterplanetaryTransferResult,
+                 plot_type: str) -> "tuple(np.ndarray, str)":
+    # dv to plot, and its name
+    if plot_type == "ejection":
+        return dv_info.dv_ejection, "Ejection"
+    elif plot_type == "capture":
+        return dv_info.dv_capture, "Capture"
+    elif plot_type == "combined":
+        return dv_info.dv_ejection + dv_info.dv_capture, "Ejection + Capture"
+    raise ValueError("Unrecognized plot_type. Must be one of 'ejection', "
+                     "'capture', or 'combined'")
+
+
+def _colour_limits(dv: np.ndarray,
+                   default: "tuple(float, float)" = DEFAULT_COLOUR_LIMITS) \
+        -> "tuple(float, float)":
+    # default is kept if dv is all NaN
+    dvs = dv[np.isfinite(dv)]
+    if dvs.size == 0:
+        return default
+    return np.min(dvs), np.percentile(dvs, DISP_PERCENTILE_MAX)
+
+
 def transfer_porkchop_plot(ax: Axes, dv_info: InterplanetaryTransferResult,
                            plot_type: str = "ejection") -> "tuple(Artist)":
     '''
@@ -29,27 +59,12 @@ def transfer_porkchop_plot(ax: Axes, dv_info: InterplanetaryTransferResult,
         The artists that were plotted.
     '''
 
-    if plot_type == "ejection":
-        dv = dv_info.dv_ejection
-        dv_title = "Ejection"
-    elif plot_type == "capture":
-        dv = dv_info.dv_capture
-        dv_title = "Capture"
-    elif plot_type == "combined":
-        dv = dv_info.dv_ejection + dv_info.dv_capture
-        dv_title = "Ejection + Capture"
-    else:
-        raise ValueError("Unrecognized plot_type. Must be one of 'ejection', "
-                         "'capture', or 'combined'")
-
-    dvs = dv.ravel()
-
-    disp_percentile_max = 90
+    dv, dv_title = _porkchop_dv(dv_info, plot_type)
+    vmin, vmax = _colour_limits(dv)
 
     # plot the porkchop plot
     mesh = ax.pcolormesh(dv_info.t1, dv_info.tof, dv, cmap="jet",
-                         shading="gouraud", vmin=np.nanmin(dvs),
-                         vmax=np.nanpercentile(dvs, disp_percentile_max))
+                         shading="gouraud", vmin=vmin, vmax=vmax)
     ax.xaxis.set_major_formatter(UTFormatter())
     ax.yaxis.set_major_formatter(DeltaFormatter())
     for label in ax.get_xticklabels():
@@ -57,8 +72,7 @@ def transfer_porkchop_plot(ax: Axes, dv_info: InterplanetaryTransferResult,
         label.set_ha('right')
 
     # add colorbar
-    tick_marks = np.linspace(
-        np.nanmin(dvs), np.nanpercentile(dvs, disp_percentile_max), 10)
+    tick_marks = np.linspace(vmin, vmax, 10)
     colorbar = ax.figure.colorbar(mesh, ax=ax, fraction=0.05, extend='max',
                                   label=f"$\\Delta v$ cost (m/s)")
     colorbar.set_ticks(tick_marks)
@@ -71,3 +85,30 @@ def transfer_porkchop_plot(ax: Axes, dv_info: InterplanetaryTransferResult,
     ax.set_ylabel('Time of Flight')
 
     return (mesh, colorbar)
+
+
+def update_porkchop_plot(artists: "tuple(Artist)",
+                         dv_info: InterplanetaryTransferResult,
+                         plot_type: str = "ejection"):
+    '''
+    Updates a porkchop plot made by transfer_porkchop_plot with new values,
+    e.g. as tiles of a grid search from iter_transfer_dv come in.
+
+    Parameters
+    ----------
+    artists: tuple(Artist)
+        The artists returned by transfer_porkchop_plot.
+    dv_info: InterplanetaryTransferResult
+        The result of the interplanetary transfer calculation, on the
+        same grid as the one originally plotted.
+    plot_type: str
+        The type of porkchop plot, as originally plotted.
+    '''
+    mesh, colorbar = artists
+
+    dv, _ = _porkchop_dv(dv_info, plot_type)
+    vmin, vmax = _colour_limits(dv, mesh.get_clim())
+
+    mesh.set_array(dv)
+    mesh.set_clim(vmin, vmax)
+    colorbar.set_ticks(np.linspace(vmin, vmax, 10))
@@ -12,3 +12,27 @@ def test_kepler_equation_solver(E, e):
     E_c = lib.E_from_M(M, e)
 
     assert E_c == pytest.approx(E)
+
+
+@pytest.mark.parametrize("e", [0, 0.3, 0.9])
+def test_prepared_orbit(e):
+    mu = 3.5316e12
+    orbit = ffi.new("KeplerianElements *",
+                    {"semi_major_axis": 1e7,
+                     "eccentricity": e,
+                     "inclination": 0.2,
+                     "longitude_of_ascending_node": 0.5,
+                     "argument_of_periapsis": 1.0,
+                     "true_anomaly": 0.3,
+                     "epoch": 100})[0]
+    prepared = ffi.new("PreparedOrbit *", lib.prepare_orbit(orbit, mu))
+
+    for t in np.linspace(101, 1e6, 7):
+        expected = lib.state_vector_from_ke(lib.ke_orbit_prop(t, orbit, mu),
+                                            mu)
+        state = lib.prepared_orbit_state(prepared, t)
+
+        assert list(state.position.v) == \
+            pytest.approx(list(expected.position.v), rel=1e-9, abs=1e-3)
+        assert list(state.velocity.v) == \
+            pytest.approx(list(expected.velocity.v), rel=1e-9, abs=1e-6)
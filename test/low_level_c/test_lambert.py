@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from trajectorize._c_extension import ffi, lib
+from trajectorize.math_lib.math_interfaces import (np_array_from_vec3,
+                                                   vec3_from_np_array)
+
+# Curtis example 5.2
+R1 = vec3_from_np_array(np.array([5000, 10000, 2100]))
+R2 = vec3_from_np_array(np.array([-14600, 2500, 7000]))
+MU = 398600
+
+
+@pytest.mark.parametrize("z_guess", [1.5, 0, -5, 15])
+def test_warm_start_matches_cold_solve(z_guess):
+    cold = lib.lambert(R1, R2, 3600, MU, lib.PROGRADE)
+    warm = lib.lambert_warm_start(R1, R2, 3600, MU, lib.PROGRADE, z_guess)
+
+    assert warm.valid
+    assert warm.z == pytest.approx(cold.z, abs=1e-5)
+    assert np.allclose(np_array_from_vec3(warm.v1),
+                       np_array_from_vec3(cold.v1), atol=1e-4)
+    assert np.allclose(np_array_from_vec3(warm.v2),
+                       np_array_from_vec3(cold.v2), atol=1e-4)
+
+
+def test_warm_start_from_neighbour_is_cheap():
+    neighbour = lib.lambert(R1, R2, 3500, MU, lib.PROGRADE)
+    cold = lib.lambert(R1, R2, 3600, MU, lib.PROGRADE)
+    warm = lib.lambert_warm_start(R1, R2, 3600, MU, lib.PROGRADE,
+                                  neighbour.z)
+
+    assert warm.valid
+    assert warm.iterations < cold.iterations / 2
+
+
+@pytest.mark.parametrize("dt", [600, 3600, 20000])
+@pytest.mark.parametrize("direction", ["PROGRADE", "RETROGRADE"])
+def test_izzo_matches_curtis(dt, direction):
+    direction = getattr(lib, direction)
+    curtis = lib.lambert(R1, R2, dt, MU, direction)
+    izzo = lib.lambert_izzo(R1, R2, dt, MU, direction)
+
+    assert izzo.valid
+    assert izzo.z == pytest.approx(curtis.z, rel=1e-6)
+    assert np.allclose(np_array_from_vec3(izzo.v1),
+                       np_array_from_vec3(curtis.v1))
+    assert np.allclose(np_array_from_vec3(izzo.v2),
+                       np_array_from_vec3(curtis.v2))
+    assert izzo.iterations <= 5
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from trajectorize.ephemeris.chebyshev_ephemeris import ChebyshevEphemeris
+from trajectorize.ephemeris.kerbol_system import Body, body_states
+
+T_LIM = (1e6, 3e7)
+
+
+@pytest.mark.parametrize("tolerance", [1.0, 1000.0])
+def test_fit_accuracy(tolerance):
+    bodies = [Body.from_name(name)
+              for name in ("Kerbol", "Moho", "Kerbin", "Mun", "Eeloo")]
+    ephemeris = ChebyshevEphemeris.fit(bodies, T_LIM, tolerance)
+    times = np.random.default_rng(0).uniform(*T_LIM, 2000)
+
+    states = ephemeris.body_states(bodies, times)
+    expected = body_states(bodies, times)
+
+    assert states.shape == expected.shape
+    for b, body in enumerate(bodies):
+        error = states[b] - expected[b]
+        assert np.max(np.linalg.norm(error[:, :3], axis=1)) <= tolerance
+        if body.body_id != body.parent_id:
+            mean_motion = np.sqrt(body.parent.mu
+                                  / body.orbit.semi_major_axis ** 3)
+            assert np.max(np.linalg.norm(error[:, 3:], axis=1)) \
+                <= tolerance * mean_motion
+
+
+def test_save_and_load(tmp_path):
+    bodies = [Body.from_name("Kerbin"), Body.from_name("Duna")]
+    ephemeris = ChebyshevEphemeris.fit(bodies, T_LIM)
+    ephemeris.save(tmp_path / "ephemeris.npz")
+
+    loaded = ChebyshevEphemeris.load(tmp_path / "ephemeris.npz")
+    times = np.linspace(*T_LIM, 100)
+
+    assert loaded.t_lim == ephemeris.t_lim
+    assert np.array_equal(loaded.body_states(bodies, times),
+                          ephemeris.body_states(bodies, times))
+
+
+def test_out_of_range():
+    kerbin = Body.from_name("Kerbin")
+    ephemeris = ChebyshevEphemeris.fit([kerbin], T_LIM)
+
+    with pytest.raises(ValueError):
+        ephemeris.states(kerbin, [0])
+    with pytest.raises(ValueError):
+        ephemeris.states(Body.from_name("Duna"), [T_LIM[0]])
+
+
+def test_ephemeris_mode():
+    kerbin, mun, duna = (Body.from_name(name)
+                         for name in ("Kerbin", "Mun", "Duna"))
+    ephemeris = ChebyshevEphemeris.fit([kerbin, mun, duna], T_LIM)
+    times = np.linspace(*T_LIM, 500)
+
+    # Relative to any frame, composed from the tables
+    for frame in (None, kerbin, duna):
+        states = body_states([mun, duna], times, frame, ephemeris=ephemeris)
+        expected = body_states([mun, duna], times, frame)
+        assert np.max(np.linalg.norm(states[..., :3] - expected[..., :3],
+                                     axis=-1)) <= 3.0
+
+    with pytest.raises(ValueError):
+        body_states([mun], times, Body.from_name("Eve"), ephemeris=ephemeris)
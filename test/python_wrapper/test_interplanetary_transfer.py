@@ -0,0 +1,304 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from trajectorize.ephemeris.kerbol_system import Body
+from trajectorize.trajectory.interplanetary_transfer import (
+    TransferConstraints, TransferSearchPool, adaptive_transfer_dv,
+    aiter_transfer_dv, interplanetary_transfer_dv, iter_transfer_dv,
+    summarize_transfer_dv)
+from trajectorize.trajectory.transfer_orbit import (ArrivalDeparture,
+                                                    LambertSolver,
+                                                    approximate_time_of_flight,
+                                                    ejection_capture_dv,
+                                                    get_excess_velocity,
+                                                    get_transfer_orbit)
+
+KERBIN = Body.from_name("Kerbin")
+DUNA = Body.from_name("Duna")
+
+
+# Equal t1 and tof spacing shares arrival ephemerides between cells;
+# unequal spacing evaluates them per cell. Both must agree with a direct solve.
+@pytest.mark.parametrize("tof_lim", [(4e6, 6e6), (4e6, 7.3e6)])
+def test_grid_matches_single_transfer(tof_lim):
+    res = interplanetary_transfer_dv(KERBIN, DUNA, (4e6, 6e6), tof_lim,
+                                     100000, 60000, True,
+                                     n_grid=10, process_count=1)
+
+    for i, j in [(0, 0), (3, 7), (9, 9)]:
+        t1 = res.t1[i, j]
+        t2 = t1 + res.tof[i, j]
+        transfer_orbit = get_transfer_orbit(KERBIN, DUNA, t1, t2)
+
+        if transfer_orbit is None:
+            assert np.isnan(res.dv_ejection[i, j])
+            continue
+
+        v_inf_dep = get_excess_velocity(transfer_orbit,
+                                        ArrivalDeparture.DEPARTURE)
+        v_inf_arr = get_excess_velocity(transfer_orbit,
+                                        ArrivalDeparture.ARRIVAL)
+
+        assert res.dv_ejection[i, j] == pytest.approx(ejection_capture_dv(
+            KERBIN, v_inf_dep, KERBIN.radius + 100000))
+        assert res.dv_capture[i, j] == pytest.approx(ejection_capture_dv(
+            DUNA, v_inf_arr, DUNA.radius + 60000))
+        assert np.allclose(res.v_inf_departure[i, j], v_inf_dep)
+        assert np.allclose(res.v_inf_arrival[i, j], v_inf_arr)
+
+
+@pytest.mark.parametrize("backend", ["threads", "processes"])
+def test_grid_shape(backend):
+    # Grid sizes that don't divide evenly between workers
+    res = interplanetary_transfer_dv(KERBIN, DUNA, (0, 1e7), (4e6, 6e6),
+                                     100000, 60000, True,
+                                     n_grid=13, process_count=3,
+                                     backend=backend)
+
+    assert res.dv.shape == (13, 13)
+    assert np.allclose(res.t1[:, 0], np.arange(13) * 1e7 / 13)
+
+
+@pytest.mark.parametrize("include_capture", [False, True])
+def test_dv_at_other_altitudes(include_capture):
+    args = (KERBIN, DUNA, (0, 1e7), (4e6, 6e6))
+    res = interplanetary_transfer_dv(*args, 100000, 60000, include_capture,
+                                     n_grid=12, process_count=2)
+    expected = interplanetary_transfer_dv(*args, 500000, 20000, True,
+                                          n_grid=12, process_count=2)
+
+    moved = res.at_altitudes(500000, 20000, include_capture=True)
+
+    assert moved.include_capture
+    assert np.allclose(moved.dv_ejection, expected.dv_ejection,
+                       equal_nan=True)
+    assert np.allclose(moved.dv_capture, expected.dv_capture,
+                       equal_nan=True)
+    assert np.all(np.isnan(res.at_altitudes(500000, 20000,
+                                            include_capture=False)
+                           .dv_capture))
+
+
+def test_grid_axes_are_broadcast():
+    res = interplanetary_transfer_dv(KERBIN, DUNA, (0, 1e7), (4e6, 6e6),
+                                     100000, 60000, True,
+                                     n_grid=12, process_count=2)
+
+    assert res.t1_axis.shape == res.tof_axis.shape == (12,)
+    assert res.t1.strides[1] == 0 and res.tof.strides[0] == 0
+    t1, tof = np.meshgrid(res.t1_axis, res.tof_axis, indexing="ij")
+    assert np.array_equal(res.t1, t1) and np.array_equal(res.tof, tof)
+
+
+@pytest.mark.parametrize("backend", ["threads", "processes"])
+def test_single_precision_grid(backend):
+    args = (KERBIN, DUNA, (0, 1e7), (4e6, 6e6), 100000, 60000, True)
+    double = interplanetary_transfer_dv(*args, n_grid=12, process_count=2)
+    single = interplanetary_transfer_dv(*args, n_grid=12, process_count=2,
+                                        backend=backend, dtype=np.float32)
+
+    assert single.dv.dtype == single.v_inf_departure.dtype == np.float32
+    assert np.allclose(single.dv, double.dv, rtol=1e-6, equal_nan=True)
+    assert np.allclose(single.v_inf_arrival, double.v_inf_arrival,
+                       rtol=1e-6, equal_nan=True)
+    assert np.array_equal(single.branch, double.branch)
+
+
+@pytest.mark.parametrize("backend", ["threads", "processes", "pool"])
+def test_masked_cells_are_skipped(backend):
+    args = (KERBIN, DUNA, (0, 1e7), (2e6, 8e6), 100000, 60000, True)
+    full = interplanetary_transfer_dv(*args, n_grid=16, process_count=2)
+
+    hohmann = approximate_time_of_flight(KERBIN, DUNA)
+    mask = np.ones((16, 16), dtype=bool)
+    mask[3] = False
+    constraints = TransferConstraints(
+        mask=mask, tof_bounds=lambda t1: (0.8 * hohmann, np.inf),
+        arrival_deadline=1.4e7)
+    if backend == "pool":
+        # Each tile is sent its own rows of the mask, both for whole grids
+        # and streamed ones
+        with TransferSearchPool(2) as pool:
+            results = [interplanetary_transfer_dv(
+                *args, n_grid=16, process_count=2, pool=pool,
+                constraints=constraints)]
+            for tile in iter_transfer_dv(*args, n_grid=16, process_count=2,
+                                         pool=pool, constraints=constraints):
+                pass
+            results.append(tile.result)
+    else:
+        results = [interplanetary_transfer_dv(*args, n_grid=16,
+                                              process_count=2,
+                                              backend=backend,
+                                              constraints=constraints)]
+
+    solved = mask & (full.tof >= 0.8 * hohmann) \
+        & (full.t1 + full.tof <= 1.4e7)
+    assert 0 < np.count_nonzero(solved) < 0.5 * 16 ** 2
+    for res in results:
+        assert np.all(np.isnan(res.dv[~solved]))
+        assert np.all(np.isnan(res.v_inf_departure[~solved]))
+        assert np.allclose(res.dv[solved], full.dv[solved], equal_nan=True)
+
+
+@pytest.mark.parametrize("max_revs", [0, 2])
+def test_excess_velocity_limits(max_revs):
+    args = (KERBIN, DUNA, (0, 1e7), (4e6, 2e7), 100000, 60000, True)
+    full = interplanetary_transfer_dv(*args, n_grid=12, process_count=2,
+                                      max_revs=max_revs)
+
+    c3 = np.sum(full.v_inf_departure ** 2, -1)
+    v_inf_arrival = np.linalg.norm(full.v_inf_arrival, axis=-1)
+    max_c3, max_v_inf_arrival = np.nanmedian(c3), np.nanmedian(v_inf_arrival)
+
+    res = interplanetary_transfer_dv(
+        *args, n_grid=12, process_count=2, max_revs=max_revs,
+        constraints=TransferConstraints(max_c3=max_c3,
+                                        max_v_inf_arrival=max_v_inf_arrival))
+
+    valid = ~np.isnan(res.dv)
+    assert np.any(valid)
+    assert np.all(np.sum(res.v_inf_departure[valid] ** 2, -1) <= max_c3)
+    assert np.all(np.linalg.norm(res.v_inf_arrival[valid], axis=-1)
+                  <= max_v_inf_arrival)
+
+    # Cells whose cheapest transfer was within limits are unchanged
+    kept = (c3 <= max_c3) & (v_inf_arrival <= max_v_inf_arrival)
+    assert np.allclose(res.dv[kept], full.dv[kept])
+    assert np.all(res.dv[valid] >= full.dv[valid] - 1e-9)
+
+
+def test_multi_rev_grid_never_worse():
+    args = (KERBIN, DUNA, (4e6, 6e6), (1e7, 3e7), 100000, 60000, True)
+    single = interplanetary_transfer_dv(*args, n_grid=10, process_count=1,
+                                        solver=LambertSolver.IZZO)
+    multi = interplanetary_transfer_dv(*args, n_grid=10, process_count=1,
+                                       max_revs=2)
+
+    assert np.all(single.branch == 0)
+    assert np.all(multi.branch <= 4)
+    assert np.any(multi.revolutions > 0)
+
+    valid = ~np.isnan(single.dv)
+    assert np.all(multi.dv[valid] <= single.dv[valid] + 1e-6)
+
+
+def test_threads_match_processes():
+    args = (KERBIN, DUNA, (0, 1e7), (4e6, 6e6), 100000, 60000, True)
+    threads = interplanetary_transfer_dv(*args, n_grid=12, process_count=4,
+                                         backend="threads")
+    processes = interplanetary_transfer_dv(*args, n_grid=12, process_count=4,
+                                           backend="processes")
+
+    for a, b in zip(threads[2:], processes[2:]):
+        assert np.allclose(a, b, equal_nan=True)
+
+
+@pytest.mark.parametrize("executor", [None, ThreadPoolExecutor(2)])
+def test_transfer_search_pool_reuse(executor):
+    args = (KERBIN, DUNA, (0, 1e7), (4e6, 6e6), 100000, 60000, True)
+    expected = interplanetary_transfer_dv(*args, n_grid=12, process_count=4)
+
+    with TransferSearchPool(2, executor) as pool:
+        results = [interplanetary_transfer_dv(*args, n_grid=12,
+                                              process_count=4, pool=pool)
+                   for _ in range(2)]
+
+    # Results outlive the pool, along with the memory they view
+    for res in results:
+        for a, b in zip(res[2:], expected[2:]):
+            assert np.allclose(a, b, equal_nan=True)
+
+
+def test_adaptive_finds_dense_minimum():
+    args = (KERBIN, DUNA, (0, 2e7), (2e6, 1.2e7), 100000, 60000, True)
+    adaptive = adaptive_transfer_dv(*args, n_coarse=16, max_depth=3)
+    dense = interplanetary_transfer_dv(*args, n_grid=128)
+
+    assert np.nanmin(adaptive.dv) == pytest.approx(np.nanmin(dense.dv))
+    assert adaptive.n_evaluations < 0.1 * 128 ** 2
+
+    # Coarse grid points are shared by every level
+    coarse = interplanetary_transfer_dv(*args, n_grid=16)
+    raster = adaptive.rasterize(16)
+    assert np.allclose(raster.t1, coarse.t1)
+    assert np.allclose(raster.dv, coarse.dv, equal_nan=True)
+
+
+@pytest.mark.parametrize("use_pool", [False, True])
+def test_streamed_tiles_assemble_grid(use_pool):
+    args = (KERBIN, DUNA, (0, 1e7), (4e6, 6e6), 100000, 60000, True)
+    expected = interplanetary_transfer_dv(*args, n_grid=20, process_count=2)
+
+    with TransferSearchPool(2) as pool:
+        tiles = list(iter_transfer_dv(*args, n_grid=20, process_count=2,
+                                      pool=pool if use_pool else None))
+
+    rows = sorted((tile.row_start, tile.row_stop) for tile in tiles)
+    assert rows[0][0] == 0 and rows[-1][1] == 20
+    assert all(a[1] == b[0] for a, b in zip(rows[:-1], rows[1:]))
+
+    res = tiles[-1].result
+    for a, b in zip(res[2:], expected[2:]):
+        assert np.allclose(a, b, equal_nan=True)
+
+
+def test_streaming_stops_early():
+    args = (KERBIN, DUNA, (0, 1e7), (4e6, 6e6), 100000, 60000, True)
+    stream = iter_transfer_dv(*args, n_grid=64, process_count=2)
+    tile = next(stream)
+    stream.close()
+
+    # Grid coordinates are available before rows are solved
+    assert not np.any(np.isnan(tile.result.t1))
+    rows = slice(tile.row_start, tile.row_stop)
+    assert np.any(~np.isnan(tile.result.dv_ejection[rows]))
+
+
+def test_async_streaming():
+    args = (KERBIN, DUNA, (0, 1e7), (4e6, 6e6), 100000, 60000, True)
+    expected = interplanetary_transfer_dv(*args, n_grid=20, process_count=2)
+
+    async def collect():
+        return [tile async for tile in aiter_transfer_dv(
+            *args, n_grid=20, process_count=2)]
+
+    tiles = asyncio.run(collect())
+    assert sum(tile.row_stop - tile.row_start for tile in tiles) == 20
+    assert np.allclose(tiles[-1].result.dv, expected.dv, equal_nan=True)
+
+
+@pytest.mark.parametrize("use_pool", [False, True])
+@pytest.mark.parametrize("include_capture", [False, True])
+def test_summary_matches_dense_grid(use_pool, include_capture):
+    args = (KERBIN, DUNA, (0, 2e7), (2e6, 1.2e7), 100000, 60000,
+            include_capture)
+    dense = interplanetary_transfer_dv(*args, n_grid=30, process_count=2)
+
+    with TransferSearchPool(2, ThreadPoolExecutor(2)) as pool:
+        summary = summarize_transfer_dv(*args, n_grid_t1=30, n_grid_tof=30,
+                                        top_k=5, process_count=3,
+                                        pool=pool if use_pool else None)
+
+    dv = np.where(np.isnan(dense.dv), np.inf, dense.dv)
+    assert np.allclose(summary.t1, dense.t1_axis)
+    assert np.allclose(summary.row_min_dv, np.nanmin(dense.dv, 1),
+                       equal_nan=True)
+    assert np.allclose(summary.col_min_dv, np.nanmin(dense.dv, 0),
+                       equal_nan=True)
+
+    best = np.sort(dv, None)[:5]
+    assert np.allclose(summary.best_dv, best)
+    assert np.allclose(dense.dv[summary.best_i, summary.best_j], best)
+    assert summary.best == (dense.t1[summary.best_i[0], summary.best_j[0]],
+                            dense.tof[summary.best_i[0], summary.best_j[0]],
+                            summary.best_dv[0])
+
+    # No transfer on the front is beaten by one that's at least as fast
+    _, front_tof, front_dv = summary.pareto_front()
+    assert np.all(np.diff(front_tof) > 0) and np.all(np.diff(front_dv) < 0)
+    for tof, front in zip(front_tof, front_dv):
+        assert front == pytest.approx(np.min(dv[dense.tof <= tof]))
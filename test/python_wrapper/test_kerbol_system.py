@@ -1,6 +1,11 @@
+import dataclasses
+import pickle
+
+import numpy as np
 import pytest
 
-from trajectorize.ephemeris.kerbol_system import (Body, BodyEnum,
+from trajectorize.ephemeris.kerbol_system import (Body, BodyEnum, body_states,
+                                                  pairwise_states,
                                                   state_vector_at_time)
 
 # Taken from https://raw.githubusercontent.com/qsantos/spyce/master/spyce/kerbol.json
@@ -270,3 +275,82 @@ def test_ephemeris_1():
                                                 BodyEnum.KERBIN)
 
     assert initial_kerbin_State.time == 0
+
+
+def test_body_states():
+    bodies = [Body.from_name("Kerbin"), Body.from_name("Mun"),
+              Body.from_name("Laythe")]
+    times = np.linspace(0, 1e7, 7)
+
+    states = body_states(bodies, times)
+
+    assert states.shape == (3, 7, 6)
+    assert states.flags.c_contiguous
+    for b, body in enumerate(bodies):
+        for i, t in enumerate(times):
+            state = state_vector_at_time(t, body.parent_id, body.body_id)
+            assert np.array_equal(states[b, i, :3], state.position)
+            assert np.array_equal(states[b, i, 3:], state.velocity)
+
+    kerbin = Body.from_name("Kerbin")
+    assert np.all(body_states([kerbin], times, kerbin) == 0)
+
+
+def test_frame_chains():
+    kerbol, kerbin, mun, minmus, jool, laythe = (
+        Body.from_name(name) for name in
+        ["Kerbol", "Kerbin", "Mun", "Minmus", "Jool", "Laythe"])
+    times = np.linspace(0, 1e7, 7)
+
+    def states(frame, body):
+        return body_states([body], times, frame)[0]
+
+    # Kerbol to a moon goes through its planet
+    assert np.all(np.isfinite(states(kerbol, mun)))
+    assert np.allclose(states(kerbol, mun),
+                       states(kerbol, kerbin) + states(kerbin, mun))
+
+    # Moons of other planets, and siblings, through their common ancestor
+    assert np.allclose(states(kerbin, laythe),
+                       states(jool, laythe) + states(kerbol, jool)
+                       - states(kerbol, kerbin), rtol=1e-12)
+    assert np.allclose(states(minmus, mun),
+                       states(kerbin, mun) - states(kerbin, minmus),
+                       rtol=1e-12)
+    assert np.allclose(states(laythe, mun), -states(mun, laythe), rtol=1e-12)
+
+    state = state_vector_at_time(1e6, BodyEnum.LAYTHE, BodyEnum.KERBIN)
+    assert np.allclose(state.position,
+                       -body_states([laythe], [1e6], kerbin)[0, 0, :3])
+
+
+def test_pairwise_states():
+    bodies = [Body.from_name(name)
+              for name in ["Kerbol", "Kerbin", "Mun", "Duna", "Laythe"]]
+    times = np.linspace(0, 1e7, 5)
+
+    states = pairwise_states(bodies, times)
+
+    assert states.shape == (5, 5, 5, 6)
+    for i, frame in enumerate(bodies):
+        assert np.array_equal(states[i], body_states(bodies, times, frame))
+        assert np.all(states[i, i] == 0)
+
+
+def test_body_registry():
+    kerbin = Body.from_name("Kerbin")
+
+    assert Body.from_name("KERBIN") is kerbin
+    assert Body.from_identifier(BodyEnum.KERBIN) is kerbin
+    assert Body.from_identifier(4) is kerbin
+    assert Body.from_name("Mun").parent is kerbin
+    assert Body.all_bodies()[BodyEnum.KERBIN] is kerbin
+    assert [body.name for body in kerbin.children] == ["Mun", "Minmus"]
+    assert Body.from_name("Kerbol").children == tuple(Body.planets())
+    assert Body.from_name("Mun").children == ()
+    assert pickle.loads(pickle.dumps(kerbin)) is kerbin
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        kerbin.mass = 0
+    with pytest.raises(ValueError):
+        Body.from_identifier(len(BodyEnum))
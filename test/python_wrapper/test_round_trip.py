@@ -0,0 +1,57 @@
+import numpy as np
+
+from trajectorize.ephemeris.kerbol_system import Body
+from trajectorize.trajectory.interplanetary_transfer import (
+    interplanetary_transfer_dv, summarize_transfer_dv)
+from trajectorize.trajectory.round_trip import _window_argmin, plan_round_trip
+
+KERBIN = Body.from_name("Kerbin")
+DUNA = Body.from_name("Duna")
+
+
+def test_window_argmin():
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 20, 100).astype(float)
+    values[rng.random(100) < 0.2] = np.nan
+    start = rng.integers(0, 101, 500)
+    stop = rng.integers(0, 101, 500)
+
+    argmin = _window_argmin(values, start, stop)
+
+    for a, b, m in zip(start, stop, argmin):
+        window = np.where(np.isnan(values[a:b]), np.inf, values[a:b])
+        if len(window) == 0 or np.all(np.isinf(window)):
+            assert m == -1
+        else:
+            assert m == a + np.argmin(window)
+
+
+def test_round_trip_matches_brute_force():
+    t1_lim, tof_lim, stay_lim = (0, 2e7), (4e6, 8e6), (2e6, 6e6)
+    missions = plan_round_trip(KERBIN, DUNA, t1_lim, tof_lim, stay_lim,
+                               100000, 60000, True, n_grid=20, top_k=5)
+
+    # Same legs as the planner solves, scanning every pair of outbound
+    # cell and return departure
+    outbound = interplanetary_transfer_dv(KERBIN, DUNA, t1_lim, tof_lim,
+                                          100000, 60000, True, n_grid=20)
+    t3_min = t1_lim[0] + tof_lim[0] + stay_lim[0]
+    inbound = summarize_transfer_dv(DUNA, KERBIN, (t3_min, t3_min + 28e6),
+                                    tof_lim, 60000, 100000, True,
+                                    n_grid_t1=28, n_grid_tof=20, top_k=0)
+
+    brute = []
+    for i, j in np.ndindex(outbound.dv.shape):
+        stay = inbound.t1 - outbound.t1[i, j] - outbound.tof[i, j]
+        allowed = (stay >= stay_lim[0]) & (stay <= stay_lim[1])
+        if np.any(allowed & np.isfinite(inbound.row_min_dv)):
+            brute.append(outbound.dv[i, j]
+                         + np.nanmin(inbound.row_min_dv[allowed]))
+    brute = np.sort(brute)[:5]
+
+    assert len(missions) == 5
+    assert np.allclose([mission.dv for mission in missions], brute)
+    for mission in missions:
+        assert stay_lim[0] <= mission.stay <= stay_lim[1]
+        assert mission.t1 in outbound.t1_axis
+        assert mission.t3 in inbound.t1
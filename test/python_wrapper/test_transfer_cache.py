@@ -0,0 +1,78 @@
+import numpy as np
+
+from trajectorize.ephemeris.kerbol_system import Body
+from trajectorize.trajectory.interplanetary_transfer import \
+    TransferConstraints
+from trajectorize.trajectory.transfer_cache import TransferCache
+from trajectorize.trajectory.transfer_orbit import LambertSolver
+
+KERBIN = Body.from_name("Kerbin")
+DUNA = Body.from_name("Duna")
+EVE = Body.from_name("Eve")
+
+ARGS = ((0, 1e7), (4e6, 6e6), 100000, 60000, True)
+
+
+def test_cache_hit_is_memory_mapped(tmp_path):
+    cache = TransferCache(tmp_path)
+    computed = cache.interplanetary_transfer_dv(KERBIN, DUNA, *ARGS,
+                                                n_grid=12, process_count=2)
+    cached = cache.interplanetary_transfer_dv(KERBIN, DUNA, *ARGS,
+                                              n_grid=12, process_count=2)
+
+    assert isinstance(cached.dv_ejection, np.memmap)
+    assert cached.body1 == KERBIN and cached.body2 == DUNA
+    for a, b in zip(computed[2:], cached[2:]):
+        assert np.array_equal(a, b, equal_nan=True)
+
+
+def test_cache_key_depends_on_problem():
+    key = TransferCache.key(KERBIN, DUNA, *ARGS, 12)
+
+    assert key == TransferCache.key(KERBIN, DUNA, *ARGS, 12)
+    assert key != TransferCache.key(KERBIN, EVE, *ARGS, 12)
+    assert key != TransferCache.key(KERBIN, DUNA, *ARGS, 13)
+    assert key != TransferCache.key(KERBIN, DUNA, *ARGS, 12,
+                                    LambertSolver.IZZO)
+    assert key != TransferCache.key(KERBIN, DUNA, *ARGS, 12,
+                                    dtype=np.float32)
+
+
+def test_cache_key_depends_on_constraints(tmp_path):
+    def key(**constraints):
+        return TransferCache.key(KERBIN, DUNA, *ARGS, 12,
+                                 constraints=TransferConstraints(
+                                     **constraints))
+
+    unconstrained = TransferCache.key(KERBIN, DUNA, *ARGS, 12)
+    assert key() == unconstrained
+    assert key(arrival_deadline=7e6) != unconstrained
+    assert key(arrival_deadline=7e6) != key(arrival_deadline=8e6)
+    assert key(max_c3=1e7) != unconstrained
+    assert key(tof_bounds=lambda t1: (5.1e6, 6e6)) == \
+        key(tof_bounds=lambda t1: (5.05e6, 6e6))
+
+    # A constrained result is not returned for an unconstrained call
+    cache = TransferCache(tmp_path)
+    constrained = cache.interplanetary_transfer_dv(
+        KERBIN, DUNA, *ARGS, n_grid=12, process_count=2,
+        constraints=TransferConstraints(arrival_deadline=7e6))
+    full = cache.interplanetary_transfer_dv(KERBIN, DUNA, *ARGS, n_grid=12,
+                                            process_count=2)
+    assert np.count_nonzero(np.isnan(constrained.dv)) > \
+        np.count_nonzero(np.isnan(full.dv))
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    # Room for two 12x12 results, but not three
+    cache = TransferCache(tmp_path, max_bytes=2 * 12 ** 2 * 88 + 3000)
+
+    cache.interplanetary_transfer_dv(KERBIN, DUNA, *ARGS, n_grid=12)
+    cache.interplanetary_transfer_dv(KERBIN, EVE, *ARGS, n_grid=12)
+    # Touch Kerbin-Duna, so Kerbin-Eve is the oldest
+    cache.interplanetary_transfer_dv(KERBIN, DUNA, *ARGS, n_grid=12)
+    cache.interplanetary_transfer_dv(DUNA, EVE, *ARGS, n_grid=12)
+
+    assert cache.get(TransferCache.key(KERBIN, DUNA, *ARGS, 12)) is not None
+    assert cache.get(TransferCache.key(KERBIN, EVE, *ARGS, 12)) is None
+    assert cache.get(TransferCache.key(DUNA, EVE, *ARGS, 12)) is not None
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from trajectorize.ephemeris.kerbol_system import Body
+from trajectorize.trajectory.interplanetary_transfer import \
+    interplanetary_transfer_dv
+from trajectorize.trajectory.transfer_optimizer import optimize_transfer
+from trajectorize.trajectory.transfer_orbit import (
+    get_transfer_excess_velocities)
+
+KERBIN = Body.from_name("Kerbin")
+DUNA = Body.from_name("Duna")
+
+
+def test_optimizer_beats_dense_grid():
+    args = (KERBIN, DUNA, (0, 2e7), (2e6, 1.2e7), 100000, 60000, True)
+    optimum = optimize_transfer(*args)
+    dense = interplanetary_transfer_dv(*args, n_grid=150)
+
+    assert optimum.dv <= np.nanmin(dense.dv) + 1e-6
+    assert optimum.n_evaluations < 0.05 * 150 ** 2
+
+    assert 0 <= optimum.t1 <= 2e7
+    assert 2e6 <= optimum.tof <= 1.2e7
+
+    v_inf_dep, v_inf_arr = get_transfer_excess_velocities(
+        KERBIN, DUNA, optimum.t1, optimum.t1 + optimum.tof)
+    assert np.allclose(optimum.v_inf_departure, v_inf_dep)
+    assert np.allclose(optimum.v_inf_arrival, v_inf_arr)
+
+
+def test_optimizer_ejection_only():
+    optimum = optimize_transfer(KERBIN, DUNA, (0, 2e7), (2e6, 1.2e7),
+                                100000, 60000, False)
+
+    assert np.isnan(optimum.dv_capture)
+    assert optimum.dv == pytest.approx(optimum.dv_ejection)
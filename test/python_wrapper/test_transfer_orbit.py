@@ -1,7 +1,12 @@
 import numpy as np
+import pytest
 
-from trajectorize.trajectory.transfer_orbit import (TrajectoryDirection,
-                                                    solve_lambert_problem)
+from trajectorize.ephemeris.kerbol_system import Body
+from trajectorize.orbit.universal_kepler import UniversalKeplerOrbit
+from trajectorize.trajectory.transfer_orbit import (
+    ArrivalDeparture, LambertBranch, LambertSolver, TrajectoryDirection,
+    get_excess_velocity, get_transfer_excess_velocities, get_transfer_orbit,
+    solve_lambert_problem, solve_lambert_problem_multi_rev)
 
 
 def test_orbit_determination():
@@ -18,3 +23,61 @@ def test_orbit_determination():
     assert np.allclose(v1, np.array([-5.99249, 1.92536, 3.24564]), atol=1e-3)
     assert np.allclose(v2, np.array([-3.31246, -4.19662, -0.385288]),
                        atol=1e-3)
+
+
+def test_orbit_determination_izzo():
+    r1 = np.array([5000, 10000, 2100])
+    r2 = np.array([-14600, 2500, 7000])
+
+    v1, v2 = solve_lambert_problem(r1, r2, 3600, 398600,
+                                   TrajectoryDirection.PROGRADE,
+                                   LambertSolver.IZZO)
+
+    assert np.allclose(v1, np.array([-5.99249, 1.92536, 3.24564]), atol=1e-3)
+    assert np.allclose(v2, np.array([-3.31246, -4.19662, -0.385288]),
+                       atol=1e-3)
+
+
+def test_excess_velocities_match_transfer_orbit():
+    kerbin = Body.from_name("Kerbin")
+    duna = Body.from_name("Duna")
+    t1 = 5091552
+    t2 = 10679760
+
+    transfer_orbit = get_transfer_orbit(kerbin, duna, t1, t2)
+    v_inf_dep, v_inf_arr = get_transfer_excess_velocities(kerbin, duna,
+                                                          t1, t2)
+
+    assert np.allclose(v_inf_dep, get_excess_velocity(
+        transfer_orbit, ArrivalDeparture.DEPARTURE), atol=1e-3)
+    assert np.allclose(v_inf_arr, get_excess_velocity(
+        transfer_orbit, ArrivalDeparture.ARRIVAL), atol=1e-3)
+
+
+@pytest.mark.parametrize("dt", [36000, 90000])
+def test_multi_rev_solutions_reach_target(dt):
+    r1 = np.array([5000, 10000, 2100])
+    r2 = np.array([-14600, 2500, 7000])
+    mu = 398600
+
+    solutions = solve_lambert_problem_multi_rev(
+        r1, r2, dt, mu, TrajectoryDirection.PROGRADE, 3)
+
+    # Single revolution solution is unchanged
+    v1, v2 = solve_lambert_problem(r1, r2, dt, mu,
+                                   TrajectoryDirection.PROGRADE)
+    assert solutions[0].revolutions == 0
+    assert np.allclose(solutions[0].v1, v1)
+
+    assert len(solutions) > 1
+    for sol in solutions:
+        orb = UniversalKeplerOrbit(r1, sol.v1, 0, mu).propagate(dt)
+        assert np.allclose(orb.position, r2, rtol=1e-6, atol=1e-3)
+        assert np.allclose(orb.velocity, sol.v2, rtol=1e-6, atol=1e-6)
+
+    # Both branches of each N are distinct transfers
+    for n in {sol.revolutions for sol in solutions[1:]}:
+        left, right = [sol for sol in solutions if sol.revolutions == n]
+        assert left.branch == LambertBranch.LEFT
+        assert right.branch == LambertBranch.RIGHT
+        assert not np.allclose(left.v1, right.v1)
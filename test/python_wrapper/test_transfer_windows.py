@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from trajectorize.ephemeris.kerbol_system import Body
+from trajectorize.trajectory.interplanetary_transfer import (
+    TransferConstraints, interplanetary_transfer_dv)
+from trajectorize.trajectory.transfer_orbit import approximate_time_of_flight
+from trajectorize.trajectory.transfer_windows import (hohmann_phase_angle,
+                                                      phase_angle,
+                                                      predict_windows,
+                                                      synodic_period,
+                                                      window_bands)
+
+KERBIN = Body.from_name("Kerbin")
+DUNA = Body.from_name("Duna")
+
+
+def test_windows_match_hohmann_phase_angle():
+    period = synodic_period(KERBIN, DUNA)
+    windows = predict_windows(KERBIN, DUNA, (0, 4 * period))
+
+    assert len(windows) == 4
+    assert np.allclose(np.diff([window.t1 for window in windows]), period,
+                       rtol=0.05)
+    for window in windows:
+        assert phase_angle(KERBIN, DUNA, window.t1) == \
+            pytest.approx(hohmann_phase_angle(KERBIN, DUNA), abs=1e-6)
+
+
+@pytest.mark.parametrize("body1, body2", [("Kerbin", "Duna"),
+                                          ("Kerbin", "Eve"),
+                                          ("Kerbin", "Moho"),
+                                          ("Mun", "Minmus")])
+def test_windows_contain_best_transfer(body1, body2):
+    body1, body2 = Body.from_name(body1), Body.from_name(body2)
+    t1_lim = (0, 2 * synodic_period(body1, body2))
+    tof = approximate_time_of_flight(body1, body2)
+
+    res = interplanetary_transfer_dv(body1, body2, t1_lim, (tof / 2, 2 * tof),
+                                     100000, 0, False, n_grid=60)
+    best_t1 = res.t1.flat[np.nanargmin(res.dv)]
+
+    assert any(t1_min <= best_t1 <= t1_max
+               for t1_min, t1_max in window_bands(body1, body2, t1_lim))
+
+
+def test_grid_search_restricted_to_windows():
+    period = synodic_period(KERBIN, DUNA)
+    args = (KERBIN, DUNA, (0, 2 * period), (4e6, 8e6), 100000, 0, False)
+    bands = window_bands(KERBIN, DUNA, (0, 2 * period))
+
+    full = interplanetary_transfer_dv(*args, n_grid=40)
+    res = interplanetary_transfer_dv(
+        *args, n_grid=40, constraints=TransferConstraints(t1_bands=bands))
+
+    in_band = np.zeros(40, dtype=bool)
+    for t1_min, t1_max in bands:
+        in_band |= (full.t1_axis >= t1_min) & (full.t1_axis <= t1_max)
+
+    assert 0 < np.count_nonzero(in_band) < 20
+    assert np.all(np.isnan(res.dv[~in_band]))
+    assert np.allclose(res.dv[in_band], full.dv[in_band], equal_nan=True)
+    assert np.nanmin(res.dv) == np.nanmin(full.dv)
+
+
+def test_predicted_bands():
+    period = synodic_period(KERBIN, DUNA)
+    args = (KERBIN, DUNA, (0, 2 * period), (4e6, 8e6), 100000, 0, False)
+    bands = window_bands(KERBIN, DUNA, (0, 2 * period))
+
+    explicit = interplanetary_transfer_dv(
+        *args, n_grid=40, constraints=TransferConstraints(t1_bands=bands))
+    predicted = interplanetary_transfer_dv(
+        *args, n_grid=40,
+        constraints=TransferConstraints(t1_bands="predicted"))
+
+    assert np.array_equal(predicted.dv, explicit.dv, equal_nan=True)
+
+    with pytest.raises(ValueError):
+        interplanetary_transfer_dv(
+            *args, n_grid=40,
+            constraints=TransferConstraints(t1_bands="windows"))
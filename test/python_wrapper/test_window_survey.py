@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from trajectorize.ephemeris.kerbol_system import Body
+from trajectorize.trajectory.interplanetary_transfer import \
+    summarize_transfer_dv
+from trajectorize.trajectory.transfer_windows import (synodic_period,
+                                                      window_bands)
+from trajectorize.trajectory.window_survey import (_window_grids, body_pairs,
+                                                   survey_windows)
+
+KERBOL = Body.from_name("Kerbol")
+JOOL = Body.from_name("Jool")
+KERBIN = Body.from_name("Kerbin")
+DUNA = Body.from_name("Duna")
+EVE = Body.from_name("Eve")
+
+
+def test_body_pairs():
+    planet_pairs = body_pairs(KERBOL)
+    moon_pairs = body_pairs(JOOL)
+
+    assert len(planet_pairs) == 7 * 6
+    assert len(moon_pairs) == 5 * 4
+    assert (KERBIN, DUNA) in planet_pairs and (DUNA, KERBIN) in planet_pairs
+    assert all(body1.parent_id == body2.parent_id == JOOL.body_id
+               for body1, body2 in moon_pairs)
+
+
+def test_survey_matches_window_grid_searches():
+    pairs = [(KERBIN, DUNA), (KERBIN, EVE), (DUNA, KERBIN)]
+    t_lim = (0, 2 * synodic_period(KERBIN, DUNA))
+    table = survey_windows(pairs, t_lim, 100000, 60000, True,
+                           n_grid_t1=20, n_grid_tof=20, thread_count=2)
+
+    # Each window is solved on the same grid as on its own, but with
+    # ephemerides shared between all of them
+    grids = _window_grids(pairs, t_lim, 20, 20, 0.15)
+    assert len(table) == len(grids)
+    for window, grid in zip(table, grids):
+        summary = summarize_transfer_dv(
+            grid.body1, grid.body2, (grid.t1_min, grid.t1_max),
+            grid.tof_lim, 100000, 60000, True, grid.n_grid_t1,
+            grid.n_grid_tof, top_k=1)
+        assert (window.body1, window.body2) == (grid.body1, grid.body2)
+        assert (window.t1, window.tof, window.dv) == \
+            pytest.approx(summary.best, rel=1e-9)
+
+    # Ordered by pair then departure time, one window per band
+    for body1, body2 in pairs:
+        t1 = [window.t1 for window in table
+              if (window.body1, window.body2) == (body1, body2)]
+        bands = window_bands(body1, body2, t_lim)
+        assert len(t1) == len(bands)
+        assert np.all(np.diff(t1) > 0)
+        for t, (t1_min, t1_max) in zip(t1, bands):
+            # Bands are snapped outwards to the time lattice
+            slack = 0.1 * (t1_max - t1_min)
+            assert t1_min - slack <= t <= t1_max + slack
+
+
+def test_survey_across_systems():
+    pairs = [(KERBIN, DUNA),
+             (Body.from_name("Laythe"), Body.from_name("Tylo"))]
+    t_lim = (0, synodic_period(KERBIN, DUNA))
+
+    def altitude(body: Body) -> float:
+        return body.atmosphere_height + 20000
+
+    table = survey_windows(pairs, t_lim, altitude, altitude, False,
+                           n_grid_t1=10, n_grid_tof=10)
+    survey_bodies = [(window.body1, window.body2) for window in table]
+
+    assert survey_bodies[0] == pairs[0]
+    assert survey_bodies.count(pairs[1]) > 1
+    assert all(0 < window.dv < 5000 for window in table)
+
+    with pytest.raises(ValueError):
+        survey_windows([(KERBIN, Body.from_name("Mun"))], t_lim,
+                       100000, 100000, False)